@@ -1,18 +1,22 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 from tkcalendar import Calendar, DateEntry
-import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from matplotlib.figure import Figure
 from matplotlib.lines import Line2D
 from matplotlib.ticker import FuncFormatter
 from matplotlib.patches import Rectangle, Patch
-import yfinance as yf
 from datetime import datetime, timedelta
 import pandas as pd
 import numpy as np
 from scipy import stats
+from stock_risk import compute_risk_metrics, daily_returns, DEFAULT_CONFIDENCE_LEVELS
+from stock_price_store import PriceStore
+from stock_calendar import normalize_range, range_cache_key, resample_sessions
+from stock_screener import ScreenerWindow
+from stock_memory import SessionMemoryManager
+from stock_sentiment_overlay import sentiment_overlay, load_sentiment_index, DEFAULT_MAX_LAG
 
 class StockAnalyzerApp:
     def __init__(self, root):
@@ -23,11 +27,14 @@ class StockAnalyzerApp:
 
         # Variables
         self.stock_symbol = ""
-        self.start_date = (datetime.now() - timedelta(days=365)).strftime('%Y-%m-%d')  # Default to 1 year ago
-        self.end_date = datetime.now().strftime('%Y-%m-%d')  # Default to today
+        # Default to the trading sessions of the last year
+        self.start_date, self.end_date = normalize_range(datetime.now() - timedelta(days=365), datetime.now())
         self.view_type = "Weekly"  # Default view type
         self.stock_data = None
         self.chart_type = "Price Change"  # Default chart type
+        self.price_store = PriceStore()  # Local raw price + corporate action store
+        # Bounded per-symbol cache of loaded data and figures (evicted symbols are also dropped from the store)
+        self.memory = SessionMemoryManager(on_evict=self.price_store.forget)
         
         # Chart types available in the application
         self.chart_types = [
@@ -38,7 +45,9 @@ class StockAnalyzerApp:
             "Volatility",
             "Price Distribution",
             "Return Distribution",
-            "Correlation with Index"
+            "Value at Risk",
+            "Correlation with Index",
+            "Sentiment vs Price"
         ]
 
         # Create frames
@@ -57,6 +66,11 @@ class StockAnalyzerApp:
                               bg="#4CAF50", fg="blue", padx=10, pady=5)
         search_btn.pack(side="left", padx=10)
 
+        # Screener button
+        screener_btn = tk.Button(search_frame, text="Screener", command=self.open_screener,
+                                bg="#009688", fg="blue", padx=10, pady=5)
+        screener_btn.pack(side="left", padx=10)
+
         # Display selected stock
         self.stock_label = tk.Label(search_frame, text="No stock selected", bg="#f0f0f0", font=("Arial", 12))
         self.stock_label.pack(side="left", padx=10)
@@ -132,6 +146,10 @@ class StockAnalyzerApp:
                               command=lambda: self.set_stock(search_entry.get(), search_window))
         submit_btn.pack(pady=10)
 
+    def open_screener(self):
+        # Screen every symbol in the local price store; double-click a result to analyze it
+        ScreenerWindow(self.root, self.price_store, on_select=self.set_stock)
+
     def set_stock(self, symbol, window=None):
         if symbol:
             self.stock_symbol = symbol.upper()
@@ -199,8 +217,17 @@ class StockAnalyzerApp:
         cancel_btn.pack(side="left", padx=10)
 
     def set_date_range(self, start, end, window=None):
-        self.start_date = start
-        self.end_date = end
+        # Shrink the range to actual trading sessions so weekends/holidays are never requested
+        first, last = normalize_range(start, end)
+        if first is None:
+            messagebox.showwarning("Invalid Range", "The selected range contains no trading sessions.")
+            return
+
+        # Ranges covering the same sessions don't need a new analysis
+        same_sessions = (range_cache_key(self.stock_symbol, first, last) ==
+                         range_cache_key(self.stock_symbol, self.start_date, self.end_date))
+        self.start_date = first
+        self.end_date = last
         
         # Update date labels
         self.from_date_label.config(text=self.start_date)
@@ -211,7 +238,7 @@ class StockAnalyzerApp:
             window.destroy()
             
         # Reanalyze the stock with new date range if a stock is selected
-        if self.stock_symbol:
+        if self.stock_symbol and not (same_sessions and self.stock_data is not None):
             self.analyze_stock()
 
     def toggle_view_menu(self):
@@ -226,6 +253,26 @@ class StockAnalyzerApp:
         if self.stock_symbol and self.stock_data is not None:
             self.update_graph()
 
+    def fetch_end_date(self):
+        # The "To" date is inclusive in the UI but exclusive for downloads
+        return (datetime.strptime(self.end_date, '%Y-%m-%d') + timedelta(days=1)).strftime('%Y-%m-%d')
+
+    def load_prices(self, symbol):
+        """
+        Adjusted prices for the current range, reusing the session cache when the range
+        is already final (doesn't include today's still-changing session).
+        """
+        key = range_cache_key(symbol, self.start_date, self.end_date)
+        data = self.memory.get(symbol, key)
+        if data is not None and self.end_date < datetime.now().strftime('%Y-%m-%d'):
+            return data
+
+        # Fetch stock data (only missing sessions are downloaded; prices are split/dividend adjusted)
+        data = self.price_store.get_prices(symbol, self.start_date, self.fetch_end_date())
+        # Account for the raw history the price store keeps in memory for this symbol
+        self.memory.put(symbol, "raw", self.price_store.raw_prices(symbol), downcast=False)
+        return self.memory.put(symbol, key, data)
+
     def analyze_stock(self):
         if not self.stock_symbol:
             tk.messagebox.showinfo("Info", "Please select a stock first.")
@@ -234,6 +281,7 @@ class StockAnalyzerApp:
             
         try:
             # Clear graph frame
+            self.memory.release_figures()
             for widget in self.graph_frame.winfo_children():
                 widget.destroy()
                 
@@ -242,8 +290,7 @@ class StockAnalyzerApp:
             loading_label.pack(expand=True)
             self.root.update()
             
-            # Fetch stock data
-            self.stock_data = yf.download(self.stock_symbol, start=self.start_date, end=self.end_date)
+            self.stock_data = self.load_prices(self.stock_symbol)
             
             if self.stock_data.empty:
                 for widget in self.graph_frame.winfo_children():
@@ -300,7 +347,9 @@ class StockAnalyzerApp:
             "Volatility": "Historical volatility measurement using standard deviation.",
             "Price Distribution": "Histogram showing the distribution of closing prices.",
             "Return Distribution": "Distribution of daily returns with normal curve overlay.",
-            "Correlation with Index": "Correlation between the stock and a market index."
+            "Value at Risk": "Historical, parametric and Monte Carlo VaR and Expected Shortfall.",
+            "Correlation with Index": "Correlation between the stock and a market index.",
+            "Sentiment vs Price": "News sentiment from the Stock Sentiment app against returns of the selected view, with lagged correlations."
         }
         
         # Create info window
@@ -344,7 +393,8 @@ class StockAnalyzerApp:
         if self.stock_data is None or self.stock_data.empty:
             return
             
-        # Clear graph frame
+        # Clear graph frame and release the figures drawn in it
+        self.memory.release_figures()
         for widget in self.graph_frame.winfo_children():
             widget.destroy()
         
@@ -353,10 +403,10 @@ class StockAnalyzerApp:
             df = self.stock_data.copy()  # Daily data is already in this format
             title_freq = "Daily"
         elif self.view_type == "Weekly":
-            df = self.stock_data.resample('W').last()
+            df = resample_sessions(self.stock_data, 'W')
             title_freq = "Weekly"
         elif self.view_type == "Monthly":
-            df = self.stock_data.resample('M').last()
+            df = resample_sessions(self.stock_data, 'M')
             title_freq = "Monthly"
         
         # Different chart types
@@ -386,6 +436,7 @@ class StockAnalyzerApp:
             loading_label.destroy()
             
             # Embed in tkinter
+            self.memory.add_figure(self.stock_symbol, fig)
             canvas = FigureCanvasTkAgg(fig, master=self.graph_frame)
             canvas_widget = canvas.get_tk_widget()
             canvas_widget.pack(fill=tk.BOTH, expand=True)
@@ -403,6 +454,16 @@ class StockAnalyzerApp:
             explanation_label = tk.Label(explanation_frame, text=explanation_text, 
                                         bg="white", font=("Arial", 10), justify="left")
             explanation_label.pack(pady=5)
+        elif self.chart_type == "Sentiment vs Price":
+            # Sentiment overlay handles its own figure (price/sentiment panel and lag panel)
+            fig, ax = self.plot_sentiment_overlay(df, title_freq)
+            
+            # Embed in tkinter
+            self.memory.add_figure(self.stock_symbol, fig)
+            canvas = FigureCanvasTkAgg(fig, master=self.graph_frame)
+            canvas_widget = canvas.get_tk_widget()
+            canvas_widget.pack(fill=tk.BOTH, expand=True)
+            canvas.draw()
         else:
             # For all other chart types, create figure and axis
             fig = Figure(figsize=(10, 6))
@@ -416,6 +477,8 @@ class StockAnalyzerApp:
                 self.plot_volatility(df, ax, title_freq)
             elif self.chart_type == "Return Distribution":
                 self.plot_return_distribution(df, ax, title_freq)
+            elif self.chart_type == "Value at Risk":
+                self.plot_value_at_risk(df, ax, title_freq)
             
             # Rotate date labels if applicable
             if hasattr(ax, 'xaxis') and hasattr(ax.xaxis, 'get_majorticklabels'):
@@ -426,6 +489,7 @@ class StockAnalyzerApp:
             fig.tight_layout()
             
             # Embed in tkinter
+            self.memory.add_figure(self.stock_symbol, fig)
             canvas = FigureCanvasTkAgg(fig, master=self.graph_frame)
             canvas_widget = canvas.get_tk_widget()
             canvas_widget.pack(fill=tk.BOTH, expand=True)
@@ -595,6 +659,7 @@ class StockAnalyzerApp:
         fig.tight_layout()
         
         # Embed in tkinter
+        self.memory.add_figure(self.stock_symbol, fig)
         canvas = FigureCanvasTkAgg(fig, master=self.graph_frame)
         canvas_widget = canvas.get_tk_widget()
         canvas_widget.pack(fill=tk.BOTH, expand=True)
@@ -730,6 +795,7 @@ class StockAnalyzerApp:
         fig.tight_layout()
         
         # Embed in tkinter
+        self.memory.add_figure(self.stock_symbol, fig)
         canvas = FigureCanvasTkAgg(fig, master=self.graph_frame)
         canvas_widget = canvas.get_tk_widget()
         canvas_widget.pack(fill=tk.BOTH, expand=True)
@@ -822,6 +888,7 @@ class StockAnalyzerApp:
         fig.tight_layout()
         
         # Embed in tkinter
+        self.memory.add_figure(self.stock_symbol, fig)
         canvas = FigureCanvasTkAgg(fig, master=self.graph_frame)
         canvas_widget = canvas.get_tk_widget()
         canvas_widget.pack(fill=tk.BOTH, expand=True)
@@ -856,26 +923,64 @@ class StockAnalyzerApp:
         ax.set_ylabel('Density')
         ax.legend()
         ax.grid(True, alpha=0.3)
-        
+
+    def plot_value_at_risk(self, df, ax, title_freq):
+        """
+        Plot the return distribution with Value-at-Risk and Expected Shortfall markers.
+        """
+        returns = daily_returns(df['Close'])
+
+        if len(returns) < 2:
+            ax.text(0.5, 0.5, "Not enough data to calculate Value at Risk",
+                   horizontalalignment='center', verticalalignment='center', transform=ax.transAxes)
+            return
+
+        # Compute all risk estimates (fixed seed so the chart is stable between redraws)
+        metrics = compute_risk_metrics(returns, DEFAULT_CONFIDENCE_LEVELS, seed=0)
+
+        # Histogram of returns in percent
+        ax.hist(returns * 100, bins=30, alpha=0.5, color='blue', edgecolor='black', density=True)
+
+        # Draw the VaR of each method at the highest confidence level as a vertical line
+        method_colors = {"Historical": "red", "Parametric": "orange", "Monte Carlo": "purple"}
+        top_confidence = max(DEFAULT_CONFIDENCE_LEVELS)
+        for _, row in metrics[metrics['Confidence'] == top_confidence].iterrows():
+            ax.axvline(x=-row['VaR'] * 100, color=method_colors[row['Method']], linestyle='--',
+                      label=f"{row['Method']} VaR {top_confidence:.0%}: {row['VaR']*100:.2f}%")
+
+        # Summary table of VaR / ES for every confidence level
+        summary_lines = ["Method        Conf    VaR     ES"]
+        for _, row in metrics.iterrows():
+            summary_lines.append(f"{row['Method']:<12} {row['Confidence']:>5.0%} {row['VaR']*100:6.2f}% {row['ES']*100:6.2f}%")
+        ax.text(0.02, 0.98, "\n".join(summary_lines), transform=ax.transAxes, verticalalignment='top',
+               fontfamily='monospace', fontsize=8,
+               bbox=dict(boxstyle="round,pad=0.5", fc="white", alpha=0.8))
+
+        # Set titles and labels
+        ax.set_title(f'{self.stock_symbol} {title_freq} Value at Risk ({self.start_date} to {self.end_date})')
+        ax.set_xlabel(f'{title_freq} Return (%)')
+        ax.set_ylabel('Density')
+        ax.legend(loc='upper right', fontsize=8)
+        ax.grid(True, alpha=0.3)
+
     def plot_correlation(self, df, ax, title_freq):
         """
         Plot a scatter plot showing correlation between stock returns and market index.
         """
-        # Create a new figure with a single subplot
-        plt.close()  # Close the previous figure
-        fig = plt.figure(figsize=(10, 6))
+        # Create a new figure with a single subplot (not a pyplot figure, so it can't leak)
+        fig = Figure(figsize=(10, 6))
         ax = fig.add_subplot(111)
         
         try:
             # Download index data (S&P 500)
             index_symbol = "^GSPC"  # S&P 500
-            index_data = yf.download(index_symbol, start=self.start_date, end=self.end_date)
+            index_data = self.load_prices(index_symbol).copy()
             
             # Resample index data based on view type
             if self.view_type == "Weekly":
-                index_data = index_data.resample('W').last()
+                index_data = resample_sessions(index_data, 'W')
             elif self.view_type == "Monthly":
-                index_data = index_data.resample('M').last()
+                index_data = resample_sessions(index_data, 'M')
             
             # Calculate returns for both stock and index (as percentages)
             df['Stock_Return'] = df['Close'].pct_change() * 100
@@ -916,7 +1021,7 @@ class StockAnalyzerApp:
                        bbox=dict(boxstyle="round,pad=0.5", fc="yellow", alpha=0.3))
             
             # Adjust layout
-            plt.tight_layout()
+            fig.tight_layout()
             
             return fig, ax
             
@@ -926,6 +1031,74 @@ class StockAnalyzerApp:
                    horizontalalignment='center', verticalalignment='center', transform=ax.transAxes)
             return fig, ax
 
+    def plot_sentiment_overlay(self, df, title_freq):
+        """
+        Plot the returns of the (daily, weekly or monthly) bars in df with the stored news
+        sentiment of the stock, and the correlation between the two at different lags.
+        Builds its own figure with a price/sentiment panel and a lag panel.
+        """
+        fig = Figure(figsize=(10, 6))
+        price_ax = fig.add_subplot(211)
+        lag_ax = fig.add_subplot(212)
+        
+        try:
+            # Sentiment is kept per day; each day's articles count towards the bar it falls in
+            sentiment_index = load_sentiment_index(self.stock_symbol)
+            if sentiment_index.empty:
+                fig.clear()
+                ax = fig.add_subplot(111)
+                ax.text(0.5, 0.5, f"No sentiment history stored for {self.stock_symbol}.\n"
+                       f"Search for it in the Stock Sentiment app or run: python sentiment_cli.py {self.stock_symbol}",
+                       horizontalalignment='center', verticalalignment='center', transform=ax.transAxes)
+                return fig, ax
+            
+            merged, correlations = sentiment_overlay(df, sentiment_index, max_lag=DEFAULT_MAX_LAG)
+            period = {"Daily": "sessions", "Weekly": "weeks", "Monthly": "months"}[title_freq]
+            
+            # Returns as color-coded bars, sentiment on a second axis
+            returns = merged['Return'] * 100
+            colors = ['green' if r >= 0 else 'red' for r in returns.fillna(0)]
+            width = {"Daily": 1.0, "Weekly": 5.0, "Monthly": 20.0}[title_freq]
+            price_ax.bar(merged.index, returns, color=colors, alpha=0.5, width=width)
+            price_ax.set_ylabel(f'{title_freq} Return (%)')
+            price_ax.axhline(y=0, color='black', linestyle='-', alpha=0.3)
+            
+            sentiment_ax = price_ax.twinx()
+            news = merged[merged['Articles'] > 0]
+            sentiment_ax.plot(news.index, news['Sentiment'], color='blue', marker='o', markersize=3,
+                              linewidth=1, label='News sentiment (VADER compound)')
+            sentiment_ax.set_ylim(-1, 1)
+            sentiment_ax.set_ylabel('Sentiment')
+            sentiment_ax.legend(loc='upper left', fontsize=8)
+            price_ax.set_title(f'{self.stock_symbol} {title_freq} Returns and News Sentiment ({self.start_date} to {self.end_date}, '
+                               f'{len(news)} {period} with news)')
+            price_ax.xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m-%d'))
+            for label in price_ax.get_xticklabels():
+                label.set_rotation(45)
+            
+            # Correlation per lag with the 95% significance band
+            lag_colors = ['purple' if abs(c) > b else 'gray'
+                          for c, b in zip(correlations['Correlation'].fillna(0), correlations['Band'])]
+            lag_ax.bar(correlations.index, correlations['Correlation'].fillna(0), color=lag_colors, alpha=0.7)
+            lag_ax.plot(correlations.index, correlations['Band'], 'r--', linewidth=1, label='95% significance')
+            lag_ax.plot(correlations.index, -correlations['Band'], 'r--', linewidth=1)
+            lag_ax.axhline(y=0, color='black', linestyle='-', alpha=0.3)
+            lag_ax.set_xticks(correlations.index)
+            lag_ax.set_xlabel(f'Lag ({period}; positive = sentiment leads returns)')
+            lag_ax.set_ylabel('Correlation')
+            lag_ax.legend(loc='upper left', fontsize=8)
+            lag_ax.grid(True, alpha=0.3)
+            
+            fig.tight_layout()
+            return fig, price_ax
+            
+        except Exception as e:
+            fig.clear()
+            ax = fig.add_subplot(111)
+            ax.text(0.5, 0.5, f"Error building sentiment overlay:\n{str(e)}",
+                   horizontalalignment='center', verticalalignment='center', transform=ax.transAxes)
+            return fig, ax
+
 def main():
     """
     Main function to run the NASDAQ Stock Analyzer application.
@@ -0,0 +1,162 @@
+"""
+Persistent article cache for the Stock Sentiment app.
+
+Fetched articles are stored in a local SQLite database keyed by canonical URL,
+together with the extracted content, published date, sentiment scores and the
+ETag / Last-Modified validators from the response. Within the TTL an article is
+served straight from the cache; after that it is revalidated with a conditional
+request, and entries not seen for MAX_AGE are purged.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".stock_sentiment", "articles.db")
+
+# Articles younger than this are used without contacting the site
+DEFAULT_TTL = 24 * 60 * 60
+# Articles not fetched or revalidated for this long are deleted
+MAX_AGE = 30 * 24 * 60 * 60
+
+# Query parameters that only track the visitor and don't change the page
+TRACKING_PARAMS = {'fbclid', 'gclid', 'ocid', 'cvid', 'form', 'mc_cid', 'mc_eid', 'cmpid'}
+
+
+def canonical_url(url):
+    """
+    Normalize a URL so that the same article always maps to the same cache key:
+    lowercase scheme and host, no fragment, no tracking parameters, sorted query.
+    """
+    parts = urlsplit(url.strip())
+    query = [(key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+             if key.lower() not in TRACKING_PARAMS and not key.lower().startswith('utm_')]
+    path = parts.path or '/'
+    if len(path) > 1 and path.endswith('/'):
+        path = path[:-1]
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, urlencode(sorted(query)), ''))
+
+
+class ArticleCache:
+    """
+    SQLite-backed article store shared by the worker threads.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl=DEFAULT_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+
+        # A bare file name lives in the current directory, which needs no creating
+        if path != ':memory:' and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS articles (
+                    url TEXT PRIMARY KEY,
+                    title TEXT,
+                    content TEXT,
+                    published TEXT,
+                    sentiment TEXT,
+                    etag TEXT,
+                    last_modified TEXT,
+                    fetched_at REAL
+                )
+            """)
+
+    def get(self, url):
+        """
+        Return the cached entry for a URL as a dictionary, or None.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT url, title, content, published, sentiment, etag, last_modified, fetched_at "
+                "FROM articles WHERE url = ?", (canonical_url(url),)).fetchone()
+        if row is None:
+            return None
+
+        return {
+            "url": row[0],
+            "title": row[1],
+            "content": row[2],
+            "published": datetime.fromisoformat(row[3]) if row[3] else None,
+            "sentiment": json.loads(row[4]) if row[4] else None,
+            "etag": row[5],
+            "last_modified": row[6],
+            "fetched_at": row[7],
+        }
+
+    def contains(self, url):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT 1 FROM articles WHERE url = ?", (canonical_url(url),)).fetchone() is not None
+
+    def content(self, url):
+        """
+        Return only the cached text of an article, or None.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content FROM articles WHERE url = ?", (canonical_url(url),)).fetchone()
+        return row[0] if row else None
+
+    def is_fresh(self, entry):
+        return entry is not None and time.time() - entry["fetched_at"] < self.ttl
+
+    @staticmethod
+    def conditional_headers(entry):
+        """
+        Request headers that let the server answer 304 Not Modified for a cached entry.
+        """
+        headers = {}
+        if entry:
+            if entry["etag"]:
+                headers['If-None-Match'] = entry["etag"]
+            if entry["last_modified"]:
+                headers['If-Modified-Since'] = entry["last_modified"]
+        return headers
+
+    def store(self, url, content, published=None, title=None, etag=None, last_modified=None, sentiment=None):
+        """
+        Insert or replace a fetched article.
+        """
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO articles "
+                "(url, title, content, published, sentiment, etag, last_modified, fetched_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (canonical_url(url), title, content,
+                 published.isoformat() if published else None,
+                 json.dumps(sentiment) if sentiment else None,
+                 etag, last_modified, time.time()))
+
+    def touch(self, url):
+        """
+        Mark a cached article as revalidated (e.g. after a 304 response).
+        """
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE articles SET fetched_at = ? WHERE url = ?",
+                               (time.time(), canonical_url(url)))
+
+    def update_sentiment(self, url, sentiment):
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE articles SET sentiment = ? WHERE url = ?",
+                               (json.dumps(sentiment), canonical_url(url)))
+
+    def purge_expired(self, max_age=MAX_AGE):
+        """
+        Delete articles that have not been fetched or revalidated within max_age seconds.
+        Returns the number of deleted articles.
+        """
+        with self._lock, self._conn:
+            cursor = self._conn.execute("DELETE FROM articles WHERE fetched_at < ?", (time.time() - max_age,))
+            return cursor.rowcount
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
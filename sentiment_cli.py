@@ -0,0 +1,183 @@
+"""
+Headless batch sentiment runs for a watchlist of tickers.
+
+Runs the searches of many tickers at the same time through one SentimentPipeline, so
+article fetches across all tickers share a single concurrency cap, and prints a
+sentiment summary per ticker. Articles are written per ticker to
+<output>/<TICKER>/articles_<date>.csv (or Parquet parts) and added to the sentiment
+history, so repeated runs (e.g. from cron every 15 minutes) build up the daily and
+hourly indices while the article cache keeps unchanged articles from being re-fetched.
+With --tag, articles are also added to the history of every other NASDAQ company they
+mention, and the companies mentioned most are listed after the summary.
+
+    python sentiment_cli.py AAPL MSFT NVDA --hours 24
+    python sentiment_cli.py --watchlist tickers.txt --max-fetches 32 --output runs/ --json
+    python sentiment_cli.py "chip stocks" --tag
+"""
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from sentiment_engine import SentimentEngine
+from sentiment_pipeline import MAX_FETCH_WORKERS, SentimentPipeline
+from sentiment_scheduler import DEFAULT_RATE
+from sentiment_store import ticker_key
+from sentiment_tagging import DEFAULT_UNIVERSE_PATH, get_tagger
+from sentiment_writer import FORMATS, ArticleWriter
+
+# Searches in flight at once; their article fetches share the pipeline's fetch cap
+DEFAULT_PARALLEL_QUERIES = 8
+# Companies listed after the summary table with --tag
+MENTIONS_SHOWN = 20
+
+
+def read_watchlist(path):
+    """
+    Tickers from a file, one per line; blank lines and '#' comments are ignored.
+    """
+    with open(path, encoding="utf-8") as f:
+        return [line.split('#', 1)[0].strip() for line in f if line.split('#', 1)[0].strip()]
+
+
+def run_ticker(pipeline, ticker, query_template, start_date, output, fmt):
+    """
+    Search one ticker and return its summary (with the ticker and any error added).
+    """
+    query = query_template.format(ticker=ticker)
+    writer = None
+    try:
+        if output:
+            writer = ArticleWriter(os.path.join(output, ticker_key(ticker)), fmt=fmt, rotate=True, mode="a")
+        summary = pipeline.search(query, start_date, writer=writer, ticker=ticker)
+        summary["error"] = None
+    except Exception as e:
+        summary = {"query": query, "error": str(e)}
+    finally:
+        if writer is not None:
+            writer.close()
+    summary["ticker"] = ticker
+    return summary
+
+
+def run_watchlist(tickers, query_template="{ticker}", hours=None, output=None, fmt="csv",
+                  max_fetches=MAX_FETCH_WORKERS, parallel_queries=DEFAULT_PARALLEL_QUERIES, pipeline=None,
+                  rate=DEFAULT_RATE, finance=True, token_budget=None, tagger=None):
+    """
+    Run every ticker's search concurrently and return the summaries in watchlist order.
+    With a token_budget, articles are cleaned and capped at that many words before scoring.
+    """
+    start_date = datetime.now() - timedelta(hours=hours) if hours else None
+    own_pipeline = pipeline is None
+    pipeline = pipeline or SentimentPipeline(max_fetches=max_fetches, rate=rate,
+                                             engine=SentimentEngine(finance=finance, token_budget=token_budget,
+                                                                    clean=token_budget is not None),
+                                             tagger=tagger)
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, parallel_queries), thread_name_prefix="query") as executor:
+            return list(executor.map(
+                lambda ticker: run_ticker(pipeline, ticker, query_template, start_date, output, fmt), tickers))
+    finally:
+        if own_pipeline:
+            pipeline.close()
+
+
+def format_table(summaries):
+    header = (f"{'Ticker':<10}{'Articles':>9}{'Fetched':>9}{'Pos':>6}{'Neu':>6}{'Neg':>6}{'VADER':>8}"
+              f"{'TextBlob':>10}{'Finance':>9}")
+    lines = [header, "-" * len(header)]
+    for s in summaries:
+        if s.get("error"):
+            lines.append(f"{s['ticker']:<10}  error: {s['error']}")
+            continue
+        vader = f"{s['vader_compound']:.3f}" if s["vader_compound"] is not None else "-"
+        polarity = f"{s['textblob_polarity']:.3f}" if s["textblob_polarity"] is not None else "-"
+        finance = f"{s['finance_score']:.3f}" if s["finance_score"] is not None else "-"
+        lines.append(f"{s['ticker']:<10}{s['articles']:>9}{s['fetched']:>9}{s['positive']:>6}"
+                     f"{s['neutral']:>6}{s['negative']:>6}{vader:>8}{polarity:>10}{finance:>9}")
+    return "\n".join(lines)
+
+
+def format_mentions(summaries, limit=MENTIONS_SHOWN):
+    """
+    Companies mentioned across all searches, most articles first, with their mean
+    sentence-level VADER compound.
+    """
+    totals = {}
+    for s in summaries:
+        for symbol, mention in (s.get("mentions") or {}).items():
+            name, articles, compound = totals.get(symbol, (mention["name"], 0, 0.0))
+            totals[symbol] = (name, articles + mention["articles"],
+                              compound + mention["vader_compound"] * mention["articles"])
+    header = f"{'Symbol':<8}{'Company':<32}{'Articles':>9}{'VADER':>8}"
+    lines = [header, "-" * len(header)]
+    for symbol, (name, articles, compound) in sorted(totals.items(), key=lambda item: -item[1][1])[:limit]:
+        lines.append(f"{symbol:<8}{name[:31]:<32}{articles:>9}{compound / articles:>8.3f}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run news sentiment searches for a watchlist of tickers")
+    parser.add_argument("tickers", nargs="*", help="Tickers to search")
+    parser.add_argument("--watchlist", help="File with one ticker per line")
+    parser.add_argument("--query", default="{ticker}", help="Search query template (default: '{ticker}')")
+    parser.add_argument("--hours", type=float, default=None, help="Only articles from the last N hours")
+    parser.add_argument("--max-fetches", type=int, default=MAX_FETCH_WORKERS,
+                        help="Articles fetched at the same time across all tickers")
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE,
+                        help="Requests per second to any one news site (robots.txt may ask for less)")
+    parser.add_argument("--no-finance", action="store_true",
+                        help="Score with TextBlob and VADER only, without the finance lexicon")
+    parser.add_argument("--token-budget", type=int, default=None,
+                        help="Clean each article and score at most this many words, lead first "
+                             "(default: the whole article as extracted)")
+    parser.add_argument("--tag", action="store_true",
+                        help="Also attribute articles to every NASDAQ company they mention")
+    parser.add_argument("--universe", default=DEFAULT_UNIVERSE_PATH,
+                        help="NASDAQ symbol directory used by --tag (downloaded if missing)")
+    parser.add_argument("--parallel", type=int, default=DEFAULT_PARALLEL_QUERIES,
+                        help="Ticker searches running at the same time")
+    parser.add_argument("--output", help="Directory for per-ticker article files")
+    parser.add_argument("--format", choices=FORMATS, default="csv", help="Article file format")
+    parser.add_argument("--json", action="store_true", help="Print one JSON summary per line instead of a table")
+    args = parser.parse_args()
+
+    tickers = list(args.tickers)
+    if args.watchlist:
+        tickers += read_watchlist(args.watchlist)
+    # Keep the first occurrence of each ticker
+    tickers = list(dict.fromkeys(t.upper() for t in tickers))
+    if not tickers:
+        parser.error("no tickers given (pass them as arguments or with --watchlist)")
+
+    tagger = None
+    if args.tag:
+        tagger = get_tagger(args.universe)
+        if tagger is None:
+            parser.error(f"no NASDAQ symbol directory available at {args.universe}")
+
+    started = datetime.now()
+    summaries = run_watchlist(tickers, args.query, args.hours, args.output, args.format,
+                              args.max_fetches, args.parallel, rate=args.rate,
+                              finance=not args.no_finance, token_budget=args.token_budget,
+                              tagger=tagger)
+    elapsed = (datetime.now() - started).total_seconds()
+
+    if args.json:
+        for summary in summaries:
+            print(json.dumps({"time": started.isoformat(timespec="seconds"), **summary}))
+    else:
+        print(format_table(summaries))
+        if tagger is not None:
+            print(f"\nCompanies mentioned\n{format_mentions(summaries)}")
+        print(f"\n{len(tickers)} tickers in {elapsed:.1f}s")
+
+    # Non-zero exit status for schedulers when every search failed
+    if all(s.get("error") for s in summaries):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+"""
+Date parsing for the Stock Sentiment app.
+
+Search result snippets are parsed with one compiled regular expression that recognises
+relative dates ("4 hours ago", "an hour ago", "4h", "yesterday") and absolute ones
+("Jan 5, 2025", "5 January 2025", "2025-01-05", "01/05/2025") in a single pass. The
+snippets of a whole results page are joined and scanned at once, and every match is
+mapped back to the result it came from. A relative date dates its result; absolute
+dates are only used without one, and only from a short source/time element
+("Reuters · Mar 3, 2025"), since in a description ("fell 10% on March 3") they are
+usually about something else.
+
+Article pages are dated from their structured metadata, in order of reliability:
+JSON-LD datePublished, <meta> published-time tags, then <time datetime="...">.
+
+All dates are returned as naive datetimes in local time.
+"""
+import json
+import re
+from bisect import bisect_right
+from datetime import datetime, timedelta
+from email.utils import parsedate_to_datetime
+
+MONTHS = {
+    "jan": 1, "january": 1, "feb": 2, "february": 2, "mar": 3, "march": 3, "apr": 4, "april": 4,
+    "may": 5, "jun": 6, "june": 6, "jul": 7, "july": 7, "aug": 8, "august": 8,
+    "sep": 9, "sept": 9, "september": 9, "oct": 10, "october": 10, "nov": 11, "november": 11,
+    "dec": 12, "december": 12,
+}
+
+# Unit spellings -> timedelta keyword and multiplier (months and years are approximations)
+UNITS = {
+    "m": ("minutes", 1), "min": ("minutes", 1), "mins": ("minutes", 1), "minute": ("minutes", 1),
+    "minutes": ("minutes", 1),
+    "h": ("hours", 1), "hr": ("hours", 1), "hrs": ("hours", 1), "hour": ("hours", 1), "hours": ("hours", 1),
+    "d": ("days", 1), "day": ("days", 1), "days": ("days", 1),
+    "w": ("weeks", 1), "wk": ("weeks", 1), "wks": ("weeks", 1), "week": ("weeks", 1), "weeks": ("weeks", 1),
+    "mo": ("days", 30), "mos": ("days", 30), "month": ("days", 30), "months": ("days", 30),
+    "y": ("days", 365), "yr": ("days", 365), "yrs": ("days", 365), "year": ("days", 365),
+    "years": ("days", 365),
+}
+
+# Kinds of DATE_PATTERN matches that are relative to the time of the search
+RELATIVE_KINDS = ("ago", "alone", "yesterday", "today")
+# Words besides an absolute date that a snippet may hold to count as a source/time element
+MAX_SOURCE_WORDS = 4
+
+# JSON-LD keys holding the publication date, most specific first
+JSON_LD_KEYS = ("datePublished", "dateCreated")
+
+_MONTH = "|".join(sorted(MONTHS, key=len, reverse=True))
+_UNIT = "|".join(sorted(UNITS, key=len, reverse=True))
+
+# One grammar for every date format found in search results, matched against lowercased
+# text. Relative dates need "ago" unless they are the whole snippet (Bing's compact "4h"),
+# so "up 5% in 3 days" is not a date. The leading lookarounds reject, in one step, every
+# position that is not the start of a word that can begin a date.
+DATE_PATTERN = re.compile(rf"""
+    (?<!\w)(?=[0-9afjmnodsty])
+    (?:
+    (?P<ago>(?P<ago_count>\d+|an?|one)\s*(?P<ago_unit>{_UNIT})\b\.?\s+ago\b)
+  | (?P<alone>^(?P<alone_count>\d+)\s*(?P<alone_unit>{_UNIT})\.?[ \t]*$)
+  | (?P<yesterday>yesterday\b)
+  | (?P<today>today\b|\bjust\s+now\b)
+  | (?P<iso>(?P<iso_year>\d{{4}})-(?P<iso_month>\d{{2}})-(?P<iso_day>\d{{2}})\b)
+  | (?P<us>(?P<us_month>\d{{1,2}})/(?P<us_day>\d{{1,2}})/(?P<us_year>\d{{4}})\b)
+  | (?P<mdy>(?P<mdy_month>{_MONTH})\.?\s+(?P<mdy_day>\d{{1,2}})(?:st|nd|rd|th)?\b(?:,?\s+(?P<mdy_year>\d{{4}})\b)?)
+  | (?P<dmy>(?P<dmy_day>\d{{1,2}})(?:st|nd|rd|th)?\s+(?P<dmy_month>{_MONTH})\b\.?(?:,?\s+(?P<dmy_year>\d{{4}})\b)?)
+    )
+""", re.MULTILINE | re.VERBOSE)
+
+# Separates the snippets of different results in the joined text; never part of a match
+_RESULT_SEPARATOR = "\n\x1e\n"
+
+
+def _relative(count, unit, now):
+    count = 1 if count in ("a", "an", "one") else int(count)
+    keyword, multiplier = UNITS[unit]
+    return now - timedelta(**{keyword: count * multiplier})
+
+
+def _absolute(year, month, day, now):
+    try:
+        if year:
+            return datetime(int(year), month, int(day))
+        # "Jan 5" without a year: this year, unless that is still in the future
+        date = datetime(now.year, month, int(day))
+        return date if date <= now + timedelta(days=1) else date.replace(year=now.year - 1)
+    except ValueError:
+        return None
+
+
+def match_date(match, now):
+    """
+    The datetime described by a DATE_PATTERN match, or None if it is not a valid date.
+    """
+    kind = match.lastgroup
+    if kind == "ago":
+        return _relative(match["ago_count"], match["ago_unit"], now)
+    if kind == "alone":
+        return _relative(match["alone_count"], match["alone_unit"], now)
+    if kind == "yesterday":
+        return now - timedelta(days=1)
+    if kind == "today":
+        return now
+    if kind == "iso":
+        return _absolute(match["iso_year"], int(match["iso_month"]), match["iso_day"], now)
+    if kind == "us":
+        return _absolute(match["us_year"], int(match["us_month"]), match["us_day"], now)
+    if kind == "mdy":
+        return _absolute(match["mdy_year"], MONTHS[match["mdy_month"]], match["mdy_day"], now)
+    return _absolute(match["dmy_year"], MONTHS[match["dmy_month"]], match["dmy_day"], now)
+
+
+def _join(snippets):
+    # One snippet per line with collapsed whitespace, so "alone" matches exactly one whole snippet
+    return "\n".join(" ".join(snippet.split()) for snippet in snippets)
+
+
+def _snippet_dates(text, now):
+    # (position, date, relative) for the usable dates in lowercased joined snippets
+    for match in DATE_PATTERN.finditer(text):
+        relative = match.lastgroup in RELATIVE_KINDS
+        if not relative:
+            # Only from a snippet that is little more than the date itself
+            line_start = text.rfind("\n", 0, match.start()) + 1
+            line_end = text.find("\n", match.end())
+            if line_end == -1:
+                line_end = len(text)
+            words = len(text[line_start:match.start()].split()) + len(text[match.end():line_end].split())
+            if words > MAX_SOURCE_WORDS:
+                continue
+        date = match_date(match, now)
+        if date:
+            yield match.start(), date, relative
+
+
+def snippet_date(snippets, now=None):
+    """
+    Date of a single search result from the text around its link: the first relative
+    date, or else the first absolute date of a source/time element. None if there is none.
+    """
+    now = now or datetime.now()
+    absolute = None
+    for _, date, relative in _snippet_dates(_join(snippets).lower(), now):
+        if relative:
+            return date
+        absolute = absolute or date
+    return absolute
+
+
+def result_dates(snippet_lists, now=None):
+    """
+    Dates of many search results at once, from a list holding each result's snippets,
+    chosen as in snippet_date(). The snippets are scanned in one pass; returns one
+    datetime (or None) per result.
+    """
+    now = now or datetime.now()
+    texts = [_join(snippets) for snippets in snippet_lists]
+    starts = []
+    position = 0
+    for text in texts:
+        starts.append(position)
+        position += len(text) + len(_RESULT_SEPARATOR)
+
+    relative_dates = [None] * len(texts)
+    absolute_dates = [None] * len(texts)
+    # Lowercased once for the whole page
+    for position, date, relative in _snippet_dates(_RESULT_SEPARATOR.join(texts).lower(), now):
+        index = bisect_right(starts, position) - 1
+        dates = relative_dates if relative else absolute_dates
+        if dates[index] is None:
+            dates[index] = date
+    return [relative or absolute for relative, absolute in zip(relative_dates, absolute_dates)]
+
+
+def _local(date):
+    # Aware datetimes are converted to local time; naive ones are kept as they are
+    if date.tzinfo is not None:
+        date = date.astimezone().replace(tzinfo=None)
+    return date
+
+
+def parse_datetime(text):
+    """
+    Parse a machine-readable date: ISO 8601 ("2025-01-05", "2025-01-05T14:30:00Z"),
+    RFC 2822 ("Sun, 05 Jan 2025 14:30:00 GMT") or a written date ("January 5, 2025").
+    Returns None if the text is not a date.
+    """
+    if not text or not isinstance(text, str):
+        return None
+    text = text.strip()
+    try:
+        return _local(datetime.fromisoformat(text.replace('Z', '+00:00')))
+    except ValueError:
+        pass
+    try:
+        return _local(parsedate_to_datetime(text))
+    except (TypeError, ValueError, IndexError):
+        pass
+    match = DATE_PATTERN.search(text.lower())
+    if match and match.lastgroup in ("iso", "us", "mdy", "dmy") and (
+            match.lastgroup in ("iso", "us") or match[match.lastgroup + "_year"]):
+        return match_date(match, datetime.now())
+    return None
+
+
+def _json_ld_nodes(data):
+    # Walk dicts and lists, including "@graph" containers
+    if isinstance(data, dict):
+        yield data
+        for value in data.values():
+            if isinstance(value, (dict, list)):
+                yield from _json_ld_nodes(value)
+    elif isinstance(data, list):
+        for value in data:
+            yield from _json_ld_nodes(value)
+
+
+def json_ld_date(scripts):
+    """
+    Publication date from the text of <script type="application/ld+json"> elements.
+    """
+    for script in scripts:
+        try:
+            data = json.loads(script, strict=False)
+        except (TypeError, ValueError):
+            continue
+        for key in JSON_LD_KEYS:
+            for node in _json_ld_nodes(data):
+                date = parse_datetime(node.get(key))
+                if date:
+                    return date
+    return None
+
+
+def page_date(json_ld_scripts=(), meta_values=(), time_values=()):
+    """
+    Publication date of an article page from its JSON-LD scripts, published-time <meta>
+    contents and <time datetime> values, trying them in that order.
+    """
+    date = json_ld_date(json_ld_scripts)
+    if date:
+        return date
+    for value in list(meta_values) + list(time_values):
+        date = parse_datetime(value)
+        if date:
+            return date
+    return None
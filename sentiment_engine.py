@@ -0,0 +1,132 @@
+"""
+Sentiment scoring engine for the Stock Sentiment app.
+
+The VADER lexicon and the TextBlob pattern analyzer are loaded once per process and
+shared by every thread, instead of being rebuilt for each article. Next to them, the
+finance lexicon of sentiment_lexicon.py scores the same text for finance-specific
+wording (on by default; SentimentEngine(finance=False) leaves it out). Article text is
+scored as extracted; SentimentEngine(clean=True) first removes boilerplate and repeats
+and caps it at a token budget with sentiment_preprocess.py, which changes the scores.
+score_batch() scores many articles in one call.
+"""
+import threading
+
+from textblob.en.sentiments import PatternAnalyzer
+from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+
+from sentiment_lexicon import get_lexicon
+from sentiment_preprocess import prepare_text
+
+# Label thresholds (same as the original per-article analysis)
+TEXTBLOB_THRESHOLD = 0.1
+VADER_THRESHOLD = 0.05
+
+
+def neutral_scores(finance=False):
+    """
+    Scores used for articles that could not be fetched or have no text.
+    """
+    scores = {
+        "textblob": {"sentiment": "NEUTRAL", "polarity": 0.0, "subjectivity": 0.0},
+        "vader": {"sentiment": "NEUTRAL", "compound": 0.0, "pos": 0.0, "neg": 0.0, "neu": 0.0},
+    }
+    if finance:
+        scores["finance"] = {"sentiment": "NEUTRAL", "score": 0.0, "pos": 0.0, "neg": 0.0, "terms": 0}
+    return scores
+
+
+def textblob_label(polarity):
+    if polarity > TEXTBLOB_THRESHOLD:
+        return "POSITIVE"
+    if polarity < -TEXTBLOB_THRESHOLD:
+        return "NEGATIVE"
+    return "NEUTRAL"
+
+
+def vader_label(compound):
+    if compound >= VADER_THRESHOLD:
+        return "POSITIVE"
+    if compound <= -VADER_THRESHOLD:
+        return "NEGATIVE"
+    return "NEUTRAL"
+
+
+class SentimentEngine:
+    """
+    TextBlob + VADER (+ finance lexicon) scorer with the analyzers loaded once.
+    The analyzers only read their lexicons while scoring, so one engine can be
+    shared by all worker threads.
+    """
+
+    def __init__(self, finance=True, token_budget=None, clean=False):
+        self.vader = SentimentIntensityAnalyzer()
+        self.textblob = PatternAnalyzer()
+        self.finance = finance
+        self.lexicon = get_lexicon() if finance else None
+        # clean=True scores the prepared text, capped at token_budget words (None: no cap);
+        # otherwise the text is scored exactly as extracted and token_budget is ignored
+        self.token_budget = token_budget
+        self.clean = clean
+
+    def score(self, content, title=""):
+        """
+        Score one article. Returns the same dictionary the app has always stored:
+        {"textblob": {...}, "vader": {...}}, plus "finance": {...} when the finance
+        lexicon is enabled.
+        """
+        if not content or content.startswith("Error fetching article"):
+            return neutral_scores(self.finance)
+
+        if self.clean:
+            content = prepare_text(content, self.token_budget)
+
+        # Combine title and content with heavier weight on title
+        analysis_text = f"{title} {title} {content}"
+
+        polarity, subjectivity = self.textblob.analyze(analysis_text)
+
+        try:
+            vader_scores = self.vader.polarity_scores(analysis_text)
+        except Exception:
+            # Fallback if VADER fails
+            vader_scores = {'compound': 0.0, 'pos': 0.0, 'neg': 0.0, 'neu': 0.0}
+
+        scores = {
+            "textblob": {
+                "sentiment": textblob_label(polarity),
+                "polarity": polarity,
+                "subjectivity": subjectivity
+            },
+            "vader": {
+                "sentiment": vader_label(vader_scores['compound']),
+                "compound": vader_scores['compound'],
+                "pos": vader_scores['pos'],
+                "neg": vader_scores['neg'],
+                "neu": vader_scores['neu']
+            }
+        }
+        if self.lexicon is not None:
+            scores["finance"] = self.lexicon.score(analysis_text)
+        return scores
+
+    def score_batch(self, articles):
+        """
+        Score a list of (content, title) pairs and return the scores in the same order.
+        """
+        return [self.score(content, title) for content, title in articles]
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_engine():
+    """
+    Return the process-wide shared engine, creating it on first use.
+    """
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = SentimentEngine()
+        return _engine
+
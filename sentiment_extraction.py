@@ -0,0 +1,270 @@
+"""
+HTML extraction engine for the Stock Sentiment app.
+
+Search result pages and article pages are parsed with lxml when it is installed, with
+targeted XPath queries for the content container, paragraphs and metadata, and every
+paragraph's text computed once. Without lxml the same rules run on BeautifulSoup's
+built-in html.parser.
+
+Search results are turned into plain dictionaries (title, link and the text of the
+elements that follow the link), so worker threads never share a parse tree.
+
+Benchmark both engines over a saved corpus of news pages:
+
+    python sentiment_extraction.py --save-corpus "AAPL stock" corpus/
+    python sentiment_extraction.py --benchmark corpus/
+"""
+import argparse
+import glob
+import os
+import re
+import time
+
+from bs4 import BeautifulSoup
+
+from sentiment_dates import page_date
+
+try:
+    import lxml.html
+    from lxml import etree
+    HAVE_LXML = True
+except ImportError:
+    HAVE_LXML = False
+
+# Class name fragments that mark the element holding the article text
+CONTENT_CLASS_HINTS = ['article', 'content', 'story', 'body']
+# Paragraph text that marks navigation, cookie banners and newsletter prompts
+BOILERPLATE_HINTS = ['cookie', 'privacy', 'sign up', 'subscribe']
+MIN_PARAGRAPH_LENGTH = 40
+# <meta property="..."> and <meta name="..."> / itemprop values holding the published date
+DATE_META_PROPERTIES = ['article:published_time', 'og:published_time', 'publication_date']
+DATE_META_NAMES = ['pubdate', 'publishdate', 'publish-date', 'date', 'dc.date', 'dc.date.issued',
+                   'parsely-pub-date', 'sailthru.date', 'datePublished']
+# Number of elements after a search result link searched for its date
+SNIPPET_ELEMENTS = 3
+
+_UPPER = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+_LOWER = 'abcdefghijklmnopqrstuvwxyz'
+_CLASS = f"translate(@class, '{_UPPER}', '{_LOWER}')"
+
+if HAVE_LXML:
+    # First article/main/div (in document order) whose class mentions one of the hints
+    _CONTENT_XPATH = etree.XPath(
+        "(//article | //main | //div)[" +
+        " or ".join(f"contains({_CLASS}, '{hint}')" for hint in CONTENT_CLASS_HINTS) +
+        "][1]")
+    _PARAGRAPHS_XPATH = etree.XPath(".//p")
+    _META_XPATH = etree.XPath(
+        "//meta[" + " or ".join([f"@property='{name}'" for name in DATE_META_PROPERTIES] +
+                                [f"@name='{name}' or @itemprop='{name}'" for name in DATE_META_NAMES]) +
+        "]/@content")
+    _JSON_LD_XPATH = etree.XPath("//script[@type='application/ld+json']/text()")
+    _TIME_XPATH = etree.XPath("//time/@datetime")
+    _RESULT_LINKS_XPATH = etree.XPath("//a[contains(concat(' ', normalize-space(@class), ' '), ' title ')]")
+    # The elements after a result's container in document order (its own children first)
+    _SNIPPETS_XPATH = etree.XPath(f"(descendant::* | following::*)[position() <= {SNIPPET_ELEMENTS}]")
+
+
+def _join_paragraphs(texts):
+    # Same cleanup as before: join and collapse whitespace
+    return re.sub(r'\s+', ' ', ' '.join(texts)).strip()
+
+
+def select_content(container_paragraphs, all_paragraphs):
+    """
+    Apply the content rules to paragraph texts that were already extracted once:
+    the paragraphs of the content container, else the long non-boilerplate paragraphs
+    of the page, else every paragraph.
+    """
+    content = _join_paragraphs(container_paragraphs) if container_paragraphs else ""
+
+    if not content:
+        # Filter out very short paragraphs and navigation/cookie related text
+        filtered = [text for text in all_paragraphs
+                    if len(text) > MIN_PARAGRAPH_LENGTH
+                    and not any(hint in text.lower() for hint in BOILERPLATE_HINTS)]
+        content = _join_paragraphs(filtered)
+
+    if not content:
+        content = _join_paragraphs(all_paragraphs)
+    return content
+
+
+def _lxml_document(html):
+    # Parse a page with lxml; None for empty or unparsable input
+    if isinstance(html, str):
+        # lxml refuses str input that carries an XML encoding declaration
+        html = html.encode('utf-8')
+    try:
+        return lxml.html.document_fromstring(html, parser=lxml.html.HTMLParser(encoding='utf-8'))
+    except (etree.ParserError, ValueError):
+        return None
+
+
+def _article_lxml(html):
+    doc = _lxml_document(html)
+    if doc is None:
+        return "", None
+
+    all_paragraphs = [p.text_content().strip() for p in _PARAGRAPHS_XPATH(doc)]
+    container = _CONTENT_XPATH(doc)
+    container_paragraphs = []
+    if container:
+        container_paragraphs = [p.text_content().strip() for p in _PARAGRAPHS_XPATH(container[0])]
+
+    return select_content(container_paragraphs, all_paragraphs), _page_date_lxml(doc)
+
+
+def _page_date_lxml(doc):
+    return page_date(_JSON_LD_XPATH(doc), _META_XPATH(doc), _TIME_XPATH(doc))
+
+
+def _article_bs4(html):
+    soup = BeautifulSoup(html, 'html.parser')
+
+    all_paragraphs = [p.get_text().strip() for p in soup.find_all('p')]
+    container = soup.find(['article', 'main', 'div'],
+                          class_=lambda c: c and any(x in str(c).lower() for x in CONTENT_CLASS_HINTS))
+    container_paragraphs = []
+    if container:
+        container_paragraphs = [p.get_text().strip() for p in container.find_all('p')]
+
+    return select_content(container_paragraphs, all_paragraphs), _page_date_bs4(soup)
+
+
+def _page_date_bs4(soup):
+    scripts = [script.string or "" for script in soup.find_all('script', type='application/ld+json')]
+    meta_names = set(DATE_META_PROPERTIES + DATE_META_NAMES)
+    metas = [meta.get('content') for meta in soup.find_all('meta')
+             if meta.get('content') and (meta.get('property') in meta_names or meta.get('name') in meta_names
+                                         or meta.get('itemprop') in meta_names)]
+    times = [tag['datetime'] for tag in soup.find_all('time', datetime=True)]
+    return page_date(scripts, metas, times)
+
+
+def extract_article(html, engine=None):
+    """
+    Extract (content, published_date) from an article page.
+    engine is "lxml" or "bs4"; by default lxml is used when available.
+    """
+    engine = engine or ("lxml" if HAVE_LXML else "bs4")
+    if engine == "lxml":
+        return _article_lxml(html)
+    return _article_bs4(html)
+
+
+def extract_page_date(html, engine=None):
+    """
+    Only the published date of a page, which may be cut off (e.g. just its first bytes).
+    """
+    engine = engine or ("lxml" if HAVE_LXML else "bs4")
+    if engine == "lxml":
+        doc = _lxml_document(html)
+        return _page_date_lxml(doc) if doc is not None else None
+    return _page_date_bs4(BeautifulSoup(html, 'html.parser'))
+
+
+def _results_lxml(html):
+    doc = _lxml_document(html)
+    if doc is None:
+        return []
+
+    results = []
+    for link in _RESULT_LINKS_XPATH(doc):
+        href = link.get('href')
+        if not href:
+            continue
+        parent = link.getparent()
+        snippets = [element.text_content().strip() for element in _SNIPPETS_XPATH(parent)]
+        results.append({"title": link.text_content(), "link": href, "snippets": snippets})
+    return results
+
+
+def _results_bs4(html):
+    soup = BeautifulSoup(html, 'html.parser')
+
+    results = []
+    for link in soup.find_all('a', {'class': 'title'}):
+        href = link.get('href')
+        if not href:
+            continue
+        snippets = [element.get_text().strip() for element in link.parent.find_all_next(limit=SNIPPET_ELEMENTS)]
+        results.append({"title": link.get_text(), "link": href, "snippets": snippets})
+    return results
+
+
+def parse_search_results(html, engine=None):
+    """
+    Turn a Bing News results page into a list of {"title", "link", "snippets"} records,
+    in ranking order. snippets holds the text of the elements that follow each link,
+    which is where the relative date ("3 hours ago") appears.
+    """
+    engine = engine or ("lxml" if HAVE_LXML else "bs4")
+    if engine == "lxml":
+        return _results_lxml(html)
+    return _results_bs4(html)
+
+
+def benchmark(corpus_dir, engines=None, repeat=3):
+    """
+    Time article extraction over every .html file in corpus_dir with each engine.
+    Returns {engine: pages per second}.
+    """
+    pages = []
+    for path in sorted(glob.glob(os.path.join(corpus_dir, "*.html"))):
+        with open(path, encoding="utf-8", errors="replace") as f:
+            pages.append(f.read())
+    if not pages:
+        raise ValueError(f"No .html files found in {corpus_dir}")
+
+    engines = engines or (["bs4", "lxml"] if HAVE_LXML else ["bs4"])
+    throughput = {}
+    for engine in engines:
+        started = time.perf_counter()
+        for _ in range(repeat):
+            for html in pages:
+                extract_article(html, engine)
+        throughput[engine] = len(pages) * repeat / (time.perf_counter() - started)
+    return throughput
+
+
+def save_corpus(query, corpus_dir):
+    """
+    Download the Bing News results for a query and the article pages they link to
+    into corpus_dir, for benchmarking. Returns the number of pages saved.
+    """
+    from sentiment_http import http_get
+
+    os.makedirs(corpus_dir, exist_ok=True)
+    response = http_get(f"https://www.bing.com/news/search?q={query}")
+    saved = 0
+    for i, result in enumerate(parse_search_results(response.text)):
+        try:
+            page = http_get(result["link"])
+        except Exception as e:
+            print(f"Skipping {result['link']}: {e}")
+            continue
+        with open(os.path.join(corpus_dir, f"article_{i:03d}.html"), "w", encoding="utf-8") as f:
+            f.write(page.text)
+        saved += 1
+    return saved
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark article extraction over saved news pages")
+    parser.add_argument("--save-corpus", nargs=2, metavar=("QUERY", "DIR"),
+                        help="Download the articles of a news search into DIR")
+    parser.add_argument("--benchmark", metavar="DIR", help="Time extraction over the .html files in DIR")
+    parser.add_argument("--repeat", type=int, default=3, help="Passes over the corpus per engine")
+    args = parser.parse_args()
+
+    if args.save_corpus:
+        query, corpus_dir = args.save_corpus
+        print(f"Saved {save_corpus(query, corpus_dir)} pages to {corpus_dir}")
+    if args.benchmark:
+        for engine, pages_per_second in benchmark(args.benchmark, repeat=args.repeat).items():
+            print(f"{engine:>5}: {pages_per_second:8.1f} pages/s")
+
+
+if __name__ == "__main__":
+    main()
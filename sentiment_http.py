@@ -0,0 +1,130 @@
+"""
+Shared HTTP layer for the Stock Sentiment app.
+
+Every network call goes through one requests.Session so connections to each host are
+pooled and kept alive across the dozens of fetches made per search, with the same
+headers, compression, timeouts and retry policy everywhere.
+"""
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+USER_AGENT = ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+              '(KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36')
+
+# (connect, read) timeout in seconds used for every request
+DEFAULT_TIMEOUT = (5, 10)
+
+# Connection pool sizing: number of hosts kept and connections kept per host
+POOL_CONNECTIONS = 64
+POOL_MAXSIZE = 8
+
+# Retries for connection errors and temporary server errors, with exponential backoff
+MAX_RETRIES = 3
+BACKOFF_FACTOR = 0.5
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+# Bytes read by http_get_prefix: enough for the <head> of most news pages
+PREFIX_BYTES = 64 * 1024
+
+# Requests paced by the crawl scheduler leave 429/503 to it (it pauses the whole domain)
+PACED_RETRY_STATUSES = (500, 502, 504)
+
+
+def _accept_encoding():
+    # Only advertise brotli when urllib3 can decode it
+    try:
+        import brotli  # noqa: F401
+    except ImportError:
+        try:
+            import brotlicffi  # noqa: F401
+        except ImportError:
+            return "gzip, deflate"
+    return "gzip, deflate, br"
+
+
+DEFAULT_HEADERS = {
+    'User-Agent': USER_AGENT,
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.9',
+    'Accept-Encoding': _accept_encoding(),
+    'Connection': 'keep-alive',
+}
+
+
+def create_session(retry_statuses=RETRY_STATUSES):
+    """
+    Create a session with pooled keep-alive connections, retries and the default headers.
+    """
+    session = requests.Session()
+    session.headers.update(DEFAULT_HEADERS)
+
+    retry = Retry(
+        total=MAX_RETRIES,
+        backoff_factor=BACKOFF_FACTOR,
+        status_forcelist=retry_statuses,
+        allowed_methods=frozenset(['GET', 'HEAD']),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE, max_retries=retry)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+_sessions = {}
+_session_lock = threading.Lock()
+
+
+def get_session(paced=False):
+    """
+    Return the process-wide shared session, creating it on first use.
+    The paced session does not retry 429/503 itself; see sentiment_scheduler.
+    """
+    with _session_lock:
+        if paced not in _sessions:
+            _sessions[paced] = create_session(PACED_RETRY_STATUSES if paced else RETRY_STATUSES)
+        return _sessions[paced]
+
+
+def http_get(url, timeout=DEFAULT_TIMEOUT, paced=False, **kwargs):
+    """
+    GET a URL through the shared session.
+    """
+    return get_session(paced).get(url, timeout=timeout, **kwargs)
+
+
+
+def http_get_prefix(url, max_bytes=PREFIX_BYTES, timeout=DEFAULT_TIMEOUT, paced=False, headers=None, **kwargs):
+    """
+    GET only the start of a page: asks for the first max_bytes with a Range header and
+    stops reading there even if the server sends the whole page.
+    Returns (response, text, complete) where complete tells whether text is the entire page.
+    """
+    headers = {**(headers or {}), 'Range': f"bytes=0-{max_bytes - 1}"}
+    response = get_session(paced).get(url, timeout=timeout, headers=headers, stream=True, **kwargs)
+    chunks = []
+    size = 0
+    complete = True
+    try:
+        for chunk in response.iter_content(chunk_size=16 * 1024):
+            chunks.append(chunk)
+            size += len(chunk)
+            if size >= max_bytes:
+                complete = False
+                break
+    except (requests.exceptions.ChunkedEncodingError, requests.exceptions.ContentDecodingError):
+        # A cut-off compressed range: keep what was decoded
+        complete = False
+    finally:
+        response.close()
+
+    body = b"".join(chunks)[:max_bytes]
+    # A 206 answer is only the whole page if the server says the range covers all of it
+    if response.status_code == 206:
+        total = response.headers.get('Content-Range', '').rpartition('/')[2]
+        complete = complete and total.isdigit() and int(total) <= max_bytes
+    text = body.decode(response.encoding or 'utf-8', errors='replace')
+    return response, text, complete
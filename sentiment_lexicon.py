@@ -0,0 +1,311 @@
+"""
+Finance-domain lexicon scorer for the Stock Sentiment app.
+
+TextBlob and VADER are general-purpose: they read "beat" and "short" as violence and
+brevity, and do not know "bearish", "downgrade" or "raises guidance" at all. This
+scorer uses a small hand-made finance lexicon of words and phrases, compiled once into
+a token trie (a hash map per trie level), so an article is scored in a single pass
+over its tokens with no model and no network access:
+- the longest phrase starting at each token wins ("short squeeze" over "short")
+- a negator within the three tokens before a term flips and dampens it ("did not beat")
+- an intensifier or dampener right before or after a term scales it ("fell sharply")
+
+Scores are summed and normalised to -1..+1 the same way VADER's compound score is.
+
+    python sentiment_lexicon.py --text "Apple beats estimates and raises guidance"
+    python sentiment_lexicon.py --benchmark corpus/
+"""
+import argparse
+import glob
+import math
+import os
+import re
+import time
+
+# Valences on VADER's scale (about -4..+4); single words and space-separated phrases
+FINANCE_TERMS = {
+    # Results against expectations
+    "beat": 1.5, "beats": 1.5, "topped": 1.5, "tops": 1.2, "exceeded": 1.5, "exceeds": 1.5,
+    "surpassed": 1.5, "surpasses": 1.5, "outperform": 1.5, "outperformed": 1.5, "outperforms": 1.5,
+    "miss": -1.5, "missed": -1.5, "misses": -1.5, "underperform": -1.5, "underperformed": -1.5,
+    "underperforms": -1.5, "fell short": -1.8, "falls short": -1.8, "shortfall": -1.8,
+    "in line with expectations": 0.3, "record revenue": 2.0, "record profit": 2.2, "record quarter": 2.0,
+    "profit warning": -2.5, "profit warnings": -2.5,
+    # Analyst views and ratings
+    "bullish": 2.0, "bearish": -2.0, "upgrade": 1.8, "upgrades": 1.8, "upgraded": 1.8,
+    "downgrade": -1.8, "downgrades": -1.8, "downgraded": -1.8, "overweight": 1.2, "underweight": -1.2,
+    "strong buy": 2.0, "buy rating": 1.5, "sell rating": -1.5, "outperform rating": 1.5,
+    "underperform rating": -1.5,
+    # Price moves
+    "rally": 1.5, "rallies": 1.5, "rallied": 1.5, "surge": 1.8, "surges": 1.8, "surged": 1.8,
+    "soar": 2.0, "soars": 2.0, "soared": 2.0, "jump": 1.2, "jumps": 1.2, "jumped": 1.2,
+    "climb": 1.0, "climbs": 1.0, "climbed": 1.0, "gain": 1.0, "gains": 1.0, "gained": 1.0,
+    "rebound": 1.2, "rebounds": 1.2, "rebounded": 1.2, "rise": 0.8, "rises": 0.8, "rose": 0.8,
+    "plunge": -2.2, "plunges": -2.2, "plunged": -2.2, "tumble": -1.8, "tumbles": -1.8, "tumbled": -1.8,
+    "slump": -1.8, "slumps": -1.8, "slumped": -1.8, "sink": -1.5, "sinks": -1.5, "sank": -1.5,
+    "slide": -1.2, "slides": -1.2, "slid": -1.2, "drop": -1.0, "drops": -1.0, "dropped": -1.0,
+    "fall": -0.8, "falls": -0.8, "fell": -0.8, "decline": -1.0, "declines": -1.0, "declined": -1.0,
+    "soaring": 2.0, "surging": 1.8, "rallying": 1.5, "jumping": 1.2, "climbing": 1.0,
+    "plunging": -2.2, "tumbling": -1.8, "slumping": -1.8, "sinking": -1.5, "sliding": -1.2,
+    "falling": -0.8, "crashing": -2.8, "declining": -1.0,
+    "selloff": -2.0, "sell-off": -2.0, "crash": -2.8, "crashed": -2.8, "crashes": -2.8,
+    "all-time high": 2.0, "record high": 2.0, "52-week high": 1.5, "52-week low": -1.5,
+    "record low": -2.0, "volatile": -0.8, "volatility": -0.6,
+    # Short selling ("short" alone is not scored)
+    "short seller": -1.5, "short sellers": -1.5, "short selling": -1.5, "short position": -1.2,
+    "short positions": -1.2, "short interest": -1.0, "short report": -2.0, "short squeeze": 1.2,
+    # Company events
+    "dividend": 0.8, "dividends": 0.8, "buyback": 1.2, "buybacks": 1.2, "share repurchase": 1.2,
+    "acquisition": 0.5, "partnership": 0.8, "approval": 1.2, "approved": 1.0, "breakthrough": 2.0,
+    "profitable": 1.5, "profitability": 1.0, "growth": 1.0, "tailwind": 1.2, "tailwinds": 1.2,
+    "headwind": -1.2, "headwinds": -1.2, "layoff": -1.8, "layoffs": -1.8, "job cuts": -1.8,
+    "restructuring": -0.8, "bankruptcy": -3.0, "bankrupt": -3.0, "insolvency": -3.0,
+    "delisted": -2.5, "delisting": -2.5, "lawsuit": -1.5, "lawsuits": -1.5,
+    "investigation": -1.5, "subpoena": -1.8, "fraud": -3.0, "recall": -1.5,
+    "recalls": -1.5, "writedown": -1.8, "write-down": -1.8, "impairment": -1.5, "dilution": -1.2,
+    "dilutive": -1.2, "losses": -1.2, "net loss": -1.5, "liquidity crunch": -2.5, "going concern": -2.5,
+    "margin expansion": 1.5, "margin compression": -1.5, "cash burn": -1.2, "overvalued": -1.2,
+    "undervalued": 1.2, "upside": 1.0, "downside": -1.0, "outflows": -1.0, "inflows": 1.0,
+    # "default" and "probe" alone are everyday words ("by default", "space probe")
+    "debt default": -2.2, "bond default": -2.2, "loan default": -2.2, "payment default": -2.2,
+    "sovereign default": -2.2, "defaults on": -2.2, "defaulted on": -2.2, "defaulting on": -2.2,
+    "regulatory probe": -1.5, "federal probe": -1.5, "criminal probe": -1.5, "antitrust probe": -1.5,
+    "sec probe": -1.5, "doj probe": -1.5, "fraud probe": -1.5, "opens probe": -1.5, "launches probe": -1.5,
+}
+
+# Verb forms and objects combined into phrases such as "raises full-year guidance"
+_UP_VERBS = ["raise", "raises", "raised", "raising", "boost", "boosts", "boosted", "lift", "lifts",
+             "lifted", "hike", "hikes", "hiked", "increase", "increases", "increased"]
+_DOWN_VERBS = ["cut", "cuts", "cutting", "lower", "lowers", "lowered", "lowering", "slash", "slashes",
+               "slashed", "reduce", "reduces", "reduced", "trim", "trims", "trimmed", "withdraw",
+               "withdraws", "withdrew", "suspend", "suspends", "suspended"]
+_GUIDANCE_OBJECTS = ["guidance", "outlook", "forecast", "forecasts", "dividend", "price target", "target",
+                     "estimates", "rating"]
+_FILLERS = ["", "its", "their", "the", "full-year", "annual", "fiscal", "quarterly", "its full-year",
+            "its annual"]
+_BEAT_VERBS = ["beat", "beats", "beating", "top", "tops", "topped", "exceed", "exceeds", "exceeded",
+               "surpass", "surpasses", "surpassed"]
+_MISS_VERBS = ["miss", "misses", "missed", "missing"]
+_EXPECTATIONS = ["expectations", "estimates", "forecasts", "consensus", "analyst estimates",
+                 "analysts' estimates", "wall street estimates", "street estimates"]
+
+
+def _phrase_terms():
+    terms = {}
+    for filler in _FILLERS:
+        for obj in _GUIDANCE_OBJECTS:
+            for verb in _UP_VERBS:
+                terms[" ".join(filter(None, [verb, filler, obj]))] = 2.0
+            for verb in _DOWN_VERBS:
+                terms[" ".join(filter(None, [verb, filler, obj]))] = -2.0
+    for obj in _EXPECTATIONS:
+        for verb in _BEAT_VERBS:
+            terms[f"{verb} {obj}"] = 2.2
+        for verb in _MISS_VERBS:
+            terms[f"{verb} {obj}"] = -2.2
+    return terms
+
+
+NEGATORS = {"not", "no", "never", "without", "neither", "nor", "none", "nobody", "nothing", "cannot",
+            "failed", "fails", "fail"}
+NEGATION_WINDOW = 3
+NEGATION_SCALAR = -0.74  # VADER's factor for negated terms
+
+# Multipliers for the token right before or right after a term
+INTENSIFIERS = {
+    "sharply": 1.3, "significantly": 1.3, "strongly": 1.3, "substantially": 1.3, "dramatically": 1.4,
+    "massively": 1.4, "very": 1.2, "deeply": 1.3, "extremely": 1.4, "hugely": 1.4, "steeply": 1.3,
+    "slightly": 0.6, "modestly": 0.7, "marginally": 0.6, "somewhat": 0.7, "mildly": 0.7,
+}
+
+FINANCE_THRESHOLD = 0.05
+# Same normalisation constant as VADER's compound score
+NORMALIZATION_ALPHA = 15
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:['’\-.][a-z0-9]+)*'?")
+
+
+def tokenize(text):
+    return _TOKEN_PATTERN.findall(text.lower().replace("’", "'"))
+
+
+def finance_label(score):
+    if score >= FINANCE_THRESHOLD:
+        return "POSITIVE"
+    if score <= -FINANCE_THRESHOLD:
+        return "NEGATIVE"
+    return "NEUTRAL"
+
+
+def _is_negator(token):
+    return token in NEGATORS or token.endswith("n't")
+
+
+class FinanceLexicon:
+    """
+    Finance lexicon compiled into a token trie. Nodes are numbered; _root maps a first
+    token to its node, _edges maps (node, next token) to the child node and _values
+    holds the valence of the phrase ending at each node (None inside longer phrases).
+    """
+
+    def __init__(self, terms=None):
+        terms = terms if terms is not None else {**_phrase_terms(), **FINANCE_TERMS}
+        self._root = {}
+        self._edges = {}
+        self._values = [None]
+        for phrase, valence in terms.items():
+            self._add(tokenize(phrase), valence)
+
+    def __len__(self):
+        return sum(value is not None for value in self._values)
+
+    def _add(self, tokens, valence):
+        node = None
+        for token in tokens:
+            table, key = (self._root, token) if node is None else (self._edges, (node, token))
+            child = table.get(key)
+            if child is None:
+                child = len(self._values)
+                self._values.append(None)
+                table[key] = child
+            node = child
+        if node is not None:
+            self._values[node] = valence
+
+    def matches(self, tokens):
+        """
+        Yield (start, end, valence) for the longest lexicon term at each position,
+        scanning left to right without overlaps.
+        """
+        root, edges, values = self._root, self._edges, self._values
+        n = len(tokens)
+        i = 0
+        while i < n:
+            node = root.get(tokens[i])
+            if node is None:
+                i += 1
+                continue
+            best = None
+            j = i
+            while True:
+                if values[node] is not None:
+                    best = (j, values[node])
+                j += 1
+                if j >= n:
+                    break
+                node = edges.get((node, tokens[j]))
+                if node is None:
+                    break
+            if best is None:
+                i += 1
+                continue
+            yield i, best[0] + 1, best[1]
+            i = best[0] + 1
+
+    def score_tokens(self, tokens):
+        """
+        Score a token list: {"sentiment", "score", "pos", "neg", "terms"} where score is
+        in -1..+1, pos/neg are the summed positive and negative valences and terms is
+        the number of lexicon terms found.
+        """
+        pos = neg = 0.0
+        terms = 0
+        for start, end, valence in self.matches(tokens):
+            terms += 1
+            if start > 0:
+                valence *= INTENSIFIERS.get(tokens[start - 1], 1.0)
+            if end < len(tokens):
+                valence *= INTENSIFIERS.get(tokens[end], 1.0)
+            if any(_is_negator(token) for token in tokens[max(0, start - NEGATION_WINDOW):start]):
+                valence *= NEGATION_SCALAR
+            if valence > 0:
+                pos += valence
+            else:
+                neg += valence
+
+        total = pos + neg
+        score = total / math.sqrt(total * total + NORMALIZATION_ALPHA) if total else 0.0
+        return {"sentiment": finance_label(score), "score": score, "pos": pos, "neg": abs(neg), "terms": terms}
+
+    def score(self, text):
+        return self.score_tokens(tokenize(text))
+
+
+_lexicon = None
+
+
+def get_lexicon():
+    """
+    Return the process-wide compiled lexicon, building it on first use.
+    """
+    global _lexicon
+    if _lexicon is None:
+        _lexicon = FinanceLexicon()
+    return _lexicon
+
+
+def load_texts(corpus_dir):
+    """
+    Article texts from the .html (extracted) and .txt files of a directory.
+    """
+    from sentiment_extraction import extract_article
+
+    texts = []
+    for path in sorted(glob.glob(os.path.join(corpus_dir, "*"))):
+        if not path.endswith((".html", ".txt")):
+            continue
+        with open(path, encoding="utf-8", errors="replace") as f:
+            text = f.read()
+        texts.append(extract_article(text)[0] if path.endswith(".html") else text)
+    return [text for text in texts if text]
+
+
+def benchmark(texts, repeat=3):
+    """
+    Articles per second for the finance lexicon and for VADER over the same texts, and
+    the share of articles on which their labels agree.
+    """
+    from sentiment_engine import vader_label
+    from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+
+    lexicon = get_lexicon()
+    vader = SentimentIntensityAnalyzer()
+    results = {}
+
+    started = time.perf_counter()
+    for _ in range(repeat):
+        finance = [lexicon.score(text) for text in texts]
+    results["finance"] = len(texts) * repeat / (time.perf_counter() - started)
+
+    started = time.perf_counter()
+    for _ in range(repeat):
+        compounds = [vader.polarity_scores(text)["compound"] for text in texts]
+    results["vader"] = len(texts) * repeat / (time.perf_counter() - started)
+
+    agree = sum(f["sentiment"] == vader_label(c) for f, c in zip(finance, compounds))
+    results["agreement"] = agree / len(texts)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score text with the finance lexicon or benchmark it against VADER")
+    parser.add_argument("--text", help="Text to score")
+    parser.add_argument("--benchmark", metavar="DIR", help="Time scoring over the .html/.txt files in DIR")
+    parser.add_argument("--repeat", type=int, default=3, help="Passes over the corpus")
+    args = parser.parse_args()
+
+    if args.text:
+        print(get_lexicon().score(args.text))
+    if args.benchmark:
+        texts = load_texts(args.benchmark)
+        if not texts:
+            parser.error(f"no article texts found in {args.benchmark}")
+        results = benchmark(texts, args.repeat)
+        print(f"{len(texts)} articles, {len(get_lexicon())} lexicon terms")
+        print(f"finance: {results['finance']:8.1f} articles/s")
+        print(f"  vader: {results['vader']:8.1f} articles/s")
+        print(f"labels agree on {results['agreement']:.0%} of articles")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,497 @@
+"""
+Search / fetch / score pipeline of the Stock Sentiment app, independent of the GUI.
+
+A SentimentPipeline owns the article cache, the sentiment history, the news sources
+and one pool of fetch threads. All searches run through that pool, so however many
+queries run at once, at most max_fetches articles are being fetched at any time.
+Articles that have to be downloaded are handed to the pool by a politeness scheduler
+(sentiment_scheduler.py), which paces every news site separately, honours its
+robots.txt and backs off when it answers 429/503; cached articles skip the queue.
+
+With a start date, articles are filtered before anything is downloaded: results whose
+date is known from the search results, the feed or the cache are dropped right away,
+and undated ones are first probed with a partial GET (Last-Modified and the date tags in
+the first bytes of the page). Only articles that may fall in the period are fetched.
+
+search() reports finished articles through callbacks as they complete, writes them to
+an optional ArticleWriter, appends them to the history and returns a summary, so the
+same code drives the Tk app and the headless command line (sentiment_cli.py).
+
+With a ticker tagger (sentiment_tagging.py), every fetched article is also added to the
+history of each other NASDAQ company it mentions, scored on the sentences that mention
+that company, so one crawl feeds the sentiment of many tickers.
+"""
+import re
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from sentiment_cache import ArticleCache, canonical_url
+from sentiment_dates import parse_datetime, result_dates, snippet_date
+from sentiment_engine import get_engine
+from sentiment_extraction import extract_article, extract_page_date
+from sentiment_http import http_get, http_get_prefix
+from sentiment_results import SENTIMENTS, overall_sentiment
+from sentiment_scheduler import DEFAULT_RATE, THROTTLE_STATUSES, PolitenessScheduler
+from sentiment_sources import MIN_SNIPPET_CHARS, collect_results, default_sources, same_story
+from sentiment_store import SentimentStore, ticker_key
+from sentiment_tagging import score_mentions
+
+# Concurrency limits for processing search results
+MAX_FETCH_WORKERS = 8       # Articles processed at the same time, across all searches
+MAX_REQUESTS_PER_HOST = 2   # Simultaneous requests to any single news site
+
+
+def extract_result_date(snippets):
+    """
+    Try to extract the date from the text near the article link in the search results.
+    Returns None if no date is found there.
+    """
+    return snippet_date(snippets)
+
+
+def analyze_sentiment(content, title):
+    """
+    Analyze the sentiment of the article content using both TextBlob and VADER.
+    Returns a dictionary with sentiment scores.
+    """
+    return get_engine().score(content, title)
+
+
+def create_content_preview(content, max_length=500):
+    """
+    Create a preview of the article content.
+    Returns first few paragraphs or sentences up to max_length characters.
+    """
+    if not content or content.startswith("Error fetching article"):
+        return "Preview not available"
+
+    # Split into sentences and build preview
+    sentences = re.split(r'(?<=[.!?])\s+', content)
+    preview = ""
+
+    for sentence in sentences:
+        if len(preview) + len(sentence) <= max_length:
+            preview += sentence + " "
+        else:
+            break
+
+    if len(content) > max_length:
+        preview += "..."
+
+    return preview.strip()
+
+
+def is_fetched(result):
+    # Articles that could not be fetched carry placeholder neutral scores
+    return bool(result[2]) and not result[2].startswith("Error fetching article")
+
+
+def summarize(query, articles, sentiments, duplicates=0, too_old=0, mentions=None):
+    """
+    Per-query summary: the number of articles, the count per overall sentiment and the
+    mean VADER compound, TextBlob polarity and finance lexicon score, over the sentiment
+    dicts of the articles that were actually fetched. With tagging, "mentions" holds the
+    number of articles and mean sentence-level VADER compound of every company mentioned.
+    """
+    summary = {
+        "query": query,
+        "articles": articles,
+        "fetched": len(sentiments),
+        "duplicates": duplicates,
+        "too_old": too_old,
+    }
+    overall = [overall_sentiment(sentiment) for sentiment in sentiments]
+    for label in SENTIMENTS:
+        summary[label.lower()] = overall.count(label)
+    if sentiments:
+        summary["vader_compound"] = sum(s["vader"]["compound"] for s in sentiments) / len(sentiments)
+        summary["textblob_polarity"] = sum(s["textblob"]["polarity"] for s in sentiments) / len(sentiments)
+    else:
+        summary["vader_compound"] = summary["textblob_polarity"] = None
+    # Scores cached before the finance lexicon existed have no finance entry
+    finance = [s["finance"]["score"] for s in sentiments if "finance" in s]
+    summary["finance_score"] = sum(finance) / len(finance) if finance else None
+    if mentions is not None:
+        # Most mentioned companies first
+        summary["mentions"] = {
+            symbol: {"name": name, "articles": len(compounds), "vader_compound": sum(compounds) / len(compounds)}
+            for symbol, (name, compounds) in sorted(mentions.items(), key=lambda item: -len(item[1][1]))
+        }
+    return summary
+
+
+class SentimentPipeline:
+    """
+    Shared state and thread pool for running searches. Use one instance per process.
+    """
+
+    def __init__(self, sources=None, cache=None, store=None, max_fetches=MAX_FETCH_WORKERS,
+                 max_per_host=MAX_REQUESTS_PER_HOST, rate=DEFAULT_RATE, engine=None, tagger=None):
+        # Where search results come from (Bing News plus any configured feeds and local dumps)
+        self.sources = sources if sources is not None else default_sources()
+        # Local store of previously fetched articles, shared by all searches
+        self.cache = cache or ArticleCache()
+        self.cache.purge_expired()
+        # Append-only history of scored articles per search term, for sentiment trends over time
+        self.store = store or SentimentStore()
+        # Sentiment analyzers (the shared TextBlob + VADER + finance lexicon engine by default)
+        self.engine = engine or get_engine()
+        # Optional TickerTagger attributing articles to the companies they mention
+        self.tagger = tagger
+
+        self.fetch_executor = ThreadPoolExecutor(max_workers=max_fetches, thread_name_prefix="fetch")
+        # Paces downloads per news site (rate requests/second, max_per_host at once)
+        self.scheduler = PolitenessScheduler(self.fetch_executor, max_in_flight=max_fetches,
+                                             max_per_host=max_per_host, rate=rate)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.scheduler.close()
+        self.fetch_executor.shutdown(wait=True)
+        self.cache.close()
+
+    def article_content(self, url):
+        """
+        The stored full text of an article, for results that don't keep it in memory.
+        """
+        return self.cache.content(url)
+
+    def load_article(self, url, title=None):
+        """
+        Return (content, published_date, sentiment) for an article.
+        Fresh copies come straight from the article cache; stale copies are revalidated
+        with a conditional request, and new articles are downloaded and parsed once.
+        sentiment is None when the scores still have to be computed.
+        """
+        entry = self.cache.get(url)
+        if self.cache.is_fresh(entry):
+            return entry["content"], entry["published"], entry["sentiment"]
+
+        try:
+            if not self.scheduler.apply_robots(url):
+                raise PermissionError("disallowed by robots.txt")
+            response = http_get(url, headers=self.cache.conditional_headers(entry), paced=True)
+            self.scheduler.report(url, response.status_code, response.headers.get('Retry-After'))
+        except Exception as e:
+            # Fall back to a stale copy rather than failing
+            if entry:
+                return entry["content"], entry["published"], entry["sentiment"]
+            return f"Error fetching article: {e}", None, None
+
+        # The site is throttling us: the scheduler now pauses it, keep any stale copy meanwhile
+        if response.status_code in THROTTLE_STATUSES:
+            if entry:
+                return entry["content"], entry["published"], entry["sentiment"]
+            return f"Error fetching article: HTTP {response.status_code}", None, None
+
+        # Not modified since we cached it
+        if response.status_code == 304 and entry:
+            self.cache.touch(url)
+            return entry["content"], entry["published"], entry["sentiment"]
+
+        return self.parse_page(url, response.text, title, response.headers, response.ok)
+
+    def parse_page(self, url, html, title=None, headers=None, ok=True):
+        """
+        Extract a downloaded article page and cache it. Returns (content, published_date, None).
+        """
+        content, published = extract_article(html)
+
+        if ok and content:
+            headers = headers or {}
+            self.cache.store(url, content, published, title,
+                             etag=headers.get('ETag'),
+                             last_modified=headers.get('Last-Modified'))
+        return content, published, None
+
+    def probe_article(self, item, start_date):
+        """
+        Cheap date check of an undated article before it is downloaded: fetch only the
+        start of the page. Returns False if it is older than start_date. Otherwise returns
+        True and notes what was learnt in the item: its "published" date and, when the
+        whole page fit in the probe, the "page" itself (html, headers) so it is not fetched twice.
+        Runs in a fetch thread, paced by the scheduler like a full fetch.
+        """
+        url = item["link"]
+        try:
+            if not self.scheduler.apply_robots(url):
+                return True  # The full fetch reports it
+            response, html, complete = http_get_prefix(url, paced=True)
+            self.scheduler.report(url, response.status_code, response.headers.get('Retry-After'))
+        except Exception:
+            return True  # Undecided; the full fetch reports any error
+        if response.status_code not in (200, 206):
+            return True
+
+        # Not changed since before the period, so not published in it
+        last_modified = parse_datetime(response.headers.get('Last-Modified'))
+        if last_modified and last_modified < start_date:
+            return False
+
+        published = extract_page_date(html)
+        if published:
+            if published < start_date:
+                return False
+            item["published"] = published
+        if complete and response.status_code == 200:
+            item["page"] = (html, dict(response.headers))
+        return True
+
+    def process_article(self, item, start_date):
+        """
+        Date and fetch a single search result. Runs in a fetch thread.
+        Returns the result tuple (sentiment is None unless cached), None if the article is
+        older than start_date, or False if it is a likely copy whose text turns out to be
+        the same story as the result its title matched (item["original_body"]).
+        """
+        title = item["title"]
+        link = item["link"]
+
+        # Feeds and dumps give the date directly; otherwise try the search result text
+        # (parsed for the whole result list at once by search())
+        article_date = item.get("published")
+        if article_date is None:
+            article_date = item["result_date"] if "result_date" in item else extract_result_date(item["snippets"])
+
+        # Apply date filter if we have both a start date and an article date
+        if start_date and article_date:
+            if article_date < start_date:
+                return None  # Skip this article as it's older than the start date
+
+        if item.get("content"):
+            # Local dumps already hold the article text
+            article_content, page_date, cached_sentiment = item["content"], None, None
+        elif item.get("page"):
+            # The date probe already downloaded the whole page
+            html, headers = item.pop("page")
+            article_content, page_date, cached_sentiment = self.parse_page(link, html, title, headers)
+        else:
+            # Fetch the article once (or reuse the cached copy) for its content and published date
+            article_content, page_date, cached_sentiment = self.load_article(link, title)
+
+        if article_date is None:
+            article_date = page_date
+            if start_date and article_date and article_date < start_date:
+                return None
+
+        # Syndicated copies of a story are only scored once
+        original = item.get("original_body")
+        if original and not article_content.startswith("Error fetching article"):
+            if same_story(article_content, original):
+                return False
+
+        # Create a preview (first few paragraphs)
+        content_preview = create_content_preview(article_content)
+
+        # Sentiment comes from the cache, or is scored for the whole batch in search()
+        return (title, link, article_content, content_preview, article_date, cached_sentiment)
+
+    def score_results(self, results):
+        """
+        Fill in the sentiment of results that came back without cached scores,
+        scoring them together with the shared engine, and remember the new scores.
+        """
+        pending = [i for i, result in enumerate(results) if result[5] is None]
+        if not pending:
+            return results
+
+        scores = self.engine.score_batch([(results[i][2], results[i][0]) for i in pending])
+
+        results = list(results)
+        for i, sentiment_scores in zip(pending, scores):
+            title, link, article_content, content_preview, article_date, _ = results[i]
+            results[i] = (title, link, article_content, content_preview, article_date, sentiment_scores)
+            if not article_content.startswith("Error fetching article"):
+                self.cache.update_sentiment(link, sentiment_scores)
+        return results
+
+    def release_copies(self, copies, original):
+        """
+        Decide on the results held back as likely copies of another result once that
+        result is done (original is its result tuple, or None if it gave none).
+        Copies whose cached text or search snippet already repeats the original's body
+        are dropped without a download; the rest are marked to be compared on their own
+        text once fetched. Returns (copies still to queue, number dropped).
+        """
+        if not original or not is_fetched(original):
+            return copies, 0
+
+        body = original[2]
+        queued = []
+        dropped = 0
+        for rank, item in copies:
+            entry = None if item.get("content") else self.cache.get(item["link"])
+            text = item.get("content") or (entry["content"] if self.cache.is_fresh(entry) else None)
+            if not text:
+                snippet = " ".join(item["snippets"])
+                text = snippet if len(snippet) >= MIN_SNIPPET_CHARS else None
+            if text and same_story(text, body):
+                dropped += 1
+                continue
+            item["original_body"] = body
+            queued.append((rank, item))
+        return queued, dropped
+
+    def submit_article(self, futures, rank, item, start_date):
+        """
+        Queue one search result in the fetch pool or the scheduler and record its future
+        in futures. Returns the future, or None if it is known to be older than start_date.
+        """
+        entry = None if item.get("content") else self.cache.get(item["link"])
+        known_date = item.get("published") or item["result_date"] or (entry and entry["published"])
+        if start_date and known_date and known_date < start_date:
+            return None
+
+        if item.get("content") or self.cache.is_fresh(entry):
+            # Nothing to download: straight to the pool
+            future = self.fetch_executor.submit(self.process_article, item, start_date)
+            futures[future] = (rank, item, False)
+        elif start_date and known_date is None:
+            # Undated: probe the start of the page before committing to a full download
+            future = self.scheduler.submit(item["link"], self.probe_article, item, start_date)
+            futures[future] = (rank, item, True)
+        else:
+            # Downloads wait for their site's turn in the scheduler
+            future = self.scheduler.submit(item["link"], self.process_article, item, start_date)
+            futures[future] = (rank, item, False)
+        return future
+
+    def tag_results(self, results):
+        """
+        Companies mentioned by each result, with the sentiment of the sentences that
+        mention them: {symbol: {"name", "mentions", "sentiment"}} per result (empty for
+        articles that could not be fetched).
+        """
+        tagged = [self.tagger.tag(result[2], result[0]) if is_fetched(result) else {} for result in results]
+        return score_mentions(tagged, self.engine)
+
+    def store_mentions(self, searched, results, mentions):
+        """
+        Add each article to the history of every company it mentions (other than the one
+        searched for), with that company's sentence-level sentiment.
+        """
+        rows = {}
+        for (title, link, content, preview, article_date, _), tags in zip(results, mentions):
+            for symbol, tag in tags.items():
+                if ticker_key(symbol) != ticker_key(searched):
+                    rows.setdefault(symbol, []).append((title, link, content, preview, article_date, tag["sentiment"]))
+        for symbol, symbol_results in rows.items():
+            self.store.append(symbol, symbol_results)
+
+    def search(self, query, start_date=None, on_result=None, on_progress=None, writer=None, ticker=None):
+        """
+        Run one search through the shared fetch pool and return its summary.
+
+        on_result(rank, result) is called for every scored article as soon as it is ready
+        (rank is its position in the merged search results) and on_progress(done, total)
+        after each batch of finished articles. Results are written to writer, if given,
+        and appended to the history under ticker (defaults to the query), and, with a
+        tagger, under every other company they mention.
+        """
+        # Results from every source, without repeated URLs
+        items, duplicates = collect_results(self.sources, query)
+        for item, date in zip(items, result_dates([item["snippets"] for item in items])):
+            item["result_date"] = date
+
+        # Likely copies (matching the title of an earlier result) wait until that result is
+        # done, so they are only fetched when its body does not settle the question
+        held = {}  # canonical URL of the matched result -> [(rank, copy)]
+        queue = []
+        for rank, item in enumerate(items):
+            if "title_match" in item:
+                held.setdefault(item["title_match"], []).append((rank, item))
+            else:
+                queue.append((rank, item))
+
+        # Results known to be older than the period are dropped before anything is queued
+        too_old = 0
+        skipped = 0  # Never queued, so not part of the progress total
+        done_count = 0
+        futures = {}  # future -> (rank, item, whether it is a date probe)
+        while queue:
+            rank, item = queue.pop(0)
+            if self.submit_article(futures, rank, item, start_date) is None:
+                too_old += 1
+                skipped += 1
+                queue.extend(held.pop(canonical_url(item["link"]), []))
+
+        # Only what the summary needs is kept; full results go to the callbacks and the writer
+        articles = 0
+        sentiments = []
+        mentioned = {} if self.tagger is not None else None  # symbol -> (name, sentence compounds)
+        pending = set(futures)
+        while pending:
+            # Take every article that has finished since the last pass
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+
+            completed = []
+            for future in done:
+                rank, item, probing = futures.pop(future)
+                if probing:
+                    try:
+                        in_period = future.result()
+                    except Exception:
+                        in_period = True
+                    if in_period:
+                        # Passed (or undecided): now fetch it in full, unless the probe got it all
+                        if item.get("page"):
+                            follow_up = self.fetch_executor.submit(self.process_article, item, start_date)
+                        else:
+                            follow_up = self.scheduler.submit(item["link"], self.process_article, item, start_date)
+                        futures[follow_up] = (rank, item, False)
+                        pending.add(follow_up)
+                        continue
+                    result = None
+                else:
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        print(f"Error processing article: {e}")
+                        result = e
+                done_count += 1
+                if isinstance(result, tuple):
+                    completed.append((rank, result))
+                elif result is False:
+                    duplicates += 1
+                elif result is None:
+                    too_old += 1
+
+                # Copies held back for this result can be decided now
+                copies, dropped = self.release_copies(held.pop(canonical_url(item["link"]), []),
+                                                      result if isinstance(result, tuple) else None)
+                duplicates += dropped
+                done_count += dropped
+                for copy_rank, copy in copies:
+                    follow_up = self.submit_article(futures, copy_rank, copy, start_date)
+                    if follow_up is None:
+                        too_old += 1
+                        skipped += 1
+                    else:
+                        pending.add(follow_up)
+
+            # Score them together and hand them on right away
+            scored = self.score_results([result for _, result in completed])
+            for (rank, _), result in zip(completed, scored):
+                if writer is not None:
+                    writer.write(result)
+                if on_result:
+                    on_result(rank, result)
+                articles += 1
+                if is_fetched(result):
+                    sentiments.append(result[5])
+            self.store.append(ticker or query, scored)
+            if self.tagger is not None and scored:
+                mentions = self.tag_results(scored)
+                self.store_mentions(ticker or query, scored, mentions)
+                for tags in mentions:
+                    for symbol, tag in tags.items():
+                        mentioned.setdefault(symbol, (tag["name"], []))[1].append(tag["sentiment"]["vader"]["compound"])
+
+            if on_progress:
+                on_progress(done_count, len(items) - skipped)
+
+        return summarize(query, articles, sentiments, duplicates, too_old, mentioned)
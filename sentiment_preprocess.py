@@ -0,0 +1,170 @@
+"""
+Text preparation before sentiment scoring for the Stock Sentiment app.
+
+TextBlob's tokenizing and tagging work grows with the length of the text, and article
+text can be a whole page with cookie notices, share prompts and paragraphs repeated by
+the page layout. Before an article is scored its text is:
+- split into sentences, dropping short boilerplate sentences ("Subscribe to our
+  newsletter", "All rights reserved") and exact repeats
+- capped at a token budget (words): when longer, the lead sentences are kept up to
+  LEAD_SHARE of the budget and the rest of the budget is filled with sentences sampled
+  at even intervals from the remainder of the article, in their original order
+
+Preparation is opt-in (SentimentEngine(clean=True), or --token-budget in batch runs).
+The deviation report scores a corpus both ways and shows how far the capped scores are
+from full-text scoring, and how much faster they are:
+
+    python sentiment_preprocess.py --report corpus/ --budget 400
+"""
+import argparse
+import re
+import time
+
+# Words scored per article at most (None: the whole text)
+DEFAULT_TOKEN_BUDGET = 1000
+# Share of the budget given to the lead sentences; the rest is sampled from the remainder
+LEAD_SHARE = 0.6
+# Sentences longer than this are article text even if they mention a boilerplate phrase
+MAX_BOILERPLATE_WORDS = 30
+
+BOILERPLATE_PATTERN = re.compile(
+    r"\b(?:cookies?|privacy policy|terms of (?:use|service)|subscribe|sign up|newsletter|"
+    r"all rights reserved|click here|read more|advertisement|follow us|share this|"
+    r"related articles|recommended for you)\b|©", re.IGNORECASE)
+
+# Sentence ends followed by what looks like the start of the next sentence
+_SENTENCE_END = re.compile(r'(?<=[.!?])\s+(?=["“\'(\[]?[A-Z0-9])')
+_NORMALIZE = re.compile(r'[^a-z0-9]+')
+
+
+def split_sentences(text):
+    return [sentence for sentence in _SENTENCE_END.split(text.strip()) if sentence]
+
+
+def clean_sentences(sentences):
+    """
+    Drop boilerplate sentences and repeats of sentences already seen.
+    """
+    kept = []
+    seen = set()
+    for sentence in sentences:
+        if len(sentence.split()) <= MAX_BOILERPLATE_WORDS and BOILERPLATE_PATTERN.search(sentence):
+            continue
+        key = _NORMALIZE.sub(' ', sentence.lower()).strip()
+        if not key or key in seen:
+            continue
+        seen.add(key)
+        kept.append(sentence)
+    return kept
+
+
+def select_sentences(sentences, token_budget):
+    """
+    Keep the lead sentences up to LEAD_SHARE of the budget, then sentences sampled at
+    even intervals from the rest until the budget is used. Order is preserved.
+    """
+    lengths = [len(sentence.split()) for sentence in sentences]
+    if token_budget is None or sum(lengths) <= token_budget:
+        return sentences
+
+    chosen = []
+    used = 0
+    lead_budget = token_budget * LEAD_SHARE
+    i = 0
+    while i < len(sentences) and used + lengths[i] <= lead_budget:
+        chosen.append(i)
+        used += lengths[i]
+        i += 1
+    if not chosen:
+        # A first sentence longer than the lead budget is still the lead
+        chosen.append(0)
+        used = lengths[0]
+        i = 1
+
+    rest = list(range(i, len(sentences)))
+    remaining = token_budget - used
+    if rest and remaining > 0:
+        average = sum(lengths[j] for j in rest) / len(rest)
+        samples = max(1, min(len(rest), int(remaining / max(average, 1))))
+        step = len(rest) / samples
+        for k in range(samples):
+            j = rest[int(k * step)]
+            if used + lengths[j] <= token_budget:
+                chosen.append(j)
+                used += lengths[j]
+    return [sentences[j] for j in chosen]
+
+
+def prepare_text(content, token_budget=DEFAULT_TOKEN_BUDGET):
+    """
+    The text of an article as it is scored: without boilerplate and repeated sentences,
+    and cut to token_budget words as described above.
+    """
+    if not content:
+        return content
+    return " ".join(select_sentences(clean_sentences(split_sentences(content)), token_budget))
+
+
+def deviation_report(texts, token_budget=DEFAULT_TOKEN_BUDGET):
+    """
+    Score texts from full text and from prepared text and compare: mean absolute
+    differences of the scores, how often the labels agree and the speed-up.
+    """
+    from sentiment_engine import SentimentEngine
+    from sentiment_results import overall_sentiment
+
+    full_engine = SentimentEngine()
+    prepared_engine = SentimentEngine(token_budget=token_budget, clean=True)
+    articles = [(text, "") for text in texts]
+
+    started = time.perf_counter()
+    full = full_engine.score_batch(articles)
+    full_time = time.perf_counter() - started
+    started = time.perf_counter()
+    prepared = prepared_engine.score_batch(articles)
+    prepared_time = time.perf_counter() - started
+
+    def mean_difference(analyzer, field):
+        return sum(abs(a[analyzer][field] - b[analyzer][field]) for a, b in zip(full, prepared)) / len(texts)
+
+    report = {
+        "articles": len(texts),
+        "shortened": sum(prepare_text(text, token_budget) != text for text in texts),
+        "words_full": sum(len(text.split()) for text in texts),
+        "words_scored": sum(len(prepare_text(text, token_budget).split()) for text in texts),
+        "textblob_polarity": mean_difference("textblob", "polarity"),
+        "vader_compound": mean_difference("vader", "compound"),
+        "overall_agreement": sum(overall_sentiment(a) == overall_sentiment(b)
+                                 for a, b in zip(full, prepared)) / len(texts),
+        "speedup": full_time / prepared_time if prepared_time else None,
+    }
+    if full and "finance" in full[0]:
+        report["finance_score"] = mean_difference("finance", "score")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare scores of capped article text with full-text scores")
+    parser.add_argument("--report", metavar="DIR", required=True, help="Directory of .html/.txt articles")
+    parser.add_argument("--budget", type=int, default=DEFAULT_TOKEN_BUDGET, help="Words scored per article")
+    args = parser.parse_args()
+
+    from sentiment_lexicon import load_texts
+
+    texts = load_texts(args.report)
+    if not texts:
+        parser.error(f"no article texts found in {args.report}")
+    report = deviation_report(texts, args.budget)
+    print(f"{report['articles']} articles, {report['shortened']} changed by preparation")
+    print(f"words scored: {report['words_scored']} of {report['words_full']}")
+    print(f"mean |difference|  TextBlob polarity: {report['textblob_polarity']:.4f}")
+    print(f"                   VADER compound:    {report['vader_compound']:.4f}")
+    if "finance_score" in report:
+        print(f"                   finance score:     {report['finance_score']:.4f}")
+    print(f"overall label agreement: {report['overall_agreement']:.1%}")
+    if report["speedup"]:
+        print(f"speed-up: {report['speedup']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
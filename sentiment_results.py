@@ -0,0 +1,311 @@
+"""
+Result storage and display for the Stock Sentiment app.
+
+Articles are kept as compact ArticleRecord objects whose overall sentiment is worked
+out once, in a ResultSet that maintains, next to the ranking-ordered list, one sorted
+list of ranks per sentiment. Switching the sentiment filter is then just picking a
+different index list.
+
+VirtualResultList displays a ResultView on a canvas and only creates widgets for the
+rows that are visible; scrolling reuses the same row widgets for other articles, so the
+cost of a redraw doesn't grow with the number of articles.
+
+Records of articles whose text is in the article cache keep only the preview and the
+scores; ArticleTextLoader loads and formats the full text when an article is opened,
+keeping the last few formatted texts.
+"""
+import bisect
+from collections import OrderedDict
+
+SENTIMENTS = ("POSITIVE", "NEUTRAL", "NEGATIVE")
+SENTIMENT_COLORS = {"POSITIVE": "green", "NEGATIVE": "red", "NEUTRAL": "gray"}
+
+
+def overall_sentiment(sentiment):
+    """
+    Combine both analyzers: POSITIVE or NEGATIVE only when TextBlob and VADER agree.
+    """
+    textblob_sentiment = sentiment["textblob"]["sentiment"]
+    vader_sentiment = sentiment["vader"]["sentiment"]
+    if textblob_sentiment == "POSITIVE" and vader_sentiment == "POSITIVE":
+        return "POSITIVE"
+    if textblob_sentiment == "NEGATIVE" and vader_sentiment == "NEGATIVE":
+        return "NEGATIVE"
+    return "NEUTRAL"
+
+
+class ArticleRecord:
+    """
+    One analyzed article. rank is its position in the search results.
+    content is None when the full text is left in the article cache.
+    """
+    __slots__ = ("rank", "title", "link", "content", "preview", "date", "sentiment", "overall")
+
+    def __init__(self, rank, title, link, content, preview, date, sentiment):
+        self.rank = rank
+        self.title = title
+        self.link = link
+        self.content = content
+        self.preview = preview
+        self.date = date
+        self.sentiment = sentiment
+        self.overall = overall_sentiment(sentiment)
+
+    @classmethod
+    def from_result(cls, rank, result):
+        # result is the (title, link, content, preview, date, sentiment) tuple built by the search
+        return cls(rank, *result)
+
+    def as_tuple(self):
+        return (self.title, self.link, self.content, self.preview, self.date, self.sentiment)
+
+
+class ArticleTextLoader:
+    """
+    Formatted full texts of articles, loaded on demand. load(link) returns the text of
+    an article whose record does not hold it (or None); format_text(content) prepares it
+    for display. The last `size` formatted texts are kept.
+    """
+
+    def __init__(self, load, format_text, size=16):
+        self.load = load
+        self.format_text = format_text
+        self.size = size
+        self._texts = OrderedDict()
+
+    def get(self, record):
+        """
+        The formatted text of a record, or None if it is no longer available.
+        """
+        if record.link in self._texts:
+            self._texts.move_to_end(record.link)
+            return self._texts[record.link]
+
+        content = record.content if record.content is not None else self.load(record.link)
+        if content is None:
+            return None
+        text = self.format_text(content)
+        self._texts[record.link] = text
+        if len(self._texts) > self.size:
+            self._texts.popitem(last=False)
+        return text
+
+    def clear(self):
+        self._texts.clear()
+
+
+class ResultView:
+    """
+    Live, read-only sequence of the records matching one sentiment (or "All").
+    """
+
+    def __init__(self, result_set, sentiment="All"):
+        self.result_set = result_set
+        self.sentiment = sentiment
+
+    def __len__(self):
+        if self.sentiment == "All":
+            return len(self.result_set.records)
+        return len(self.result_set.ranks_by_sentiment[self.sentiment])
+
+    def __getitem__(self, i):
+        if self.sentiment == "All":
+            return self.result_set.records[i]
+        return self.result_set.by_rank[self.result_set.ranks_by_sentiment[self.sentiment][i]]
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
+class ResultSet:
+    """
+    Articles in search ranking order, with a sorted list of ranks for each sentiment.
+    """
+
+    def __init__(self, records=()):
+        self.records = []
+        self.ranks = []
+        self.by_rank = {}
+        self.ranks_by_sentiment = {sentiment: [] for sentiment in SENTIMENTS}
+        for record in records:
+            self.add(record)
+
+    def __len__(self):
+        return len(self.records)
+
+    def __iter__(self):
+        return iter(self.records)
+
+    def add(self, record):
+        """
+        Insert a record at its ranking position. Returns its position among the
+        records with the same sentiment.
+        """
+        position = bisect.bisect(self.ranks, record.rank)
+        self.ranks.insert(position, record.rank)
+        self.records.insert(position, record)
+        self.by_rank[record.rank] = record
+
+        ranks = self.ranks_by_sentiment[record.overall]
+        position = bisect.bisect(ranks, record.rank)
+        ranks.insert(position, record.rank)
+        return position
+
+    def view(self, sentiment="All"):
+        return ResultView(self, sentiment)
+
+    def count(self, sentiment="All"):
+        return len(self.view(sentiment))
+
+
+class VirtualResultList:
+    """
+    Scrollable list of article rows that only creates widgets for the visible rows.
+    on_open(record) is called by a row's "View Full Article" button; show_preview()
+    tells whether rows include the article preview.
+    """
+
+    ROW_HEIGHT = 120
+    PREVIEW_HEIGHT = 70
+    PREVIEW_CHARS = 300
+    SCROLL_STEP = 20
+
+    def __init__(self, parent, on_open=None, show_preview=None):
+        import tkinter as tk
+
+        self.tk = tk
+        self.on_open = on_open
+        self.show_preview = show_preview or (lambda: True)
+        self.view = []
+        self.rows = []
+        self.empty_text = ""
+
+        self.frame = tk.Frame(parent)
+        self.canvas = tk.Canvas(self.frame, bg="white", highlightthickness=0,
+                                yscrollincrement=self.SCROLL_STEP)
+        self.scrollbar = tk.Scrollbar(self.frame, orient=tk.VERTICAL, command=self._on_scrollbar)
+        self.canvas.configure(yscrollcommand=self.scrollbar.set)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        self.empty_item = self.canvas.create_text(10, 10, anchor="nw", text="", font=("Arial", 12))
+        self.canvas.bind("<Configure>", self.refresh)
+        self._bind_wheel(self.canvas)
+
+    def pack(self, **kwargs):
+        self.frame.pack(**kwargs)
+
+    def row_height(self):
+        return self.ROW_HEIGHT + (self.PREVIEW_HEIGHT if self.show_preview() else 0)
+
+    def set_view(self, view):
+        """
+        Show another sequence of records (e.g. after the filter changed), from the top.
+        """
+        self.view = view
+        self.canvas.yview_moveto(0)
+        self.refresh()
+
+    def refresh(self, event=None):
+        """
+        Redraw the visible rows; call after records were added to the current view.
+        """
+        height = self.row_height()
+        width = max(self.canvas.winfo_width(), 1)
+        self.canvas.configure(scrollregion=(0, 0, width, max(len(self.view) * height, 1)))
+        self.canvas.itemconfigure(self.empty_item, text="" if len(self.view) else self.empty_text)
+
+        # Rows intersecting the visible part of the canvas
+        top = self.canvas.canvasy(0)
+        first = max(0, int(top // height))
+        last = min(len(self.view), int((top + self.canvas.winfo_height()) // height) + 1)
+
+        while len(self.rows) < last - first:
+            self.rows.append(self._create_row())
+
+        for slot, row in enumerate(self.rows):
+            i = first + slot
+            if i < last:
+                self._fill_row(row, i, self.view[i], width)
+                self.canvas.coords(row["window"], 0, i * height)
+                self.canvas.itemconfigure(row["window"], width=width, height=height)
+            else:
+                # Park unused rows above the scroll region
+                self.canvas.coords(row["window"], 0, -2 * height)
+
+    def _on_scrollbar(self, *args):
+        self.canvas.yview(*args)
+        self.refresh()
+
+    def _on_wheel(self, event):
+        if getattr(event, "num", None) == 4 or getattr(event, "delta", 0) > 0:
+            self.canvas.yview_scroll(-3, "units")
+        else:
+            self.canvas.yview_scroll(3, "units")
+        self.refresh()
+
+    def _bind_wheel(self, widget):
+        widget.bind("<MouseWheel>", self._on_wheel)
+        widget.bind("<Button-4>", self._on_wheel)
+        widget.bind("<Button-5>", self._on_wheel)
+
+    def _create_row(self):
+        tk = self.tk
+        frame = tk.Frame(self.canvas, bg="white")
+        frame.pack_propagate(False)
+
+        row = {"frame": frame, "record": None}
+        row["title"] = tk.Label(frame, font=("Arial", 13, "bold"), bg="white", anchor="w", justify=tk.LEFT)
+        row["url"] = tk.Label(frame, font=("Arial", 11, "italic"), bg="white", anchor="w")
+        row["date"] = tk.Label(frame, font=("Arial", 11), bg="white", anchor="w")
+
+        sentiment_line = tk.Frame(frame, bg="white")
+        tk.Label(sentiment_line, text="Sentiment: ", font=("Arial", 12, "bold"), bg="white").pack(side=tk.LEFT)
+        row["sentiment"] = tk.Label(sentiment_line, font=("Arial", 12), bg="white")
+        row["sentiment"].pack(side=tk.LEFT)
+        row["scores"] = tk.Label(sentiment_line, font=("Arial", 11), bg="white")
+        row["scores"].pack(side=tk.LEFT)
+
+        row["preview"] = tk.Label(frame, font=("Arial", 12), bg="white", anchor="nw", justify=tk.LEFT)
+        row["button"] = tk.Button(frame, text="View Full Article",
+                                  command=lambda: self.on_open and self.on_open(row["record"]))
+
+        row["title"].pack(fill=tk.X)
+        row["url"].pack(fill=tk.X)
+        row["date"].pack(fill=tk.X)
+        sentiment_line.pack(fill=tk.X)
+        row["button"].pack(side=tk.BOTTOM, anchor="w", pady=(0, 10))
+
+        for widget in [frame, sentiment_line] + [w for w in row.values() if isinstance(w, tk.Widget)]:
+            self._bind_wheel(widget)
+
+        row["window"] = self.canvas.create_window(0, 0, anchor="nw", window=frame)
+        return row
+
+    def _fill_row(self, row, i, record, width):
+        tk = self.tk
+        # Rows already showing this article at this position are left alone
+        key = (i, width, self.show_preview())
+        if row["record"] is record and row.get("key") == key:
+            return
+        row["record"] = record
+        row["key"] = key
+
+        date_str = record.date.strftime("%Y-%m-%d") if record.date else "Unknown date"
+        row["title"].config(text=f"{i + 1}. {record.title}", wraplength=width - 20)
+        row["url"].config(text=f"URL: {record.link}")
+        row["date"].config(text=f"Date: {date_str}")
+        row["sentiment"].config(text=record.sentiment["textblob"]["sentiment"],
+                                fg=SENTIMENT_COLORS[record.overall])
+        row["scores"].config(text=f" (TextBlob: {record.sentiment['textblob']['polarity']:.2f}, "
+                                  f"VADER: {record.sentiment['vader']['compound']:.2f})")
+
+        if self.show_preview():
+            preview = record.preview
+            if len(preview) > self.PREVIEW_CHARS:
+                preview = preview[:self.PREVIEW_CHARS].rsplit(" ", 1)[0] + "..."
+            row["preview"].config(text=f"Preview: {preview}", wraplength=width - 20)
+            row["preview"].pack(fill=tk.X, before=row["button"])
+        else:
+            row["preview"].pack_forget()
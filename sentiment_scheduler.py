@@ -0,0 +1,302 @@
+"""
+Politeness scheduler for the Stock Sentiment crawler.
+
+Article fetches are not handed to the fetch threads directly. They are queued per
+domain, and a dispatcher thread releases a job only when:
+- the domain's token bucket has a token (DEFAULT_RATE requests per second, with a small
+  burst, slowed down to the Crawl-delay / Request-rate of the site's robots.txt)
+- the domain is not backing off after a 429 or 503 answer (Retry-After is honoured,
+  otherwise the pause doubles with every consecutive refusal)
+- fewer than max_per_host requests to the domain, and fewer than max_in_flight requests
+  overall, are running
+
+Domains are served round-robin, so one slow or strict site never holds up the others,
+and no fetch thread sits idle waiting for a domain's turn.
+"""
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+from urllib.robotparser import RobotFileParser
+
+from sentiment_http import USER_AGENT, http_get
+
+# Default pacing per domain: requests per second and burst size
+DEFAULT_RATE = 1.0
+DEFAULT_BURST = 2
+# Slowest pace a domain is throttled down to after repeated refusals
+MIN_RATE = 1 / 60
+# Backoff after 429/503 without Retry-After: BASE_BACKOFF * 2**(refusals - 1), capped
+BASE_BACKOFF = 5.0
+MAX_BACKOFF = 300.0
+THROTTLE_STATUSES = (429, 503)
+
+ROBOTS_TIMEOUT = (3, 5)
+
+
+def domain_of(url):
+    return urlparse(url).netloc.lower()
+
+
+class TokenBucket:
+    """
+    Token bucket refilled at `rate` tokens per second up to `capacity`.
+    Not thread-safe on its own; the scheduler calls it under its lock.
+    """
+
+    def __init__(self, rate=DEFAULT_RATE, capacity=DEFAULT_BURST):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self, now=None):
+        """
+        Take a token if one is available and return 0, otherwise return the number of
+        seconds until the next token.
+        """
+        now = time.monotonic() if now is None else now
+        self._refill(now)
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def set_rate(self, rate, capacity=None):
+        self._refill(time.monotonic())
+        self.rate = rate
+        if capacity is not None:
+            self.capacity = capacity
+            self.tokens = min(self.tokens, capacity)
+
+
+def _retry_after_seconds(value):
+    # Retry-After is either a number of seconds or an HTTP date
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RobotsPolicy:
+    """
+    robots.txt rules per host, fetched once per host and cached.
+    Unreachable or missing robots.txt files allow everything; 401/403 forbid everything,
+    like the standard library's RobotFileParser.read().
+    """
+
+    def __init__(self, user_agent=USER_AGENT):
+        self.user_agent = user_agent
+        self._parsers = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def _parser(self, url):
+        parts = urlparse(url)
+        host = parts.netloc.lower()
+        with self._lock:
+            if host in self._parsers:
+                return self._parsers[host]
+            host_lock = self._locks.setdefault(host, threading.Lock())
+
+        # Only one thread fetches a given host's robots.txt
+        with host_lock:
+            if host in self._parsers:
+                return self._parsers[host]
+            parser = RobotFileParser()
+            try:
+                response = http_get(f"{parts.scheme or 'https'}://{host}/robots.txt", timeout=ROBOTS_TIMEOUT)
+                if response.status_code in (401, 403):
+                    parser.disallow_all = True
+                elif response.status_code >= 400:
+                    parser.allow_all = True
+                else:
+                    parser.parse(response.text.splitlines())
+            except Exception:
+                parser.allow_all = True
+            with self._lock:
+                self._parsers[host] = parser
+            return parser
+
+    def allowed(self, url):
+        return self._parser(url).can_fetch(self.user_agent, url)
+
+    def min_interval(self, url):
+        """
+        Seconds between requests asked for by the host (Crawl-delay or Request-rate), or None.
+        """
+        parser = self._parser(url)
+        delay = parser.crawl_delay(self.user_agent)
+        rate = parser.request_rate(self.user_agent)
+        intervals = []
+        if delay:
+            intervals.append(float(delay))
+        if rate and rate.requests:
+            intervals.append(rate.seconds / rate.requests)
+        return max(intervals) if intervals else None
+
+
+class _Domain:
+    def __init__(self, rate, burst):
+        self.bucket = TokenBucket(rate, burst)
+        self.queue = deque()
+        self.in_flight = 0
+        self.backoff_until = 0.0
+        self.refusals = 0
+
+
+class PolitenessScheduler:
+    """
+    Queues jobs per domain and dispatches them to an executor at a polite pace.
+    submit(url, fn, *args) returns a Future for fn(*args).
+    """
+
+    def __init__(self, executor, max_in_flight=8, max_per_host=2, rate=DEFAULT_RATE, burst=DEFAULT_BURST,
+                 robots=None):
+        self.executor = executor
+        self.max_in_flight = max_in_flight
+        self.max_per_host = max_per_host
+        self.rate = rate
+        self.burst = burst
+        self.robots = robots or RobotsPolicy()
+
+        self.in_flight = 0
+        self._domains = OrderedDict()
+        self._condition = threading.Condition()
+        self._closed = False
+        self._dispatcher = None
+
+    def _domain(self, domain):
+        if domain not in self._domains:
+            self._domains[domain] = _Domain(self.rate, self.burst)
+        return self._domains[domain]
+
+    def submit(self, url, fn, *args):
+        future = Future()
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("Scheduler is closed")
+            self._domain(domain_of(url)).queue.append((future, fn, args))
+            if self._dispatcher is None:
+                self._dispatcher = threading.Thread(target=self._dispatch_loop, name="fetch-scheduler", daemon=True)
+                self._dispatcher.start()
+            self._condition.notify()
+        return future
+
+    def apply_robots(self, url):
+        """
+        Slow the URL's domain down to the pace its robots.txt asks for. Returns whether
+        robots.txt allows fetching the URL. Call from the fetch thread before requesting.
+        """
+        interval = self.robots.min_interval(url)
+        if interval:
+            with self._condition:
+                bucket = self._domain(domain_of(url)).bucket
+                if 1 / interval < bucket.rate:
+                    bucket.set_rate(1 / interval, capacity=1)
+        return self.robots.allowed(url)
+
+    def report(self, url, status_code, retry_after=None):
+        """
+        Record the status of a finished request: 429/503 pause the domain and halve its
+        rate, anything else resets its refusal count.
+        """
+        with self._condition:
+            domain = self._domain(domain_of(url))
+            if status_code in THROTTLE_STATUSES:
+                domain.refusals += 1
+                delay = _retry_after_seconds(retry_after)
+                if delay is None:
+                    delay = min(BASE_BACKOFF * 2 ** (domain.refusals - 1), MAX_BACKOFF)
+                domain.backoff_until = max(domain.backoff_until, time.monotonic() + delay)
+                domain.bucket.set_rate(max(MIN_RATE, domain.bucket.rate / 2))
+            else:
+                domain.refusals = 0
+            self._condition.notify()
+
+    def _run(self, domain, future, fn, args):
+        # Executor thread: run the job, then free its slots
+        try:
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(fn(*args))
+                except BaseException as e:
+                    future.set_exception(e)
+        finally:
+            with self._condition:
+                domain.in_flight -= 1
+                self.in_flight -= 1
+                self._condition.notify()
+
+    def _next_jobs(self, now):
+        # Pick every job that may start now (round-robin over domains) and the time
+        # until the next one could, for domains that are waiting
+        ready = []
+        waits = []
+        for name in list(self._domains):
+            domain = self._domains[name]
+            if not domain.queue:
+                # Forget idle domains once they are back to the default pace with a full bucket
+                if domain.in_flight == 0 and now >= domain.backoff_until and domain.bucket.rate == self.rate:
+                    domain.bucket._refill(now)
+                    if domain.bucket.tokens >= domain.bucket.capacity:
+                        del self._domains[name]
+                continue
+            if self.in_flight >= self.max_in_flight:
+                break
+            if domain.in_flight >= self.max_per_host:
+                continue
+            if now < domain.backoff_until:
+                waits.append(domain.backoff_until - now)
+                continue
+            wait = domain.bucket.try_acquire(now)
+            if wait > 0:
+                waits.append(wait)
+                continue
+
+            future, fn, args = domain.queue.popleft()
+            domain.in_flight += 1
+            self.in_flight += 1
+            ready.append((domain, future, fn, args))
+            # Move the domain to the back so the others get their turn
+            self._domains.move_to_end(name)
+        return ready, min(waits, default=None)
+
+    def _dispatch_loop(self):
+        while True:
+            with self._condition:
+                if self._closed:
+                    return
+                ready, wait = self._next_jobs(time.monotonic())
+                if not ready:
+                    self._condition.wait(timeout=wait)
+                    continue
+            for domain, future, fn, args in ready:
+                self.executor.submit(self._run, domain, future, fn, args)
+
+    def pending(self):
+        with self._condition:
+            return sum(len(domain.queue) for domain in self._domains.values())
+
+    def close(self):
+        """
+        Stop dispatching; queued jobs that never started are cancelled.
+        """
+        with self._condition:
+            self._closed = True
+            for domain in self._domains.values():
+                while domain.queue:
+                    domain.queue.popleft()[0].cancel()
+            self._condition.notify_all()
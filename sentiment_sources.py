@@ -0,0 +1,336 @@
+"""
+News sources for the Stock Sentiment app.
+
+Every source turns a query into search-result records ({"title", "link", "snippets"},
+optionally "published" and "content") that feed the same fetch / score pipeline:
+- BingNewsSource: Bing News result pages, following pagination
+- FeedSource: RSS 2.0 and Atom feeds (URLs may contain a {query} placeholder)
+- LocalDumpSource: saved .json result lists and .html pages in a directory, for offline use
+
+collect_results() merges the sources and drops identical URLs before anything is
+fetched. Near-duplicate titles (syndicated copies of the same wire story), found with
+shingled MinHash signatures and locality-sensitive hashing, are only marked as
+candidates: headlines of different stories can differ by a single token ("Q3" / "Q4"),
+so a copy is only dropped once same_story() confirms it on the text, after the body of
+the article it copies is known.
+
+Extra feeds can be listed one per line in ~/.stock_sentiment/feeds.txt, and dumps placed
+in ~/.stock_sentiment/dumps are searched as well.
+"""
+import glob
+import json
+import os
+import re
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote_plus
+
+import numpy as np
+
+from sentiment_cache import canonical_url
+from sentiment_dates import parse_datetime
+from sentiment_extraction import extract_article, parse_search_results
+from sentiment_http import http_get
+
+CONFIG_DIR = os.path.join(os.path.expanduser("~"), ".stock_sentiment")
+FEEDS_FILE = os.path.join(CONFIG_DIR, "feeds.txt")
+DUMPS_DIR = os.path.join(CONFIG_DIR, "dumps")
+
+BING_NEWS_URL = "https://www.bing.com/news/search?q={query}&first={first}"
+BING_PAGE_SIZE = 10
+DEFAULT_BING_PAGES = 3
+
+# MinHash / LSH parameters: 64 hash functions in 16 bands of 4 rows
+NUM_PERMUTATIONS = 64
+LSH_BANDS = 16
+SHINGLE_SIZE = 5
+# Estimated Jaccard similarity above which two texts count as the same story
+DUPLICATE_THRESHOLD = 0.7
+# Titles are short, so one changed word moves them a lot less; be stricter
+TITLE_DUPLICATE_THRESHOLD = 0.85
+# Shorter titles (or empty ones) say too little to compare
+MIN_TITLE_WORDS = 3
+# Only the start of an article body is compared; syndicated copies differ mostly at the end
+BODY_CHARS = 2000
+# Search snippets shorter than this say too little about the story to compare
+MIN_SNIPPET_CHARS = 80
+
+_MERSENNE_PRIME = (1 << 31) - 1
+
+
+class NewsSource:
+    """
+    Base class for sources. Subclasses implement search(query) and return records in
+    their own ranking order.
+    """
+    name = "source"
+
+    def search(self, query):
+        raise NotImplementedError
+
+
+class BingNewsSource(NewsSource):
+    """
+    Bing News search results, reading up to `pages` result pages.
+    """
+    name = "bing"
+
+    def __init__(self, pages=DEFAULT_BING_PAGES):
+        self.pages = pages
+
+    def search(self, query):
+        records = []
+        seen = set()
+        for page in range(self.pages):
+            url = BING_NEWS_URL.format(query=quote_plus(query), first=page * BING_PAGE_SIZE + 1)
+            page_records = [r for r in parse_search_results(http_get(url).text) if r["link"] not in seen]
+            # Bing repeats the last page once the results run out
+            if not page_records:
+                break
+            seen.update(r["link"] for r in page_records)
+            records.extend(page_records)
+        return records
+
+
+def _local_name(tag):
+    # Strip the XML namespace: "{http://www.w3.org/2005/Atom}entry" -> "entry"
+    return tag.rsplit('}', 1)[-1]
+
+
+def parse_feed(xml):
+    """
+    Parse an RSS 2.0 or Atom document into result records with their published dates.
+    """
+    from xml.etree import ElementTree
+
+    root = ElementTree.fromstring(xml.encode('utf-8') if isinstance(xml, str) else xml)
+    records = []
+    for element in root.iter():
+        if _local_name(element.tag) not in ("item", "entry"):
+            continue
+
+        fields = {}
+        link = None
+        for child in element:
+            name = _local_name(child.tag)
+            if name == "link":
+                # RSS has the URL as text, Atom in the href attribute (prefer rel="alternate")
+                href = child.get("href") or (child.text or "").strip()
+                if href and (link is None or child.get("rel", "alternate") == "alternate"):
+                    link = href
+            elif name not in fields:
+                fields[name] = (child.text or "").strip()
+
+        if not link:
+            continue
+        summary = fields.get("description") or fields.get("summary") or ""
+        # Feed summaries are often HTML fragments
+        summary = re.sub(r'<[^>]+>', ' ', summary)
+        records.append({
+            "title": fields.get("title", ""),
+            "link": link,
+            "snippets": [summary] if summary else [],
+            "published": parse_datetime(fields.get("pubDate") or fields.get("published") or fields.get("updated")),
+        })
+    return records
+
+
+def matches_query(record, query):
+    """
+    Whether every word of the query appears in the record's title, snippets or content.
+    """
+    text = " ".join([record["title"], record.get("content", "")] + record.get("snippets", [])).lower()
+    return all(word in text for word in query.lower().split())
+
+
+class FeedSource(NewsSource):
+    """
+    RSS/Atom feeds. URLs containing {query} are search feeds and are used as is;
+    items of other feeds are kept only if they mention the query.
+    """
+    name = "feeds"
+
+    def __init__(self, urls):
+        self.urls = list(urls)
+
+    def search(self, query):
+        records = []
+        for url in self.urls:
+            try:
+                if "{query}" in url:
+                    records.extend(parse_feed(http_get(url.format(query=quote_plus(query))).text))
+                else:
+                    records.extend(r for r in parse_feed(http_get(url).text) if matches_query(r, query))
+            except Exception as e:
+                print(f"Error reading feed {url}: {e}")
+        return records
+
+
+class LocalDumpSource(NewsSource):
+    """
+    Offline source reading a directory of saved results:
+    - *.json: a list of objects with title, link and optionally content, published and snippets
+    - *.html: saved Bing result pages, or saved article pages (used as the article itself)
+    Records are kept if they mention the query.
+    """
+    name = "local"
+
+    def __init__(self, directory=DUMPS_DIR):
+        self.directory = directory
+
+    def _load_json(self, path):
+        with open(path, encoding="utf-8") as f:
+            items = json.load(f)
+        records = []
+        for item in items if isinstance(items, list) else [items]:
+            if not item.get("link"):
+                continue
+            record = {"title": item.get("title", ""), "link": item["link"], "snippets": item.get("snippets", [])}
+            if item.get("published"):
+                record["published"] = parse_datetime(item["published"])
+            if item.get("content"):
+                record["content"] = item["content"]
+            records.append(record)
+        return records
+
+    def _load_html(self, path):
+        with open(path, encoding="utf-8", errors="replace") as f:
+            html = f.read()
+        results = parse_search_results(html)
+        if results:
+            return results
+
+        # Not a result page: treat the file as a saved article
+        content, published = extract_article(html)
+        match = re.search(r'<title[^>]*>(.*?)</title>', html, re.IGNORECASE | re.DOTALL)
+        title = re.sub(r'\s+', ' ', match.group(1)).strip() if match else os.path.basename(path)
+        return [{"title": title, "link": "file://" + os.path.abspath(path), "snippets": [],
+                 "published": published, "content": content}]
+
+    def search(self, query):
+        records = []
+        for path in sorted(glob.glob(os.path.join(self.directory, "*"))):
+            try:
+                if path.endswith(".json"):
+                    records.extend(self._load_json(path))
+                elif path.endswith((".html", ".htm")):
+                    records.extend(self._load_html(path))
+            except Exception as e:
+                print(f"Error reading {path}: {e}")
+        return [r for r in records if matches_query(r, query)]
+
+
+def default_sources():
+    """
+    Bing News, plus the feeds listed in FEEDS_FILE and the dumps in DUMPS_DIR if present.
+    """
+    sources = [BingNewsSource()]
+    if os.path.exists(FEEDS_FILE):
+        with open(FEEDS_FILE, encoding="utf-8") as f:
+            urls = [line.strip() for line in f if line.strip() and not line.startswith('#')]
+        if urls:
+            sources.append(FeedSource(urls))
+    if os.path.isdir(DUMPS_DIR):
+        sources.append(LocalDumpSource(DUMPS_DIR))
+    return sources
+
+
+def shingle_hashes(text, size=SHINGLE_SIZE):
+    """
+    32-bit hashes of the character shingles of a normalized text.
+    """
+    text = re.sub(r'[^a-z0-9]+', ' ', text.lower()).strip()
+    if len(text) < size:
+        return np.array([zlib.crc32(text.encode('utf-8'))], dtype=np.uint64)
+    return np.unique(np.fromiter((zlib.crc32(text[i:i + size].encode('utf-8'))
+                                  for i in range(len(text) - size + 1)), dtype=np.uint64))
+
+
+class NearDuplicateIndex:
+    """
+    MinHash signatures with LSH banding for near-duplicate detection.
+    add(key, text) returns the key of an earlier near-duplicate, or None after indexing
+    the text. Safe to use from several threads.
+    """
+
+    def __init__(self, threshold=DUPLICATE_THRESHOLD, num_permutations=NUM_PERMUTATIONS,
+                 bands=LSH_BANDS, seed=1):
+        rng = np.random.default_rng(seed)
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_permutations // bands
+        # Universal hash functions h(x) = (a * x + b) mod p; a * x stays below 2**63
+        self._a = rng.integers(1, _MERSENNE_PRIME, num_permutations, dtype=np.uint64)
+        self._b = rng.integers(0, _MERSENNE_PRIME, num_permutations, dtype=np.uint64)
+        self._buckets = [{} for _ in range(bands)]
+        self._signatures = {}
+        self._lock = threading.Lock()
+
+    def signature(self, text):
+        hashes = shingle_hashes(text)
+        return ((self._a[:, None] * hashes[None, :] + self._b[:, None]) % _MERSENNE_PRIME).min(axis=1)
+
+    def add(self, key, text):
+        signature = self.signature(text)
+        band_keys = [signature[band * self.rows:(band + 1) * self.rows].tobytes() for band in range(self.bands)]
+
+        with self._lock:
+            # Candidates share at least one band; confirm with the estimated similarity
+            candidates = set()
+            for band, band_key in enumerate(band_keys):
+                candidates.update(self._buckets[band].get(band_key, ()))
+            for candidate in candidates:
+                if np.mean(self._signatures[candidate] == signature) >= self.threshold:
+                    return candidate
+
+            self._signatures[key] = signature
+            for band, band_key in enumerate(band_keys):
+                self._buckets[band].setdefault(band_key, []).append(key)
+        return None
+
+
+def same_story(text, original, threshold=DUPLICATE_THRESHOLD):
+    """
+    Whether text (an article body or a search snippet) repeats the start of the original
+    article body: the share of its shingles that also occur in original[:BODY_CHARS].
+    """
+    shingles = shingle_hashes(text[:BODY_CHARS])
+    return np.isin(shingles, shingle_hashes(original[:BODY_CHARS])).mean() >= threshold
+
+
+def collect_results(sources, query, duplicates=None):
+    """
+    Run every source for a query (concurrently) and merge their records, dropping
+    repeated URLs. Records whose title nearly matches an earlier one get a "title_match"
+    (that record's canonical URL): they are likely copies, to be confirmed on their text
+    with same_story(). Returns (records, number_of_duplicates dropped).
+    """
+    sources = list(sources)
+    with ThreadPoolExecutor(max_workers=max(1, len(sources))) as executor:
+        futures = [executor.submit(source.search, query) for source in sources]
+
+    duplicates = duplicates or NearDuplicateIndex(threshold=TITLE_DUPLICATE_THRESHOLD)
+    records = []
+    seen_urls = set()
+    dropped = 0
+    for source, future in zip(sources, futures):
+        try:
+            source_records = future.result()
+        except Exception as e:
+            print(f"Error searching {source.name}: {e}")
+            continue
+
+        for record in source_records:
+            url = canonical_url(record["link"])
+            if url in seen_urls:
+                dropped += 1
+                continue
+            seen_urls.add(url)
+            if len(record["title"].split()) >= MIN_TITLE_WORDS:
+                match = duplicates.add(url, record["title"])
+                if match is not None:
+                    record["title_match"] = match
+            record["source"] = source.name
+            records.append(record)
+    return records, dropped
@@ -0,0 +1,226 @@
+"""
+Append-only sentiment history for the Stock Sentiment app.
+
+Every scored article is appended once to a per-ticker directory, partitioned by the
+article's date (one JSON-lines file per day):
+
+    ~/.stock_sentiment/history/AAPL/2025-01-02.jsonl
+
+Next to the partitions, aggregates.json keeps running sums per day and per hour
+(article count, VADER compound, TextBlob polarity). They are updated as articles are
+appended, so daily/hourly sentiment indices over months of history are read without
+touching the partitions or re-scraping anything.
+
+    python sentiment_store.py AAPL --freq D
+"""
+import argparse
+import glob
+import json
+import os
+import re
+import threading
+from datetime import datetime
+
+from sentiment_cache import canonical_url
+
+DEFAULT_HISTORY_DIR = os.path.join(os.path.expanduser("~"), ".stock_sentiment", "history")
+
+# Bucket formats for the sentiment indices
+FREQUENCIES = {"D": "%Y-%m-%d", "H": "%Y-%m-%d %H:00"}
+AGGREGATE_FIELDS = ("vader_compound", "textblob_polarity")
+
+
+def ticker_key(query):
+    """
+    Directory name for a query or ticker: "aapl stock" -> "AAPL_STOCK".
+    """
+    return re.sub(r'[^A-Z0-9]+', '_', query.upper()).strip('_') or "_"
+
+
+def article_row(result, scored_at=None):
+    """
+    Flatten a (title, link, content, preview, date, sentiment) result into a stored row.
+    Articles without a known date are filed under the time they were scored.
+    """
+    title, link, _, _, date, sentiment = result
+    scored_at = scored_at or datetime.now()
+    return {
+        "url": canonical_url(link),
+        "title": title,
+        "published": (date or scored_at).isoformat(timespec="seconds"),
+        "dated": date is not None,
+        "scored_at": scored_at.isoformat(timespec="seconds"),
+        "textblob_polarity": sentiment["textblob"]["polarity"],
+        "textblob_subjectivity": sentiment["textblob"]["subjectivity"],
+        "vader_compound": sentiment["vader"]["compound"],
+        "vader_pos": sentiment["vader"]["pos"],
+        "vader_neg": sentiment["vader"]["neg"],
+        "vader_neu": sentiment["vader"]["neu"],
+    }
+
+
+def _empty_aggregates():
+    return {freq: {} for freq in FREQUENCIES}
+
+
+def _add_to_aggregates(aggregates, row):
+    published = datetime.fromisoformat(row["published"])
+    for freq, fmt in FREQUENCIES.items():
+        bucket = aggregates[freq].setdefault(published.strftime(fmt),
+                                             {"articles": 0, **{f: 0.0 for f in AGGREGATE_FIELDS}})
+        bucket["articles"] += 1
+        for field in AGGREGATE_FIELDS:
+            bucket[field] += row[field]
+
+
+class SentimentStore:
+    """
+    Per-ticker append-only article history with incrementally maintained aggregates.
+    """
+
+    def __init__(self, directory=DEFAULT_HISTORY_DIR):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._seen = {}        # ticker -> set of stored canonical URLs
+        self._aggregates = {}  # ticker -> {"D": {bucket: sums}, "H": {...}}
+
+    def _ticker_dir(self, ticker):
+        return os.path.join(self.directory, ticker_key(ticker))
+
+    def tickers(self):
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(name for name in os.listdir(self.directory)
+                      if os.path.isdir(os.path.join(self.directory, name)))
+
+    def _partitions(self, ticker):
+        return sorted(glob.glob(os.path.join(self._ticker_dir(ticker), "????-??-??.jsonl")))
+
+    def _load_seen(self, ticker):
+        key = ticker_key(ticker)
+        if key not in self._seen:
+            self._seen[key] = {row["url"] for row in self.articles(ticker)}
+        return self._seen[key]
+
+    def _load_aggregates(self, ticker):
+        key = ticker_key(ticker)
+        if key not in self._aggregates:
+            path = os.path.join(self._ticker_dir(ticker), "aggregates.json")
+            if os.path.exists(path):
+                with open(path, encoding="utf-8") as f:
+                    self._aggregates[key] = json.load(f)
+            else:
+                self._aggregates[key] = self._rebuild(ticker)
+        return self._aggregates[key]
+
+    def _save_aggregates(self, ticker):
+        path = os.path.join(self._ticker_dir(ticker), "aggregates.json")
+        temp_path = path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(self._aggregates[ticker_key(ticker)], f)
+        os.replace(temp_path, path)
+
+    def append(self, ticker, results, scored_at=None):
+        """
+        Append newly scored articles (result tuples) for a ticker. Articles already in the
+        history, and articles that could not be fetched, are skipped. Returns the number
+        of articles added.
+        """
+        with self._lock:
+            seen = self._load_seen(ticker)
+            aggregates = self._load_aggregates(ticker)
+
+            # Group the new rows by partition so each file is opened once
+            partitions = {}
+            for result in results:
+                # Unfetched articles carry placeholder neutral scores
+                if not result[2] or result[2].startswith("Error fetching article"):
+                    continue
+                row = article_row(result, scored_at)
+                if row["url"] in seen:
+                    continue
+                seen.add(row["url"])
+                partitions.setdefault(row["published"][:10], []).append(row)
+            if not partitions:
+                return 0
+
+            os.makedirs(self._ticker_dir(ticker), exist_ok=True)
+            for day, rows in partitions.items():
+                with open(os.path.join(self._ticker_dir(ticker), f"{day}.jsonl"), "a", encoding="utf-8") as f:
+                    for row in rows:
+                        f.write(json.dumps(row) + "\n")
+                        _add_to_aggregates(aggregates, row)
+            self._save_aggregates(ticker)
+            return sum(len(rows) for rows in partitions.values())
+
+    def articles(self, ticker, start=None, end=None):
+        """
+        Yield the stored rows of a ticker, reading only the partitions within
+        [start, end] ('YYYY-MM-DD' strings or dates, both inclusive).
+        """
+        start = str(start)[:10] if start else None
+        end = str(end)[:10] if end else None
+        for path in self._partitions(ticker):
+            day = os.path.basename(path)[:10]
+            if (start and day < start) or (end and day > end):
+                continue
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+
+    def _rebuild(self, ticker):
+        aggregates = _empty_aggregates()
+        for row in self.articles(ticker):
+            _add_to_aggregates(aggregates, row)
+        return aggregates
+
+    def rebuild_aggregates(self, ticker):
+        """
+        Recompute a ticker's aggregates from its partitions (e.g. after editing them by hand).
+        """
+        with self._lock:
+            self._aggregates[ticker_key(ticker)] = self._rebuild(ticker)
+            self._seen.pop(ticker_key(ticker), None)
+            if os.path.isdir(self._ticker_dir(ticker)):
+                self._save_aggregates(ticker)
+
+    def sentiment_index(self, ticker, freq="D"):
+        """
+        Sentiment index of a ticker as a DataFrame indexed by day ("D") or hour ("H"), with
+        the mean VADER compound, the mean TextBlob polarity and the number of articles.
+        """
+        import pandas as pd
+
+        if freq not in FREQUENCIES:
+            raise ValueError(f"Unsupported frequency: {freq} (use 'D' or 'H')")
+        with self._lock:
+            buckets = dict(self._load_aggregates(ticker)[freq])
+
+        index = pd.DatetimeIndex(pd.to_datetime(sorted(buckets)), name="Date")
+        sums = [buckets[bucket] for bucket in sorted(buckets)]
+        return pd.DataFrame({
+            "vader_compound": [b["vader_compound"] / b["articles"] for b in sums],
+            "textblob_polarity": [b["textblob_polarity"] / b["articles"] for b in sums],
+            "articles": [b["articles"] for b in sums],
+        }, index=index)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show the stored sentiment index of a ticker")
+    parser.add_argument("ticker", nargs="?", help="Ticker or search term (omit to list stored tickers)")
+    parser.add_argument("--freq", choices=sorted(FREQUENCIES), default="D", help="D = daily, H = hourly")
+    parser.add_argument("--rebuild", action="store_true", help="Recompute the aggregates from the partitions")
+    args = parser.parse_args()
+
+    store = SentimentStore()
+    if not args.ticker:
+        print("\n".join(store.tickers()) or "No history stored yet")
+        return
+    if args.rebuild:
+        store.rebuild_aggregates(args.ticker)
+    print(store.sentiment_index(args.ticker, args.freq).to_string(float_format="{:.3f}".format))
+
+
+if __name__ == "__main__":
+    main()
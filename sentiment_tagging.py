@@ -0,0 +1,389 @@
+"""
+Ticker tagging for the Stock Sentiment app.
+
+A search only links an article to the query it was found with, although many articles
+are about several companies. The tagger finds which NASDAQ-listed companies an article
+actually mentions, by company name ("Nvidia", "Meta Platforms") or by ticker ("AAPL",
+"$TSLA", "(NASDAQ: MSFT)"), and which sentences mention them, so every article of one
+crawl can add to the sentiment of each company it is about.
+
+All names and tickers of the universe are compiled once into an Aho-Corasick automaton
+(a trie with failure links), so a sentence is matched against thousands of patterns in
+a single pass over its characters. To keep ordinary words from being read as tickers:
+- names only match when capitalised in the text ("Apple", not "apple pie"), or written
+  exactly as listed ("monday.com")
+- one-word names that are also common words ("Monday", "News") only match in their
+  longer listed form ("monday.com", "News Corporation")
+- tickers only match in capitals, and short or word-like tickers ("ON", "FAST", "CASH")
+  only as cashtags or after an exchange prefix ("$ON", "NASDAQ: ON")
+- bare tickers are ignored in all-caps sentences (headlines)
+
+The universe is NASDAQ Trader's symbol directory, downloaded once and kept in
+~/.stock_sentiment/nasdaqlisted.txt (any file in that format can be used instead).
+
+    python sentiment_tagging.py --update
+    python sentiment_tagging.py --text "Nvidia rallied while $AMD slipped after Apple's event"
+"""
+import argparse
+import os
+import re
+import time
+from collections import deque
+
+from sentiment_http import http_get
+from sentiment_preprocess import clean_sentences, split_sentences
+
+NASDAQ_LISTED_URL = "https://www.nasdaqtrader.com/dynamic/SymDir/nasdaqlisted.txt"
+DEFAULT_UNIVERSE_PATH = os.path.join(os.path.expanduser("~"), ".stock_sentiment", "nasdaqlisted.txt")
+
+# Shortest company name matched (shorter names are too often other words)
+MIN_NAME_LENGTH = 3
+# Tickers shorter than this only match as cashtags or after an exchange prefix
+MIN_BARE_TICKER_LENGTH = 3
+
+# Tickers that are also common words or acronyms in financial news
+AMBIGUOUS_TICKERS = {
+    "ALL", "AM", "API", "ARE", "BEAT", "BIG", "CAR", "CASH", "CEO", "CFO", "COST", "CPI", "EAT",
+    "EDIT", "EPS", "ESG", "ETF", "EU", "FAST", "FDA", "FED", "FOR", "FUND", "GDP", "GOOD", "GROW",
+    "HAS", "HOPE", "IPO", "IRS", "LIFE", "LOW", "MIND", "NEWS", "NOW", "NYSE", "ONE", "OPEN",
+    "PLAY", "PM", "REAL", "SAFE", "SEC", "TECH", "TRUE", "UK", "USA", "USD", "WISH",
+}
+
+# One-word names that are ordinary words in news text (checked lowercased)
+COMMON_WORD_NAMES = {
+    "monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday",
+    "january", "february", "march", "april", "may", "june", "july", "august", "september",
+    "october", "november", "december",
+    "news", "pool", "target", "match", "block", "square", "gap", "shift", "snap", "zoom", "box",
+    "first", "united", "american", "national", "global", "general", "international", "capital",
+    "trust", "bank", "energy", "health", "life", "solar", "digital", "data", "gold", "silver",
+    "apartment", "community", "financial", "select", "premier", "pioneer", "frontier", "summit",
+    "insight", "vision", "alpha", "beta", "delta", "focus", "genesis", "liberty", "patriot",
+    "heritage", "harmony", "compass", "anchor", "atlas", "beacon", "bridge", "cargo", "express",
+    "nexus", "orbit", "pulse", "quest", "signal", "spirit", "unity", "victory", "wave",
+}
+
+# Names news uses for some companies that differ from their listed names
+EXTRA_ALIASES = {
+    "GOOGL": ["Google"],
+    "GOOG": ["Google"],
+    "META": ["Meta", "Facebook"],
+    "AMZN": ["Amazon"],
+    "AMD": ["AMD"],
+    "PYPL": ["PayPal"],
+    "CSCO": ["Cisco"],
+}
+
+# Listings that are not a company's own shares
+_SKIP_SECURITIES = re.compile(r"\b(?:warrants?|units?|rights?|preferred|notes due|debentures)\b", re.IGNORECASE)
+# Share class descriptions after the company name: "Apple Inc. - Common Stock"
+_SECURITY_SUFFIX = re.compile(r"\s+-\s+.*$")
+_LEGAL_SUFFIX = re.compile(
+    r"(?:,?\s+(?:inc|incorporated|corp|corporation|co|company|ltd|limited|plc|llc|l\.?p|n\.?v|s\.?a|ag|se)\.?)+$",
+    re.IGNORECASE)
+_EXCHANGE_PREFIX = re.compile(r"nasdaq(?:\s*[gc][sm])?\s*:\s*$", re.IGNORECASE)
+
+# Kinds of pattern in the automaton
+NAME = "name"
+TICKER = "ticker"
+
+
+def _common_word(alias):
+    return alias.lower() in COMMON_WORD_NAMES
+
+
+def company_aliases(security_name):
+    """
+    Names a company goes by in news, from its listed security name:
+    "Amazon.com, Inc. - Common Stock" -> ["Amazon.com", "Amazon"].
+    A name that is just a common word is replaced by the listed name with its legal
+    suffix ("News Corporation"), and ".com" is only dropped when what is left is not a
+    common word ("monday.com" stays "monday.com").
+    """
+    listed = _SECURITY_SUFFIX.sub("", security_name).strip().strip(" ,")
+    name = _LEGAL_SUFFIX.sub("", listed).strip(" ,")
+    if name.lower().startswith("the "):
+        name = name[4:]
+    aliases = [name]
+    if _common_word(name):
+        aliases = [listed] if listed != name and not _common_word(listed) else []
+    if name.lower().endswith(".com") and not _common_word(name[:-4]):
+        aliases.append(name[:-4])
+    return [alias for alias in aliases if len(alias) >= MIN_NAME_LENGTH]
+
+
+def parse_symbol_directory(text):
+    """
+    (symbol, security name) pairs from a NASDAQ Trader symbol directory file
+    (pipe-separated with a header line), leaving out test issues, ETFs, warrants,
+    units, rights and preferred shares.
+    """
+    lines = [line for line in text.splitlines() if line.strip()]
+    if not lines:
+        return []
+    header = [column.strip().lower() for column in lines[0].split("|")]
+    if "symbol" not in header:
+        header = ["symbol", "security name"]
+    else:
+        lines = lines[1:]
+    columns = {name: i for i, name in enumerate(header)}
+
+    listings = []
+    for line in lines:
+        fields = [field.strip() for field in line.split("|")]
+        # The file ends with a "File Creation Time: ..." line
+        if len(fields) < 2 or fields[0].startswith("File Creation Time"):
+            continue
+
+        def field(name):
+            i = columns.get(name)
+            return fields[i] if i is not None and i < len(fields) else ""
+
+        if field("test issue") == "Y" or field("etf") == "Y":
+            continue
+        symbol, name = field("symbol").upper(), field("security name")
+        if symbol and name and not _SKIP_SECURITIES.search(name):
+            listings.append((symbol, name))
+    return listings
+
+
+def download_universe(path=DEFAULT_UNIVERSE_PATH, url=NASDAQ_LISTED_URL):
+    """
+    Download the NASDAQ symbol directory to path and return its listings.
+    """
+    response = http_get(url, timeout=30)
+    response.raise_for_status()
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(response.text)
+    return parse_symbol_directory(response.text)
+
+
+def load_universe(path=DEFAULT_UNIVERSE_PATH, download=True):
+    """
+    Listings of the local symbol directory, downloading it first if there is none yet.
+    """
+    if not os.path.exists(path):
+        if not download:
+            return []
+        return download_universe(path)
+    with open(path, encoding="utf-8", errors="replace") as f:
+        return parse_symbol_directory(f.read())
+
+
+class AhoCorasick:
+    """
+    Multi-pattern matcher: finds every occurrence of every pattern in one pass over a text.
+    patterns maps each pattern string to a value returned with its matches.
+    """
+
+    def __init__(self, patterns):
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [()]
+        self._patterns = []
+        for pattern, value in patterns.items():
+            node = 0
+            for char in pattern:
+                child = self._goto[node].get(char)
+                if child is None:
+                    child = len(self._goto)
+                    self._goto[node][char] = child
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(())
+                node = child
+            self._out[node] += (len(self._patterns),)
+            self._patterns.append((len(pattern), value))
+
+        # Failure links, breadth first: the longest proper suffix that is also in the trie
+        # (depth-one nodes fail to the root). Each node's outputs include those of its
+        # failure node, so matching never walks the chain.
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0)
+                self._out[child] += self._out[self._fail[child]]
+
+    def __len__(self):
+        return len(self._patterns)
+
+    def finditer(self, text):
+        """
+        Yield (start, end, value) for every pattern occurrence, overlapping ones included.
+        """
+        goto, fail, out, patterns = self._goto, self._fail, self._out, self._patterns
+        node = 0
+        for i, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            for index in out[node]:
+                length, value = patterns[index]
+                yield i + 1 - length, i + 1, value
+
+
+class TickerTagger:
+    """
+    Finds the companies of a symbol universe that a text mentions, by name or ticker.
+    Read-only once built, so one tagger can be shared by all threads.
+    """
+
+    def __init__(self, listings):
+        patterns = {}
+        self.names = {}
+        for symbol, security_name in listings:
+            # EXTRA_ALIASES may repeat a listed alias ("Amazon"); each is added once
+            aliases = list(dict.fromkeys(company_aliases(security_name) + EXTRA_ALIASES.get(symbol, [])))
+            self.names.setdefault(symbol, aliases[0] if aliases else symbol)
+            for kind, alias in [(NAME, alias) for alias in aliases] + [(TICKER, symbol)]:
+                values = patterns.setdefault(alias.lower(), [])
+                # Aliases differing only in case ("AMD" the name and AMD the ticker) are one pattern
+                if not any(value[:2] == (symbol, kind) for value in values):
+                    values.append((symbol, kind, alias))
+        # Patterns are matched against lowercased text; the case rules are checked on the original
+        self.automaton = AhoCorasick(patterns)
+
+    def __len__(self):
+        return len(self.names)
+
+    def _accept(self, text, start, end, symbol, kind, alias, headline):
+        # Whole words only ("Apple's" is fine, "Applebee" is not)
+        if (start > 0 and text[start - 1].isalnum()) or (end < len(text) and text[end].isalnum()):
+            return False
+        if kind == NAME:
+            return text[start].isupper() or text[start:end] == alias
+        if text[start:end] != symbol:
+            return False
+        if start > 0 and text[start - 1] == "$":
+            return True
+        if _EXCHANGE_PREFIX.search(text, max(0, start - 12), start):
+            return True
+        return not headline and len(symbol) >= MIN_BARE_TICKER_LENGTH and symbol not in AMBIGUOUS_TICKERS
+
+    def find(self, text):
+        """
+        Mentions in a text as (start, end, symbol) in text order. Where matches overlap
+        the longest one wins ("Meta Platforms" over "Meta").
+        """
+        lowered = text.lower()
+        headline = text.isupper()
+        candidates = []
+        for start, end, values in self.automaton.finditer(lowered):
+            for symbol, kind, alias in values:
+                if self._accept(text, start, end, symbol, kind, alias, headline):
+                    candidates.append((start, -end, symbol))
+
+        mentions = []
+        last_end = -1
+        last_span = None
+        # A name and a ticker can match the same words ("AMD"); count the company once there
+        for start, negative_end, symbol in sorted(set(candidates)):
+            span = (start, -negative_end)
+            if span == last_span:
+                # Same words naming several listings (e.g. both share classes of a company)
+                mentions.append((span[0], span[1], symbol))
+            elif start >= last_end:
+                mentions.append((span[0], span[1], symbol))
+                last_end, last_span = span[1], span
+        return mentions
+
+    def tag(self, content, title=""):
+        """
+        The companies an article mentions: {symbol: {"name", "mentions", "sentences"}},
+        where sentences are the (cleaned) sentences of the title and text that mention it.
+        """
+        sentences = clean_sentences(([title] if title else []) + split_sentences(content or ""))
+        tags = {}
+        for sentence in sentences:
+            found = [symbol for _, _, symbol in self.find(sentence)]
+            for symbol in found:
+                tag = tags.setdefault(symbol, {"name": self.names[symbol], "mentions": 0, "sentences": []})
+                tag["mentions"] += 1
+            for symbol in dict.fromkeys(found):
+                tags[symbol]["sentences"].append(sentence)
+        return tags
+
+
+def score_mentions(tagged, engine):
+    """
+    Sentence-level sentiment per mentioned company: for each article's tags, scores the
+    sentences that mention each company with the engine, all articles in one batch.
+    Returns, per article, {symbol: {"name", "mentions", "sentiment"}}.
+    """
+    jobs = [(i, symbol, " ".join(tag["sentences"]))
+            for i, tags in enumerate(tagged) for symbol, tag in tags.items()]
+    scores = engine.score_batch([(text, "") for _, _, text in jobs]) if jobs else []
+
+    results = [{} for _ in tagged]
+    for (i, symbol, _), sentiment in zip(jobs, scores):
+        tag = tagged[i][symbol]
+        results[i][symbol] = {"name": tag["name"], "mentions": tag["mentions"], "sentiment": sentiment}
+    return results
+
+
+_tagger = None
+
+
+def get_tagger(path=DEFAULT_UNIVERSE_PATH, download=True):
+    """
+    Return the process-wide tagger, building it from the symbol directory on first use.
+    None if no universe is available (e.g. offline before the first download).
+    """
+    global _tagger
+    if _tagger is None:
+        try:
+            listings = load_universe(path, download)
+        except Exception as e:
+            print(f"Ticker tagging disabled, no symbol directory: {e}")
+            return None
+        if listings:
+            _tagger = TickerTagger(listings)
+    return _tagger
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tag text with the NASDAQ companies it mentions")
+    parser.add_argument("--text", help="Text to tag")
+    parser.add_argument("--universe", default=DEFAULT_UNIVERSE_PATH, help="Symbol directory file")
+    parser.add_argument("--update", action="store_true", help="Download the current NASDAQ symbol directory")
+    parser.add_argument("--benchmark", metavar="DIR", help="Time tagging over the .html/.txt files in DIR")
+    args = parser.parse_args()
+
+    if args.update:
+        listings = download_universe(args.universe)
+        print(f"{len(listings)} listings saved to {args.universe}")
+
+    started = time.perf_counter()
+    tagger = get_tagger(args.universe)
+    if tagger is None:
+        parser.error(f"no symbol directory at {args.universe}")
+    print(f"{len(tagger)} companies, {len(tagger.automaton)} patterns, built in "
+          f"{time.perf_counter() - started:.2f}s")
+
+    if args.text:
+        for symbol, tag in tagger.tag(args.text).items():
+            print(f"{symbol:<6} {tag['name']:<30} {tag['mentions']} mention(s)")
+            for sentence in tag["sentences"]:
+                print(f"       {sentence}")
+    if args.benchmark:
+        from sentiment_lexicon import load_texts
+
+        texts = load_texts(args.benchmark)
+        if not texts:
+            parser.error(f"no article texts found in {args.benchmark}")
+        started = time.perf_counter()
+        mentions = sum(len(tagger.tag(text)) for text in texts)
+        elapsed = time.perf_counter() - started
+        print(f"{len(texts)} articles tagged in {elapsed:.2f}s ({len(texts) / elapsed:.1f} articles/s), "
+              f"{mentions} company mentions")
+
+
+if __name__ == "__main__":
+    main()
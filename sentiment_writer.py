@@ -0,0 +1,177 @@
+"""
+Streaming article writer for the Stock Sentiment app.
+
+Articles are written one by one as they are scored instead of all at once at the end
+of a search, so memory stays bounded and a crash loses at most the article in flight:
+- CSV: every row is flushed to disk as soon as it is written
+- Parquet (needs pyarrow): rows are buffered up to ROWS_PER_PART and written as
+  numbered, zstd-compressed part files, each renamed into place only once complete
+
+With rotate=True the output is split into one file (or set of part files) per day,
+e.g. articles_2025-01-02.csv, for long-running crawls.
+"""
+import csv
+import os
+from datetime import datetime
+
+COLUMNS = ['Title', 'URL', 'Content', 'Date', 'TextBlob Sentiment', 'TextBlob Polarity',
+           'VADER Sentiment', 'VADER Compound']
+FORMATS = ("csv", "parquet")
+
+# Rows per Parquet part file
+ROWS_PER_PART = 500
+PARQUET_COMPRESSION = "zstd"
+
+
+def article_columns(result):
+    """
+    The CSV/Parquet row for a (title, link, content, preview, date, sentiment) result.
+    """
+    title, link, content, _, date, sentiment = result
+    date_str = date.strftime("%Y-%m-%d") if date else "Unknown"
+    return [
+        title,
+        link,
+        content,
+        date_str,
+        sentiment["textblob"]["sentiment"],
+        sentiment["textblob"]["polarity"],
+        sentiment["vader"]["sentiment"],
+        sentiment["vader"]["compound"]
+    ]
+
+
+class ArticleWriter:
+    """
+    Writes scored articles to <directory>/<basename>[_<date>].csv, or to numbered
+    <basename>[_<date>]_part-NNNNN.parquet files.
+
+    mode "w" starts the output over (the file of a single search), mode "a" adds to
+    existing output (crawls spanning several runs).
+    """
+
+    def __init__(self, directory=".", basename="articles", fmt="csv", rotate=False, mode="w",
+                 rows_per_part=ROWS_PER_PART):
+        if fmt not in FORMATS:
+            raise ValueError(f"Unsupported format: {fmt} (use one of {', '.join(FORMATS)})")
+        if fmt == "parquet":
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                raise ImportError("Parquet output requires pyarrow (pip install pyarrow)")
+
+        self.directory = directory
+        self.basename = basename
+        self.fmt = fmt
+        self.rotate = rotate
+        self.mode = mode
+        self.rows_per_part = rows_per_part
+        self.rows_written = 0
+
+        self._file = None
+        self._csv = None
+        self._period = None
+        self._buffer = []
+        os.makedirs(directory, exist_ok=True)
+
+        if fmt == "csv" and mode == "w":
+            # Replace the previous output right away, even if no article gets written
+            self._period = self._current_period()
+            self._open_csv()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _stem(self, period):
+        name = f"{self.basename}_{period}" if self.rotate else self.basename
+        return os.path.join(self.directory, name)
+
+    def _current_period(self):
+        return datetime.now().strftime("%Y-%m-%d") if self.rotate else None
+
+    def write(self, result):
+        """
+        Write one scored result tuple.
+        """
+        period = self._current_period()
+        if period != self._period:
+            # New day (or first write): finish the previous output before switching
+            self.flush()
+            self._close_csv()
+            self._period = period
+
+        row = article_columns(result)
+        if self.fmt == "csv":
+            self._write_csv(row)
+        else:
+            self._buffer.append(row)
+            if len(self._buffer) >= self.rows_per_part:
+                self.flush()
+        self.rows_written += 1
+
+    def write_many(self, results):
+        for result in results:
+            self.write(result)
+
+    def _write_csv(self, row):
+        if self._file is None:
+            self._open_csv()
+        self._csv.writerow(row)
+        self._file.flush()
+
+    def _open_csv(self):
+        path = self._stem(self._period) + ".csv"
+        # Appending to an existing file must not repeat the header
+        new_file = self.mode == "w" or not os.path.exists(path) or os.path.getsize(path) == 0
+        self._file = open(path, "w" if new_file else "a", newline='', encoding='utf-8')
+        self._csv = csv.writer(self._file)
+        if new_file:
+            self._csv.writerow(COLUMNS)
+            self._file.flush()
+        # "w" only applies to the first file; a later day must not truncate anything
+        self.mode = "a"
+
+    def _next_part_path(self):
+        stem = self._stem(self._period)
+        directory, prefix = os.path.split(stem)
+        existing = [name for name in os.listdir(directory or ".")
+                    if name.startswith(prefix + "_part-") and name.endswith(".parquet")]
+        if self.mode == "w":
+            # Start the output over: drop the parts of a previous run
+            for name in existing:
+                os.remove(os.path.join(directory or ".", name))
+            existing = []
+            self.mode = "a"
+        numbers = [int(name[len(prefix) + 6:-8]) for name in existing if name[len(prefix) + 6:-8].isdigit()]
+        return f"{stem}_part-{max(numbers, default=0) + 1:05d}.parquet"
+
+    def flush(self):
+        """
+        Write buffered Parquet rows as a new part file (CSV rows are never buffered).
+        """
+        if self.fmt != "parquet" or not self._buffer:
+            return
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        table = pa.table({column: [row[i] for row in self._buffer] for i, column in enumerate(COLUMNS)})
+        path = self._next_part_path()
+        # Write under a temporary name so a crash never leaves a truncated part behind
+        temp_path = path + ".tmp"
+        pq.write_table(table, temp_path, compression=PARQUET_COMPRESSION,
+                       use_dictionary=['Date', 'TextBlob Sentiment', 'VADER Sentiment'])
+        os.replace(temp_path, path)
+        self._buffer = []
+
+    def _close_csv(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self._csv = None
+
+    def close(self):
+        self.flush()
+        self._close_csv()
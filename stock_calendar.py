@@ -0,0 +1,227 @@
+"""
+NASDAQ trading-session calendar for the NASDAQ Stock Analyzer.
+
+All sessions between FIRST_YEAR and LAST_YEAR are precomputed once as a sorted int64
+array of days since 1970-01-01 (weekdays minus exchange holidays), so that lookups
+are binary searches. Used for date range normalization, cache keys, gap detection
+and session-aligned weekly/monthly resampling.
+"""
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+FIRST_YEAR = 1980
+LAST_YEAR = datetime.now().year + 1
+
+EPOCH = date(1970, 1, 1)
+
+# Unscheduled full-day closures
+SPECIAL_CLOSURES = [
+    date(1985, 9, 27),   # Hurricane Gloria
+    date(1994, 4, 27),   # President Nixon funeral
+    date(2001, 9, 11), date(2001, 9, 12), date(2001, 9, 13), date(2001, 9, 14),  # September 11
+    date(2004, 6, 11),   # President Reagan funeral
+    date(2007, 1, 2),    # President Ford funeral
+    date(2012, 10, 29), date(2012, 10, 30),  # Hurricane Sandy
+    date(2018, 12, 5),   # President G.H.W. Bush funeral
+    date(2025, 1, 9),    # President Carter funeral
+]
+
+
+def _easter(year):
+    # Anonymous Gregorian algorithm
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def _nth_weekday(year, month, weekday, n):
+    # n-th given weekday (0 = Monday) of a month; n = -1 means the last one
+    if n > 0:
+        first = date(year, month, 1)
+        return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    last = date(year + (month == 12), month % 12 + 1, 1) - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _observed(holiday):
+    # Saturday holidays are observed on Friday, Sunday holidays on Monday
+    if holiday.weekday() == 5:
+        return holiday - timedelta(days=1)
+    if holiday.weekday() == 6:
+        return holiday + timedelta(days=1)
+    return holiday
+
+
+def exchange_holidays(year):
+    """
+    Regular full-day NASDAQ holidays for a year.
+    """
+    holidays = [
+        _nth_weekday(year, 2, 0, 3),      # Washington's Birthday
+        _easter(year) - timedelta(days=2),  # Good Friday
+        _nth_weekday(year, 5, 0, -1),     # Memorial Day
+        _observed(date(year, 7, 4)),      # Independence Day
+        _nth_weekday(year, 9, 0, 1),      # Labor Day
+        _nth_weekday(year, 11, 3, 4),     # Thanksgiving
+        _observed(date(year, 12, 25)),    # Christmas
+    ]
+
+    # New Year's Day falling on a Saturday is not observed on the previous Friday
+    new_year = date(year, 1, 1)
+    if new_year.weekday() != 5:
+        holidays.append(_observed(new_year))
+    if year >= 1998:
+        holidays.append(_nth_weekday(year, 1, 0, 3))  # Martin Luther King Jr. Day
+    if year >= 2022:
+        holidays.append(_observed(date(year, 6, 19)))  # Juneteenth
+
+    return holidays
+
+
+def _build_sessions():
+    start = (date(FIRST_YEAR, 1, 1) - EPOCH).days
+    end = (date(LAST_YEAR, 12, 31) - EPOCH).days
+    days = np.arange(start, end + 1, dtype=np.int64)
+
+    # 1970-01-01 was a Thursday, so (days + 3) % 7 gives Monday = 0 ... Sunday = 6
+    weekdays = days[(days + 3) % 7 < 5]
+
+    closed = [(holiday - EPOCH).days for year in range(FIRST_YEAR, LAST_YEAR + 1)
+              for holiday in exchange_holidays(year)]
+    closed += [(closure - EPOCH).days for closure in SPECIAL_CLOSURES]
+    return weekdays[~np.isin(weekdays, np.array(closed, dtype=np.int64))]
+
+
+# Sorted trading sessions as days since 1970-01-01
+SESSIONS = _build_sessions()
+
+
+def to_day(value):
+    """
+    Convert a date, datetime, Timestamp or 'YYYY-MM-DD' string to days since 1970-01-01.
+    """
+    return int(pd.Timestamp(value).normalize().value // 86_400_000_000_000)
+
+
+def from_day(day):
+    return EPOCH + timedelta(days=int(day))
+
+
+def is_session(value):
+    day = to_day(value)
+    i = np.searchsorted(SESSIONS, day)
+    return i < len(SESSIONS) and SESSIONS[i] == day
+
+
+def next_session(value):
+    """
+    First session on or after the given date (None past the end of the calendar).
+    """
+    i = np.searchsorted(SESSIONS, to_day(value), side="left")
+    return from_day(SESSIONS[i]) if i < len(SESSIONS) else None
+
+
+def previous_session(value):
+    """
+    Last session on or before the given date (None before the start of the calendar).
+    """
+    i = np.searchsorted(SESSIONS, to_day(value), side="right")
+    return from_day(SESSIONS[i - 1]) if i > 0 else None
+
+
+def _session_slice(start, end):
+    # Index range of sessions within [start, end], both inclusive
+    return (np.searchsorted(SESSIONS, to_day(start), side="left"),
+            np.searchsorted(SESSIONS, to_day(end), side="right"))
+
+
+def sessions_between(start, end):
+    """
+    All sessions within [start, end] as a DatetimeIndex.
+    """
+    lo, hi = _session_slice(start, end)
+    return pd.DatetimeIndex(SESSIONS[lo:hi].astype("datetime64[D]"))
+
+
+def session_count(start, end):
+    lo, hi = _session_slice(start, end)
+    return max(0, hi - lo)
+
+
+def normalize_range(start, end):
+    """
+    Shrink [start, end] to its first and last trading session, as 'YYYY-MM-DD' strings.
+    Returns (None, None) if the range contains no session.
+    """
+    lo, hi = _session_slice(start, end)
+    if hi <= lo:
+        return None, None
+    return from_day(SESSIONS[lo]).strftime('%Y-%m-%d'), from_day(SESSIONS[hi - 1]).strftime('%Y-%m-%d')
+
+
+def range_cache_key(symbol, start, end):
+    """
+    Cache key for a symbol and date range. Ranges that cover the same sessions
+    (e.g. differing only by a weekend or holiday) share the same key.
+    """
+    first, last = normalize_range(start, end)
+    return f"{symbol.upper()}:{first}:{last}"
+
+
+def missing_sessions(index, start, end):
+    """
+    Sessions within [start, end] that have no row in the given DatetimeIndex.
+    """
+    lo, hi = _session_slice(start, end)
+    have = pd.DatetimeIndex(index).normalize().values.astype("datetime64[D]").astype(np.int64)
+    expected = SESSIONS[lo:hi]
+    missing = expected[~np.isin(expected, have)]
+    return pd.DatetimeIndex(missing.astype("datetime64[D]"))
+
+
+# Aggregation used when combining daily bars into weekly/monthly bars
+BAR_AGGREGATION = {"Open": "first", "High": "max", "Low": "min", "Close": "last", "Volume": "sum"}
+
+
+def resample_sessions(df, rule):
+    """
+    Combine daily bars into weekly ('W') or monthly ('M') bars aligned to trading sessions.
+
+    Each bar is labelled with the last session that actually traded in the period
+    (e.g. Friday, or Thursday in a holiday week) rather than a calendar anchor such as
+    Sunday, and periods without any session never produce empty bars.
+    """
+    if df.empty:
+        return df.copy()
+
+    index = pd.DatetimeIndex(df.index)
+    if rule == "W":
+        # Monday-based week number since the epoch
+        days = index.normalize().values.astype("datetime64[D]").astype(np.int64)
+        keys = (days + 3) // 7
+    elif rule == "M":
+        keys = index.year * 12 + index.month - 1
+    else:
+        raise ValueError(f"Unsupported resampling rule: {rule}")
+
+    keys = np.asarray(keys)
+    # Flat column names ('Close') or yfinance-style tuples (('Close', 'AAPL'))
+    aggregation = {}
+    for column in df.columns:
+        name = column[0] if isinstance(column, tuple) else column
+        aggregation[column] = BAR_AGGREGATION.get(name, "last")
+
+    grouped = df.groupby(keys, sort=True)
+    resampled = grouped.agg(aggregation)
+    resampled.index = pd.DatetimeIndex(index.to_series().groupby(keys, sort=True).max().values, name=df.index.name)
+    return resampled
@@ -0,0 +1,190 @@
+"""
+Session memory manager for the NASDAQ Stock Analyzer.
+
+Keeps track of the bytes held for each loaded symbol (price DataFrames, indicator
+arrays and matplotlib figures) and evicts the least recently used symbols once a
+configurable budget is exceeded, so a session left open all day stays bounded.
+Stored DataFrames are downcast (float32 open/high/low, 32-bit volumes) when that loses
+no meaningful precision; closes stay float64 because the returns, VaR and correlation
+code are computed from them.
+
+The budget defaults to DEFAULT_BUDGET_MB and can be changed with the
+STOCK_ANALYZER_MEMORY_MB environment variable.
+"""
+import os
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_BUDGET_MB = 256
+# Largest relative error accepted when storing float64 prices as float32
+FLOAT32_RTOL = 1e-6
+# Columns the analysis code computes returns from; never downcast
+FULL_PRECISION_COLUMNS = ("Close", "Adj Close")
+
+
+def default_budget_bytes():
+    try:
+        return int(float(os.environ.get("STOCK_ANALYZER_MEMORY_MB", DEFAULT_BUDGET_MB)) * 1024 * 1024)
+    except ValueError:
+        return DEFAULT_BUDGET_MB * 1024 * 1024
+
+
+def estimate_bytes(obj):
+    """
+    Approximate memory held by a DataFrame, Series, NumPy array or matplotlib figure.
+    """
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(deep=True).sum())
+    if isinstance(obj, pd.Series):
+        return int(obj.memory_usage(deep=True))
+    if isinstance(obj, np.ndarray):
+        return int(obj.nbytes)
+    if hasattr(obj, "get_size_inches") and hasattr(obj, "dpi"):
+        # A drawn figure is dominated by its RGBA render buffer
+        width, height = obj.get_size_inches()
+        return int(width * obj.dpi * height * obj.dpi * 4)
+    return 0
+
+
+def downcast_frame(df, rtol=FLOAT32_RTOL):
+    """
+    Return a copy of df with float64 columns stored as float32 and integral volume
+    columns stored as uint32/int32 wherever the values survive the conversion.
+    The FULL_PRECISION_COLUMNS are left as they are.
+    """
+    df = df.copy()
+    for column in df.columns:
+        values = df[column].to_numpy()
+        if values.dtype != np.float64:
+            continue
+
+        name = column[0] if isinstance(column, tuple) else column
+        if name in FULL_PRECISION_COLUMNS:
+            continue
+
+        finite = values[np.isfinite(values)]
+        if name == "Volume" and np.array_equal(finite, np.round(finite)):
+            # Integral volumes: the smallest integer type that holds them (NaN blocks conversion)
+            if finite.size == values.size:
+                if finite.size == 0 or (finite.min() >= 0 and finite.max() <= np.iinfo(np.uint32).max):
+                    df[column] = values.astype(np.uint32)
+                    continue
+                if finite.min() >= np.iinfo(np.int32).min and finite.max() <= np.iinfo(np.int32).max:
+                    df[column] = values.astype(np.int32)
+                    continue
+
+        as_float32 = values.astype(np.float32)
+        if np.allclose(as_float32, values, rtol=rtol, atol=0, equal_nan=True):
+            df[column] = as_float32
+    return df
+
+
+def release_figure(fig):
+    """
+    Free a matplotlib figure, including its pyplot registration if it has one.
+    """
+    try:
+        import matplotlib.pyplot as plt
+        plt.close(fig)
+    except Exception:
+        pass
+    fig.clear()
+
+
+class SessionMemoryManager:
+    """
+    LRU cache of per-symbol session data with a memory budget.
+
+    Each symbol holds named objects (DataFrames, arrays) plus a list of figures.
+    Using a symbol marks it as most recently used; when the total exceeds the budget,
+    least recently used symbols are evicted (figures closed, on_evict(symbol) called)
+    until the total fits again. The most recently used symbol is never evicted.
+    """
+
+    def __init__(self, budget_bytes=None, on_evict=None):
+        self.budget_bytes = budget_bytes if budget_bytes is not None else default_budget_bytes()
+        self.on_evict = on_evict
+        self._entries = OrderedDict()  # symbol -> {"objects": {name: (obj, size)}, "figures": [(fig, size)]}
+
+    def _entry(self, symbol):
+        symbol = symbol.upper()
+        if symbol not in self._entries:
+            self._entries[symbol] = {"objects": {}, "figures": []}
+        self._entries.move_to_end(symbol)
+        return self._entries[symbol]
+
+    def put(self, symbol, name, obj, downcast=True):
+        """
+        Store obj under (symbol, name) and return the stored (possibly downcast) object.
+        """
+        if downcast and isinstance(obj, pd.DataFrame):
+            obj = downcast_frame(obj)
+        self._entry(symbol)["objects"][name] = (obj, estimate_bytes(obj))
+        self.enforce_budget()
+        return obj
+
+    def get(self, symbol, name, default=None):
+        """
+        Fetch a stored object and mark its symbol as recently used.
+        """
+        symbol = symbol.upper()
+        if symbol not in self._entries or name not in self._entries[symbol]["objects"]:
+            return default
+        return self._entry(symbol)["objects"][name][0]
+
+    def add_figure(self, symbol, fig):
+        self._entry(symbol)["figures"].append((fig, estimate_bytes(fig)))
+        self.enforce_budget()
+
+    def release_figures(self, symbol=None):
+        """
+        Close the tracked figures of one symbol (or of every symbol).
+        """
+        symbols = [symbol.upper()] if symbol else list(self._entries)
+        for name in symbols:
+            entry = self._entries.get(name)
+            if not entry:
+                continue
+            for fig, _ in entry["figures"]:
+                release_figure(fig)
+            entry["figures"].clear()
+
+    def discard(self, symbol):
+        """
+        Drop everything held for a symbol.
+        """
+        symbol = symbol.upper()
+        if symbol not in self._entries:
+            return
+        self.release_figures(symbol)
+        del self._entries[symbol]
+        if self.on_evict:
+            self.on_evict(symbol)
+
+    def bytes_for(self, symbol):
+        entry = self._entries.get(symbol.upper())
+        if not entry:
+            return 0
+        return (sum(size for _, size in entry["objects"].values()) +
+                sum(size for _, size in entry["figures"]))
+
+    def bytes_used(self):
+        return sum(self.bytes_for(symbol) for symbol in self._entries)
+
+    def symbols(self):
+        # Least recently used first
+        return list(self._entries)
+
+    def enforce_budget(self):
+        """
+        Evict least recently used symbols until the total fits in the budget.
+        Returns the evicted symbols.
+        """
+        evicted = []
+        while len(self._entries) > 1 and self.bytes_used() > self.budget_bytes:
+            symbol = next(iter(self._entries))
+            self.discard(symbol)
+            evicted.append(symbol)
+        return evicted
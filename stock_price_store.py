@@ -0,0 +1,378 @@
+"""
+Local price store for the NASDAQ Stock Analyzer.
+
+Raw (unadjusted) daily bars are stored per symbol together with a corporate actions
+table (stock splits and cash dividends). Adjusted prices are never stored: they are
+computed on demand from cumulative adjustment factors, so learning about a new split
+or dividend only means recomputing the factors instead of re-downloading history.
+
+Yahoo Finance returns prices that are already split-adjusted as of the download date,
+so downloaded bars are converted back to raw prices before they are stored. That keeps
+data fetched on different days consistent with each other.
+"""
+import os
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from stock_calendar import missing_sessions, normalize_range, previous_session
+
+PRICE_COLUMNS = ["Open", "High", "Low", "Close"]
+BAR_COLUMNS = PRICE_COLUMNS + ["Volume"]
+ACTION_COLUMNS = ["Date", "Type", "Value"]
+
+SPLIT = "split"
+DIVIDEND = "dividend"
+
+# Default location of the on-disk store
+DEFAULT_STORE_DIR = os.path.join(os.path.expanduser("~"), ".nasdaq_stock_analyzer", "prices")
+
+
+def fetch_yahoo_history(symbol, start_date, end_date):
+    """
+    Download daily bars and the full corporate action history for a symbol.
+    Returns (bars, actions) where bars has the BAR_COLUMNS (split-adjusted by Yahoo)
+    and actions has the ACTION_COLUMNS.
+    """
+    import yfinance as yf
+
+    ticker = yf.Ticker(symbol)
+    bars = ticker.history(start=start_date, end=end_date, auto_adjust=False, actions=False)
+
+    actions = []
+    history = ticker.actions
+    if history is not None and not history.empty:
+        history = history.copy()
+        history.index = _naive_dates(history.index)
+        for date, row in history.iterrows():
+            if row.get("Stock Splits", 0):
+                actions.append((date, SPLIT, float(row["Stock Splits"])))
+            if row.get("Dividends", 0):
+                actions.append((date, DIVIDEND, float(row["Dividends"])))
+
+    if bars is None or bars.empty:
+        bars = empty_bars()
+    else:
+        bars = bars[BAR_COLUMNS].copy()
+        bars.index = _naive_dates(bars.index)
+
+    return bars, pd.DataFrame(actions, columns=ACTION_COLUMNS)
+
+
+def empty_bars():
+    # Empty bar frame with a DatetimeIndex, so date filters work on it like on any other
+    return pd.DataFrame(columns=BAR_COLUMNS, index=pd.DatetimeIndex([]), dtype=float)
+
+
+def _naive_dates(index):
+    # Yahoo returns exchange-local timestamps; the store works with plain session dates
+    index = pd.DatetimeIndex(index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    return index.normalize()
+
+
+class PriceStore:
+    """
+    Raw price bars plus corporate actions per symbol, persisted as one pickle per symbol.
+    """
+
+    def __init__(self, directory=DEFAULT_STORE_DIR, fetcher=fetch_yahoo_history):
+        self.directory = directory
+        self.fetcher = fetcher
+        self._entries = {}   # symbol -> {"prices", "actions", "coverage"}
+        self._factors = {}   # symbol -> (price_factor, split_factor) cache
+        os.makedirs(self.directory, exist_ok=True)
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+    def _path(self, symbol):
+        return os.path.join(self.directory, f"{symbol.upper()}.pkl")
+
+    def _entry(self, symbol):
+        symbol = symbol.upper()
+        if symbol not in self._entries:
+            path = self._path(symbol)
+            if os.path.exists(path):
+                self._entries[symbol] = pd.read_pickle(path)
+            else:
+                self._entries[symbol] = {
+                    "prices": empty_bars(),
+                    "actions": pd.DataFrame(columns=ACTION_COLUMNS),
+                    "coverage": None,
+                }
+        return self._entries[symbol]
+
+    def _save(self, symbol):
+        pd.to_pickle(self._entry(symbol), self._path(symbol))
+
+    def symbols(self):
+        """
+        List every symbol that has data in the store.
+        """
+        return sorted(name[:-4] for name in os.listdir(self.directory) if name.endswith(".pkl"))
+
+    def forget(self, symbol):
+        """
+        Drop a symbol from the in-memory cache (the on-disk copy is kept).
+        """
+        symbol = symbol.upper()
+        self._entries.pop(symbol, None)
+        self._factors.pop(symbol, None)
+
+    # ------------------------------------------------------------------
+    # Raw data and corporate actions
+    # ------------------------------------------------------------------
+    def raw_prices(self, symbol):
+        return self._entry(symbol)["prices"]
+
+    def corporate_actions(self, symbol):
+        return self._entry(symbol)["actions"]
+
+    def add_raw_prices(self, symbol, bars):
+        """
+        Merge raw bars into the store. Newer rows replace existing rows for the same date.
+        """
+        entry = self._entry(symbol)
+        bars = bars[BAR_COLUMNS].astype(float)
+        prices = pd.concat([entry["prices"], bars])
+        entry["prices"] = prices[~prices.index.duplicated(keep="last")].sort_index()
+        self._factors.pop(symbol.upper(), None)
+
+    def add_corporate_actions(self, symbol, actions):
+        """
+        Add splits/dividends to the actions table. Returns True if anything new was added,
+        in which case the cached adjustment factors are invalidated.
+        """
+        entry = self._entry(symbol)
+        if actions.empty:
+            return False
+
+        merged = pd.concat([entry["actions"], actions[ACTION_COLUMNS]], ignore_index=True)
+        merged["Date"] = pd.to_datetime(merged["Date"])
+        merged["Value"] = merged["Value"].astype(float)
+        merged = merged.drop_duplicates(subset=["Date", "Type"], keep="last")
+        merged = merged.sort_values("Date").reset_index(drop=True)
+
+        changed = len(merged) != len(entry["actions"]) or not merged.equals(entry["actions"])
+        entry["actions"] = merged
+        if changed:
+            self._factors.pop(symbol.upper(), None)
+        return changed
+
+    # ------------------------------------------------------------------
+    # Adjustment
+    # ------------------------------------------------------------------
+    def adjustment_factors(self, symbol):
+        """
+        Cumulative adjustment factors for every stored bar.
+
+        Returns (price_factor, split_factor) arrays aligned with raw_prices(symbol).
+        Each action contributes a factor to all bars before its ex-date, and the
+        cumulative factor of a bar is the product of all later actions, computed with
+        a single reversed cumulative product.
+        """
+        symbol = symbol.upper()
+        if symbol in self._factors:
+            return self._factors[symbol]
+
+        prices = self.raw_prices(symbol)
+        actions = self.corporate_actions(symbol)
+        n = len(prices)
+
+        # Per-position event factors; an event at position p applies to bars [0, p)
+        price_events = np.ones(n + 1)
+        split_events = np.ones(n + 1)
+
+        if n and not actions.empty:
+            dates = prices.index.values
+            positions = np.searchsorted(dates, pd.to_datetime(actions["Date"]).values, side="left")
+            values = actions["Value"].to_numpy(dtype=float)
+            is_split = (actions["Type"] == SPLIT).to_numpy()
+
+            # Splits: prices before the ex-date are divided by the split ratio
+            split_pos = positions[is_split]
+            np.multiply.at(split_events, split_pos, 1.0 / values[is_split])
+
+            # Dividends: prices before the ex-date are scaled by (1 - dividend / previous close)
+            div_pos = positions[~is_split]
+            valid = div_pos > 0
+            closes = prices["Close"].to_numpy(dtype=float)
+            prev_close = closes[div_pos[valid] - 1]
+            div_factor = 1.0 - values[~is_split][valid] / prev_close
+            np.multiply.at(price_events, div_pos[valid], div_factor)
+            price_events *= split_events
+
+        # factor[i] = product of events at positions > i
+        price_factor = np.cumprod(price_events[::-1])[::-1][1:]
+        split_factor = np.cumprod(split_events[::-1])[::-1][1:]
+
+        self._factors[symbol] = (price_factor, split_factor)
+        return self._factors[symbol]
+
+    def adjusted_prices(self, symbol, start_date=None, end_date=None):
+        """
+        Split- and dividend-adjusted bars for a symbol, optionally limited to a date range
+        (end date exclusive, matching yfinance).
+        """
+        prices = self.raw_prices(symbol)
+        if prices.empty:
+            return empty_bars()
+        price_factor, split_factor = self.adjustment_factors(symbol)
+
+        adjusted = prices.copy()
+        adjusted[PRICE_COLUMNS] = prices[PRICE_COLUMNS].to_numpy() * price_factor[:, None]
+        adjusted["Volume"] = prices["Volume"].to_numpy() / split_factor
+
+        if start_date is not None:
+            adjusted = adjusted[adjusted.index >= pd.Timestamp(start_date)]
+        if end_date is not None:
+            adjusted = adjusted[adjusted.index < pd.Timestamp(end_date)]
+        return adjusted
+
+    def adjusted_close_volume(self, symbol, start_date, end_date):
+        """
+        Fast path for bulk scans: adjusted closes and volumes in [start_date, end_date)
+        as plain arrays (dates, close, volume), without building a DataFrame.
+        """
+        prices = self.raw_prices(symbol)
+        price_factor, split_factor = self.adjustment_factors(symbol)
+
+        dates = prices.index.values
+        lo = np.searchsorted(dates, np.datetime64(pd.Timestamp(start_date)), side="left")
+        hi = np.searchsorted(dates, np.datetime64(pd.Timestamp(end_date)), side="left")
+        close = prices["Close"].to_numpy(dtype=float)[lo:hi] * price_factor[lo:hi]
+        volume = prices["Volume"].to_numpy(dtype=float)[lo:hi] / split_factor[lo:hi]
+        return dates[lo:hi], close, volume
+
+    # ------------------------------------------------------------------
+    # Fetching
+    # ------------------------------------------------------------------
+    def _missing_ranges(self, symbol, first, last):
+        # Session ranges [first, last] (inclusive) that are not covered by the store yet
+        coverage = self._entry(symbol)["coverage"]
+        if coverage is None:
+            return [(first, last)]
+
+        covered_first, covered_last = coverage
+        missing = []
+        if first < covered_first:
+            missing.append((first, covered_first - timedelta(days=1)))
+        if last > covered_last:
+            missing.append((covered_last + timedelta(days=1), last))
+        return missing
+
+    def update(self, symbol, start_date, end_date):
+        """
+        Download only the trading sessions of [start_date, end_date) that are not in the
+        store yet. Ranges are normalized to sessions first, so weekends and holidays at
+        either end never trigger a download. Returns True if any bars were received.
+        """
+        symbol = symbol.upper()
+        today = pd.Timestamp(datetime.now().date())
+        end = min(pd.Timestamp(end_date).normalize(), today + timedelta(days=1))
+        first, last = normalize_range(start_date, end - timedelta(days=1))
+        if first is None:
+            return False
+        first, last = pd.Timestamp(first), pd.Timestamp(last)
+
+        missing = self._missing_ranges(symbol, first, last)
+        if not missing:
+            return False
+
+        entry = self._entry(symbol)
+        received = []
+        for range_start, range_end in missing:
+            # yfinance treats the end date as exclusive
+            bars, actions = self.fetcher(symbol, range_start.strftime('%Y-%m-%d'),
+                                         (range_end + timedelta(days=1)).strftime('%Y-%m-%d'))
+            self.add_corporate_actions(symbol, self._unadjust_dividends(actions))
+            if not bars.empty:
+                self.add_raw_prices(symbol, self._unadjust_splits(bars, entry["actions"]))
+                dates = bars.index[(bars.index >= range_start) & (bars.index <= range_end)]
+                if len(dates):
+                    received.append((dates.min(), dates.max()))
+
+        # Nothing came back (unknown symbol, outage, rate limit): leave coverage alone so the
+        # range is asked for again next time, and do not write a file without bars
+        if not received:
+            return False
+
+        # Coverage only grows by the sessions bars were actually received for, and today's
+        # session is not final, so it is never marked as covered
+        received_first = min(start for start, _ in received)
+        received_last = max(end for _, end in received)
+        final_last = pd.Timestamp(previous_session(today - timedelta(days=1)))
+        received_last = min(received_last, final_last)
+        if received_last >= received_first:
+            if entry["coverage"] is None:
+                entry["coverage"] = (received_first, received_last)
+            else:
+                entry["coverage"] = (min(received_first, entry["coverage"][0]),
+                                     max(received_last, entry["coverage"][1]))
+
+        self._save(symbol)
+        return True
+
+    @staticmethod
+    def _split_ratios_after(dates, actions):
+        # Product of the split ratios with an ex-date after each of the given dates
+        splits = actions[actions["Type"] == SPLIT]
+        events = np.ones(len(dates) + 1)
+        if not splits.empty:
+            positions = np.searchsorted(dates, pd.to_datetime(splits["Date"]).values, side="left")
+            np.multiply.at(events, positions, splits["Value"].to_numpy(dtype=float))
+        return np.cumprod(events[::-1])[::-1][1:]
+
+    @classmethod
+    def _unadjust_dividends(cls, actions):
+        """
+        Yahoo reports dividends per current share; convert them to the amount paid per
+        share at the time so they match the raw prices.
+        """
+        if actions.empty:
+            return actions
+
+        actions = actions.sort_values("Date").reset_index(drop=True)
+        dates = pd.to_datetime(actions["Date"]).values
+        # Splits on the same day as a dividend do not apply to it
+        ratio = cls._split_ratios_after(dates, actions)
+        is_dividend = (actions["Type"] == DIVIDEND).to_numpy()
+        actions.loc[is_dividend, "Value"] = actions.loc[is_dividend, "Value"].to_numpy(dtype=float) * ratio[is_dividend]
+        return actions
+
+    @classmethod
+    def _unadjust_splits(cls, bars, actions):
+        """
+        Undo the split adjustment Yahoo applies to downloaded bars, using the splits known
+        at download time, so that the stored bars are true raw prices.
+        """
+        if not (actions["Type"] == SPLIT).any():
+            return bars
+
+        ratio = cls._split_ratios_after(bars.index.values, actions)
+        raw = bars.copy()
+        raw[PRICE_COLUMNS] = bars[PRICE_COLUMNS].to_numpy() * ratio[:, None]
+        raw["Volume"] = bars["Volume"].to_numpy() / ratio
+        return raw
+
+    def gaps(self, symbol, start_date=None, end_date=None):
+        """
+        Trading sessions inside the covered range that have no stored bar
+        (e.g. trading halts or incomplete downloads).
+        """
+        coverage = self._entry(symbol)["coverage"]
+        if coverage is None:
+            return pd.DatetimeIndex([])
+        start = max(pd.Timestamp(start_date), coverage[0]) if start_date is not None else coverage[0]
+        end = min(pd.Timestamp(end_date), coverage[1]) if end_date is not None else coverage[1]
+        return missing_sessions(self.raw_prices(symbol).index, start, end)
+
+    def get_prices(self, symbol, start_date, end_date):
+        """
+        Adjusted bars for the range, fetching only what is missing from the store.
+        """
+        self.update(symbol, start_date, end_date)
+        return self.adjusted_prices(symbol, start_date, end_date)
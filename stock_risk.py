@@ -0,0 +1,263 @@
+"""
+Value-at-Risk (VaR) and Expected Shortfall (ES) calculations for the NASDAQ Stock Analyzer.
+
+Three estimators are provided for a series of simple returns:
+- Historical: empirical quantile of the observed returns
+- Parametric: normal distribution fitted with stats.norm.fit (as in the Return Distribution chart)
+- Monte Carlo: simulated returns drawn in fixed-size chunks so that memory stays bounded
+  even for millions of scenarios, optionally spread over several worker processes
+
+Losses are reported as positive fractions (0.025 means a 2.5% loss).
+The module can be used from the GUI or headlessly for a whole watchlist:
+
+    python stock_risk.py AAPL MSFT NVDA --start 2024-01-01 --confidence 0.95 0.99
+"""
+import argparse
+import math
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+# Defaults used by the GUI chart and the command line
+DEFAULT_CONFIDENCE_LEVELS = (0.95, 0.99)
+DEFAULT_SCENARIOS = 1_000_000
+DEFAULT_CHUNK_SIZE = 100_000
+
+RISK_METHODS = ("Historical", "Parametric", "Monte Carlo")
+
+
+def check_confidence_levels(confidence_levels):
+    """
+    Raise ValueError unless every confidence level is a fraction strictly between 0 and 1
+    (0.95, not 95).
+    """
+    confidence_levels = list(confidence_levels)
+    if not confidence_levels:
+        raise ValueError("At least one confidence level is required")
+    for confidence in confidence_levels:
+        if not 0 < confidence < 1:
+            raise ValueError(f"Confidence level must be between 0 and 1 (exclusive), got {confidence}")
+    return confidence_levels
+
+
+def confidence_level(text):
+    """
+    argparse type for a confidence level, e.g. "0.99".
+    """
+    try:
+        return check_confidence_levels([float(text)])[0]
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def daily_returns(prices):
+    """
+    Convert a price series into an array of simple returns, dropping missing values.
+    """
+    prices = pd.Series(np.asarray(prices, dtype=float).ravel())
+    return prices.pct_change().dropna().to_numpy()
+
+
+def historical_var_es(returns, confidence):
+    """
+    Historical VaR and ES taken directly from the empirical return distribution.
+    """
+    returns = np.asarray(returns, dtype=float)
+    cutoff = np.quantile(returns, 1 - confidence)
+    tail = returns[returns <= cutoff]
+    es = -tail.mean() if tail.size else -cutoff
+    return -cutoff, es
+
+
+def parametric_var_es(returns, confidence):
+    """
+    VaR and ES under a normal distribution fitted to the returns.
+    """
+    mu, std = stats.norm.fit(np.asarray(returns, dtype=float))
+    z = stats.norm.ppf(1 - confidence)
+    var = -(mu + z * std)
+    es = -(mu - std * stats.norm.pdf(z) / (1 - confidence))
+    return var, es
+
+
+def _tail_size(n_scenarios, confidence):
+    # Number of worst scenarios needed to estimate VaR/ES at this confidence level
+    return max(1, int(math.ceil((1 - confidence) * n_scenarios)))
+
+
+def _simulate_tail(job):
+    """
+    Simulate one share of the Monte Carlo scenarios chunk by chunk and keep only the
+    worst `tail_size` returns, so memory is bounded by chunk_size + tail_size.
+    Runs in a worker process when Monte Carlo execution is parallel.
+    """
+    mu, std, sample, n_scenarios, chunk_size, tail_size, seed = job
+    rng = np.random.default_rng(seed)
+    tail = np.empty(0)
+    remaining = n_scenarios
+
+    while remaining > 0:
+        size = min(chunk_size, remaining)
+        if sample is None:
+            draws = rng.normal(mu, std, size)
+        else:
+            # Bootstrap: resample observed returns with replacement
+            draws = sample[rng.integers(0, sample.size, size)]
+
+        candidates = np.concatenate((tail, draws))
+        if candidates.size > tail_size:
+            candidates = np.partition(candidates, tail_size - 1)[:tail_size]
+        tail = candidates
+        remaining -= size
+
+    return tail
+
+
+def monte_carlo_var_es(returns, confidence_levels=DEFAULT_CONFIDENCE_LEVELS,
+                       n_scenarios=DEFAULT_SCENARIOS, chunk_size=DEFAULT_CHUNK_SIZE,
+                       method="normal", workers=None, seed=None):
+    """
+    Monte Carlo VaR and ES for several confidence levels from a single simulation.
+
+    method="normal" draws from a normal distribution fitted to the returns,
+    method="bootstrap" resamples the observed returns.
+    workers > 1 splits the scenarios across that many processes.
+    Returns a dictionary mapping each confidence level to a (VaR, ES) tuple.
+    """
+    returns = np.asarray(returns, dtype=float)
+    confidence_levels = check_confidence_levels(confidence_levels)
+    if method not in ("normal", "bootstrap"):
+        raise ValueError(f"Unknown Monte Carlo method: {method}")
+
+    mu, std = stats.norm.fit(returns)
+    sample = returns if method == "bootstrap" else None
+
+    # Keep enough of the tail for the lowest confidence level; higher levels are a subset
+    tail_size = _tail_size(n_scenarios, min(confidence_levels))
+
+    # Split the scenarios into one job per worker, each with an independent random stream
+    n_jobs = max(1, int(workers or 1))
+    shares = [n_scenarios // n_jobs + (1 if i < n_scenarios % n_jobs else 0) for i in range(n_jobs)]
+    seeds = np.random.SeedSequence(seed).spawn(n_jobs)
+    jobs = [(mu, std, sample, share, chunk_size, min(tail_size, share), job_seed)
+            for share, job_seed in zip(shares, seeds) if share > 0]
+
+    if n_jobs > 1:
+        with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+            tails = list(executor.map(_simulate_tail, jobs))
+    else:
+        tails = [_simulate_tail(job) for job in jobs]
+
+    # Merge the per-worker tails and keep the overall worst scenarios in ascending order
+    tail = np.concatenate(tails)
+    if tail.size > tail_size:
+        tail = np.partition(tail, tail_size - 1)[:tail_size]
+    tail.sort()
+
+    results = {}
+    for confidence in confidence_levels:
+        k = min(_tail_size(n_scenarios, confidence), tail.size)
+        results[confidence] = (float(-tail[k - 1]), float(-tail[:k].mean()))
+    return results
+
+
+def compute_risk_metrics(returns, confidence_levels=DEFAULT_CONFIDENCE_LEVELS,
+                         n_scenarios=DEFAULT_SCENARIOS, chunk_size=DEFAULT_CHUNK_SIZE,
+                         mc_method="normal", workers=None, seed=None):
+    """
+    Compute VaR and ES with all three methods.
+    Returns a DataFrame with columns Confidence, Method, VaR and ES.
+    """
+    confidence_levels = check_confidence_levels(confidence_levels)
+    returns = np.asarray(returns, dtype=float)
+    returns = returns[np.isfinite(returns)]
+    if returns.size < 2:
+        raise ValueError("At least two returns are required for risk calculations")
+
+    monte_carlo = monte_carlo_var_es(returns, confidence_levels, n_scenarios, chunk_size,
+                                     method=mc_method, workers=workers, seed=seed)
+
+    rows = []
+    for confidence in confidence_levels:
+        estimates = {
+            "Historical": historical_var_es(returns, confidence),
+            "Parametric": parametric_var_es(returns, confidence),
+            "Monte Carlo": monte_carlo[confidence],
+        }
+        for method in RISK_METHODS:
+            var, es = estimates[method]
+            rows.append({"Confidence": confidence, "Method": method, "VaR": var, "ES": es})
+
+    return pd.DataFrame(rows, columns=["Confidence", "Method", "VaR", "ES"])
+
+
+def watchlist_risk(symbols, start_date, end_date, confidence_levels=DEFAULT_CONFIDENCE_LEVELS,
+                   n_scenarios=DEFAULT_SCENARIOS, chunk_size=DEFAULT_CHUNK_SIZE,
+                   mc_method="normal", workers=None, seed=None, store=None):
+    """
+    Compute risk metrics for each symbol of a watchlist from adjusted closing prices.
+    Prices come from the local price store, which only downloads missing dates.
+    Symbols without enough data are reported with NaN values.
+    """
+    from stock_price_store import PriceStore
+
+    store = store or PriceStore()
+    # Invalid levels are a usage error, not something to report as NaN for every symbol
+    confidence_levels = check_confidence_levels(confidence_levels)
+
+    frames = []
+    for symbol in symbols:
+        symbol = symbol.upper()
+        try:
+            prices = store.get_prices(symbol, start_date, end_date)["Close"]
+            metrics = compute_risk_metrics(daily_returns(prices), confidence_levels, n_scenarios,
+                                           chunk_size, mc_method, workers, seed)
+        except Exception as e:
+            print(f"Skipping {symbol}: {e}")
+            metrics = pd.DataFrame([{"Confidence": c, "Method": m, "VaR": np.nan, "ES": np.nan}
+                                    for c in confidence_levels for m in RISK_METHODS])
+        metrics.insert(0, "Symbol", symbol)
+        frames.append(metrics)
+
+    return pd.concat(frames, ignore_index=True)
+
+
+def main():
+    """
+    Command line entry point for headless watchlist risk reports.
+    """
+    parser = argparse.ArgumentParser(description="Value-at-Risk and Expected Shortfall for a watchlist")
+    parser.add_argument("symbols", nargs="+", help="Stock symbols, e.g. AAPL MSFT")
+    parser.add_argument("--start", default=(datetime.now() - timedelta(days=365)).strftime('%Y-%m-%d'),
+                        help="Start date (YYYY-MM-DD), defaults to one year ago")
+    parser.add_argument("--end", default=datetime.now().strftime('%Y-%m-%d'),
+                        help="End date (YYYY-MM-DD), defaults to today")
+    parser.add_argument("--confidence", type=confidence_level, nargs="+", default=list(DEFAULT_CONFIDENCE_LEVELS),
+                        help="Confidence levels, e.g. 0.95 0.99")
+    parser.add_argument("--scenarios", type=int, default=DEFAULT_SCENARIOS,
+                        help="Number of Monte Carlo scenarios")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help="Monte Carlo scenarios drawn per batch")
+    parser.add_argument("--method", choices=["normal", "bootstrap"], default="normal",
+                        help="Monte Carlo sampling method")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Number of processes for the Monte Carlo simulation")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed for reproducible results")
+    parser.add_argument("--output", help="Optional CSV file to write the results to")
+    args = parser.parse_args()
+
+    report = watchlist_risk(args.symbols, args.start, args.end, args.confidence, args.scenarios,
+                            args.chunk_size, args.method, args.workers, args.seed)
+
+    if args.output:
+        report.to_csv(args.output, index=False)
+    else:
+        with pd.option_context("display.max_rows", None, "display.float_format", "{:.4%}".format):
+            print(report.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,340 @@
+"""
+Stock screener for the NASDAQ Stock Analyzer.
+
+Loads the whole universe of symbols in the local price store, stacks their closing
+prices and volumes into (sessions x symbols) arrays aligned on the trading calendar,
+loading blocks of symbols in worker processes, and evaluates a metric pipeline
+column-wise on the whole stacked universe:
+- return_<N>d: percentage return over the last N sessions
+- volatility: annualized volatility of daily returns over 21 sessions (as in the Volatility chart)
+- volume_surge: last volume relative to its 20-day moving average (as in Volume Analysis)
+- dist_ma200: percentage distance of the last close from the 200-day moving average
+  (as in Moving Averages)
+
+Results can be filtered and sorted, shown in a sortable Tk table, or printed headlessly:
+
+    python stock_screener.py --filter "volume_surge > 2" --filter "dist_ma200 > 0" --sort return_20d
+"""
+import argparse
+import operator
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from stock_calendar import sessions_between
+from stock_price_store import PriceStore
+
+DEFAULT_RETURN_DAYS = (5, 20, 60)
+VOLATILITY_WINDOW = 21   # Approximately one month of trading days
+VOLUME_MA_WINDOW = 20
+LONG_MA_WINDOW = 200
+# Sessions loaded per symbol; enough for the 200-day moving average plus returns
+LOOKBACK_SESSIONS = 260
+
+# Below this many symbols the process start-up cost outweighs the parallel speed-up
+MIN_SYMBOLS_PER_WORKER = 250
+
+FILTER_OPERATORS = {
+    ">": operator.gt,
+    ">=": operator.ge,
+    "<": operator.lt,
+    "<=": operator.le,
+    "==": operator.eq,
+}
+
+
+def metric_names(return_days=DEFAULT_RETURN_DAYS):
+    return [f"return_{days}d" for days in return_days] + ["volatility", "volume_surge", "dist_ma200"]
+
+
+def screening_sessions(end_date=None, lookback=LOOKBACK_SESSIONS):
+    """
+    The last `lookback` trading sessions up to end_date (defaults to today).
+    """
+    end = pd.Timestamp(end_date or datetime.now()).normalize()
+    # Calendar days are a generous upper bound for the number of sessions needed
+    return sessions_between(end - timedelta(days=int(lookback * 1.6)), end)[-lookback:]
+
+
+def load_universe(store, symbols, sessions):
+    """
+    Stack the stored adjusted closes and volumes of many symbols into two
+    (sessions x symbols) float arrays aligned on the trading calendar.
+    Missing sessions are NaN. Returns (close, volume).
+    """
+    close = np.full((len(sessions), len(symbols)), np.nan)
+    volume = np.full((len(sessions), len(symbols)), np.nan)
+    session_days = sessions.values
+    end = sessions[-1] + timedelta(days=1)
+
+    for column, symbol in enumerate(symbols):
+        dates, symbol_close, symbol_volume = store.adjusted_close_volume(symbol, sessions[0], end)
+        # The store no longer needs the full history once the window is extracted
+        store.forget(symbol)
+        if not len(dates):
+            continue
+        rows = np.minimum(np.searchsorted(session_days, dates), len(sessions) - 1)
+        valid = session_days[rows] == dates
+        close[rows[valid], column] = symbol_close[valid]
+        volume[rows[valid], column] = symbol_volume[valid]
+
+    return close, volume
+
+
+def _trim_trailing_sessions(close, volume):
+    # Drop sessions at the end of the window that no symbol has data for yet
+    # (today's session is not in the store until it has closed)
+    has_data = ~(np.isnan(close).all(axis=1) & np.isnan(volume).all(axis=1))
+    last = np.flatnonzero(has_data)
+    end = last[-1] + 1 if len(last) else 0
+    return close[:end], volume[:end]
+
+
+def _last_valid(values):
+    # Last non-NaN value of each column (NaN for columns without any)
+    valid = ~np.isnan(values)
+    rows = values.shape[0] - 1 - np.argmax(valid[::-1], axis=0)
+    last = values[rows, np.arange(values.shape[1])]
+    return np.where(valid.any(axis=0), last, np.nan)
+
+
+def _forward_fill(values):
+    # Forward fill NaNs down each column (carry the last known close over missing sessions)
+    mask = np.isnan(values)
+    index = np.where(~mask, np.arange(values.shape[0])[:, None], 0)
+    np.maximum.accumulate(index, axis=0, out=index)
+    filled = values[index, np.arange(values.shape[1])]
+    return filled
+
+
+def compute_metrics(close, volume, return_days=DEFAULT_RETURN_DAYS):
+    """
+    Evaluate every metric for a block of symbols at once.
+    close and volume are (sessions x symbols) arrays; returns a dict of 1-D arrays.
+    The window ends at the last session with stored data, so a session that has not been
+    stored yet (today's) does not shift the returns or blank the volume surge.
+    """
+    close, volume = _trim_trailing_sessions(close, volume)
+    if not len(close):
+        return {name: np.full(close.shape[1], np.nan) for name in metric_names(return_days)}
+    close = _forward_fill(close)
+    last = close[-1]
+    metrics = {}
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for days in return_days:
+            if days < len(close):
+                metrics[f"return_{days}d"] = (last / close[-1 - days] - 1) * 100
+            else:
+                metrics[f"return_{days}d"] = np.full(close.shape[1], np.nan)
+
+        daily = close[1:] / close[:-1] - 1
+        metrics["volatility"] = np.nanstd(daily[-VOLATILITY_WINDOW:], axis=0, ddof=1) * np.sqrt(252) * 100
+
+        volume_ma = np.nanmean(volume[-VOLUME_MA_WINDOW:], axis=0)
+        # A symbol missing the last session is compared on its latest stored volume
+        metrics["volume_surge"] = _last_valid(volume) / volume_ma
+
+        long_ma = np.nanmean(close[-LONG_MA_WINDOW:], axis=0)
+        # Require a full window, like the rolling 200-day moving average does
+        enough = np.count_nonzero(~np.isnan(close[-LONG_MA_WINDOW:]), axis=0) >= LONG_MA_WINDOW
+        metrics["dist_ma200"] = np.where(enough, (last / long_ma - 1) * 100, np.nan)
+
+    return metrics
+
+
+def _load_block(job):
+    # Worker process entry point: load one block of symbols from the store
+    directory, symbols, sessions = job
+    return load_universe(PriceStore(directory), symbols, sessions)
+
+
+def parse_filter(expression):
+    """
+    Parse a filter such as "return_20d > 5" into (metric, operator, value).
+    """
+    match = re.fullmatch(r"\s*(\w+)\s*(>=|<=|==|>|<)\s*(-?[\d.]+)\s*", expression)
+    if not match:
+        raise ValueError(f"Invalid filter: {expression!r} (expected e.g. 'volume_surge > 2')")
+    return match.group(1), match.group(2), float(match.group(3))
+
+
+def screen(store=None, filters=(), sort_by=None, ascending=False, symbols=None,
+           return_days=DEFAULT_RETURN_DAYS, workers=None, end_date=None):
+    """
+    Run the metric pipeline over the universe and return a DataFrame indexed by symbol.
+
+    filters is a list of (metric, operator, value) tuples or strings like "dist_ma200 > 0".
+    Blocks of symbols are loaded in `workers` processes (defaults to the CPU count); the
+    metrics are then evaluated once on the stacked universe, so every symbol is measured
+    over the same window, ending at the last session any symbol has stored.
+    Market indices in the store (e.g. ^GSPC, kept for the correlation chart) are not screened.
+    """
+    store = store or PriceStore()
+    symbols = list(symbols or [symbol for symbol in store.symbols() if not symbol.startswith("^")])
+    if not symbols:
+        return pd.DataFrame(columns=metric_names(return_days))
+    sessions = screening_sessions(end_date)
+
+    # Reading the pickles is the slow part, so each worker loads its own block of symbols
+    # and only the (sessions x block) arrays travel back
+    workers = workers or os.cpu_count() or 1
+    workers = max(1, min(workers, len(symbols) // MIN_SYMBOLS_PER_WORKER))
+    blocks = [list(block) for block in np.array_split(np.array(symbols, dtype=object), workers)]
+    jobs = [(store.directory, block, sessions) for block in blocks]
+
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            parts = list(executor.map(_load_block, jobs))
+    else:
+        parts = [_load_block(job) for job in jobs]
+
+    # Trailing sessions are trimmed over the whole universe, not per block, so a block
+    # that happens to lack the latest session is not measured over an older window
+    close = np.concatenate([part[0] for part in parts], axis=1)
+    volume = np.concatenate([part[1] for part in parts], axis=1)
+    metrics = compute_metrics(close, volume, return_days)
+    results = pd.DataFrame({name: metrics[name] for name in metric_names(return_days)},
+                           index=pd.Index(symbols, name="Symbol"))
+
+    for condition in filters:
+        metric, op, value = parse_filter(condition) if isinstance(condition, str) else condition
+        if metric not in results.columns:
+            raise ValueError(f"Unknown metric: {metric}")
+        results = results[FILTER_OPERATORS[op](results[metric], value)]
+
+    if sort_by:
+        results = results.sort_values(sort_by, ascending=ascending, na_position="last")
+    return results
+
+
+class ScreenerWindow:
+    """
+    Tk window to run the screener and browse the results in a sortable table.
+    Double-clicking a row calls on_select(symbol).
+    """
+
+    def __init__(self, parent, store=None, on_select=None):
+        import tkinter as tk
+        from tkinter import ttk
+
+        self.tk = tk
+        self.store = store
+        self.on_select = on_select
+        self.results = None
+        self.sort_column = None
+        self.sort_ascending = False
+
+        self.window = tk.Toplevel(parent)
+        self.window.title("Stock Screener")
+        self.window.geometry("800x500")
+        self.window.configure(bg="white")
+
+        # Filter entry and run button
+        controls = tk.Frame(self.window, bg="white", pady=5)
+        controls.pack(fill="x", padx=10)
+        tk.Label(controls, text="Filters (comma separated):", bg="white").pack(side="left")
+        self.filter_entry = tk.Entry(controls, width=50)
+        self.filter_entry.insert(0, "volume_surge > 1.5, dist_ma200 > 0")
+        self.filter_entry.pack(side="left", padx=5)
+        tk.Button(controls, text="Run", command=self.run, bg="#4CAF50", fg="blue", padx=10).pack(side="left")
+
+        self.status_label = tk.Label(self.window, text="", bg="white", anchor="w")
+        self.status_label.pack(fill="x", padx=10)
+
+        # Results table
+        columns = ["Symbol"] + metric_names()
+        table_frame = tk.Frame(self.window)
+        table_frame.pack(fill="both", expand=True, padx=10, pady=10)
+        self.table = ttk.Treeview(table_frame, columns=columns, show="headings")
+        for column in columns:
+            self.table.heading(column, text=column, command=lambda c=column: self.sort_by(c))
+            self.table.column(column, width=90, anchor="e" if column != "Symbol" else "w")
+        scrollbar = ttk.Scrollbar(table_frame, orient="vertical", command=self.table.yview)
+        self.table.configure(yscrollcommand=scrollbar.set)
+        self.table.pack(side="left", fill="both", expand=True)
+        scrollbar.pack(side="right", fill="y")
+        self.table.bind("<Double-1>", self.select_row)
+
+    def run(self):
+        filters = [f for f in self.filter_entry.get().split(",") if f.strip()]
+        self.status_label.config(text="Screening...")
+        self.window.update()
+        try:
+            started = datetime.now()
+            self.results = screen(self.store, filters)
+            elapsed = (datetime.now() - started).total_seconds()
+            self.status_label.config(text=f"{len(self.results)} symbols matched ({elapsed:.1f}s)")
+            self.populate()
+        except Exception as e:
+            self.status_label.config(text=f"Error: {str(e)}")
+
+    def populate(self):
+        self.table.delete(*self.table.get_children())
+        if self.results is None:
+            return
+        for symbol, row in self.results.iterrows():
+            values = [symbol] + ["" if pd.isna(v) else f"{v:.2f}" for v in row]
+            self.table.insert("", "end", iid=symbol, values=values)
+
+    def sort_by(self, column):
+        if self.results is None:
+            return
+        # Clicking the same heading again reverses the order
+        self.sort_ascending = not self.sort_ascending if column == self.sort_column else False
+        self.sort_column = column
+        if column == "Symbol":
+            self.results = self.results.sort_index(ascending=self.sort_ascending)
+        else:
+            self.results = self.results.sort_values(column, ascending=self.sort_ascending, na_position="last")
+        self.populate()
+
+    def select_row(self, event=None):
+        selection = self.table.selection()
+        if selection and self.on_select:
+            self.on_select(selection[0])
+
+
+def main():
+    """
+    Command line entry point: fill the price store and/or print screener results.
+    """
+    parser = argparse.ArgumentParser(description="Screen the local price store by computed metrics")
+    parser.add_argument("--filter", action="append", default=[],
+                        help="Filter such as 'return_20d > 5' (can be repeated)")
+    parser.add_argument("--sort", default=None, help="Metric to sort by (descending)")
+    parser.add_argument("--ascending", action="store_true", help="Sort ascending instead")
+    parser.add_argument("--workers", type=int, default=None, help="Number of worker processes")
+    parser.add_argument("--update", metavar="SYMBOLS_FILE",
+                        help="Download the last year of prices for the symbols listed in this file first")
+    parser.add_argument("--limit", type=int, default=50, help="Number of rows to print")
+    args = parser.parse_args()
+
+    store = PriceStore()
+    if args.update:
+        with open(args.update, encoding="utf-8") as f:
+            symbols = [line.strip().upper() for line in f if line.strip()]
+        start = (datetime.now() - timedelta(days=400)).strftime('%Y-%m-%d')
+        end = (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d')
+        for symbol in symbols:
+            try:
+                store.update(symbol, start, end)
+                store.forget(symbol)
+            except Exception as e:
+                print(f"Skipping {symbol}: {e}")
+
+    started = datetime.now()
+    results = screen(store, args.filter, args.sort, args.ascending, workers=args.workers)
+    elapsed = (datetime.now() - started).total_seconds()
+
+    with pd.option_context("display.max_rows", None, "display.float_format", "{:.2f}".format):
+        print(results.head(args.limit).to_string())
+    print(f"\n{len(results)} symbols matched in {elapsed:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""
+Sentiment vs price overlay for the NASDAQ Stock Analyzer.
+
+Joins the daily sentiment index kept by the Stock Sentiment app (sentiment_store.py)
+with the daily returns of the adjusted prices in the local price store:
+- both series are sorted by date, so they are joined with a single merge pass over the
+  two date arrays instead of looking each day up in the other series
+- news from a weekend or holiday counts towards the next trading session, since that
+  is the first return it can move (days merged into one session are weighted by their
+  number of articles)
+- cross-correlations between sentiment and returns are computed for every lag at once,
+  from a (lags x sessions) matrix of shifted returns
+
+A positive lag k correlates the sentiment of a session with the return k sessions
+later (sentiment leading price); a negative lag correlates it with earlier returns
+(news reacting to price moves).
+
+    python stock_sentiment_overlay.py AAPL --start 2025-01-01 --max-lag 5
+"""
+import argparse
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from stock_calendar import previous_session, to_day
+from stock_price_store import PriceStore
+
+DEFAULT_MAX_LAG = 5
+# Sentiment index columns that can be correlated with returns
+SENTIMENT_FIELDS = ("vader_compound", "textblob_polarity")
+DEFAULT_FIELD = "vader_compound"
+# Fewer overlapping sessions than this give no correlation for a lag
+MIN_OBSERVATIONS = 3
+# Two-sided 95% band of a correlation under no relationship: +/- 1.96 / sqrt(n)
+CONFIDENCE_Z = 1.96
+
+
+def _days(index):
+    # Days since 1970-01-01 of a DatetimeIndex, as a plain list for the merge loop
+    return pd.DatetimeIndex(index).values.astype("datetime64[D]").astype(np.int64).tolist()
+
+
+def merge_sentiment(prices, sentiment_index, field=DEFAULT_FIELD):
+    """
+    Align a daily sentiment index with daily prices in one pass over both date indexes.
+
+    Returns a DataFrame indexed by the trading sessions of `prices` with the Close, the
+    daily Return, the mean `field` sentiment of the articles counted towards each session
+    (NaN when there were none) and the number of those articles. News from before the
+    window is left out, except for the days since the session before the first one.
+    """
+    if field not in SENTIMENT_FIELDS:
+        raise ValueError(f"Unsupported sentiment field: {field} (use one of {', '.join(SENTIMENT_FIELDS)})")
+    prices = prices.sort_index()
+    sentiment_index = sentiment_index.sort_index()
+
+    sessions = _days(prices.index)
+    news_days = _days(sentiment_index.index)
+    scores = sentiment_index[field].to_numpy(dtype=float).tolist()
+    counts = sentiment_index["articles"].to_numpy(dtype=float).tolist()
+
+    totals = np.zeros(len(sessions))
+    articles = np.zeros(len(sessions))
+    # News up to the session before the window belongs to a return that was not loaded
+    before = previous_session(prices.index[0] - pd.Timedelta(days=1)) if sessions else None
+    first_day = to_day(before) + 1 if before is not None else (sessions[0] if sessions else 0)
+    i = 0
+    for day, score, count in zip(news_days, scores, counts):
+        if day < first_day:
+            continue
+        # First session on or after the news day; both lists only ever move forward
+        while i < len(sessions) and sessions[i] < day:
+            i += 1
+        if i == len(sessions):
+            break  # News after the last loaded session has no return yet
+        totals[i] += score * count
+        articles[i] += count
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        sentiment = np.where(articles > 0, totals / articles, np.nan)
+    return pd.DataFrame({
+        "Close": prices["Close"].to_numpy(dtype=float),
+        "Return": prices["Close"].pct_change().to_numpy(dtype=float),
+        "Sentiment": sentiment,
+        "Articles": articles.astype(int),
+    }, index=prices.index)
+
+
+def lagged_correlations(sentiment, returns, max_lag=DEFAULT_MAX_LAG):
+    """
+    Pearson correlation of sentiment[t] with returns[t + lag] for every lag in
+    [-max_lag, max_lag], computed over all lags at once. Sessions where either value is
+    missing are left out of that lag.
+
+    Returns a DataFrame indexed by lag with the correlation, the number of sessions it
+    is based on and the 95% band a correlation has to leave to be significant.
+    """
+    sentiment = np.asarray(sentiment, dtype=float)
+    returns = np.asarray(returns, dtype=float)
+    n = len(sentiment)
+    lags = np.arange(-max_lag, max_lag + 1)
+
+    # Row k holds the returns shifted by lags[k]; positions outside the series are NaN
+    padded = np.concatenate([np.full(max_lag, np.nan), returns, np.full(max_lag, np.nan)])
+    shifted = padded[np.arange(n)[None, :] + max_lag + lags[:, None]]
+    base = np.broadcast_to(sentiment, shifted.shape)
+
+    valid = np.isfinite(base) & np.isfinite(shifted)
+    observations = valid.sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean_s = np.where(valid, base, 0).sum(axis=1) / observations
+        mean_r = np.where(valid, shifted, 0).sum(axis=1) / observations
+        ds = np.where(valid, base - mean_s[:, None], 0)
+        dr = np.where(valid, shifted - mean_r[:, None], 0)
+        correlation = (ds * dr).sum(axis=1) / np.sqrt((ds ** 2).sum(axis=1) * (dr ** 2).sum(axis=1))
+        band = CONFIDENCE_Z / np.sqrt(observations)
+
+    correlation[(observations < MIN_OBSERVATIONS) | ~np.isfinite(correlation)] = np.nan
+    return pd.DataFrame({
+        "Correlation": correlation,
+        "Observations": observations,
+        "Band": band,
+    }, index=pd.Index(lags, name="Lag"))
+
+
+def sentiment_overlay(prices, sentiment_index, field=DEFAULT_FIELD, max_lag=DEFAULT_MAX_LAG):
+    """
+    Merged sessions and lagged correlations of a ticker's prices and sentiment index.
+    """
+    merged = merge_sentiment(prices, sentiment_index, field)
+    return merged, lagged_correlations(merged["Sentiment"], merged["Return"], max_lag)
+
+
+def load_sentiment_index(query, store=None):
+    """
+    Daily sentiment index stored by the Stock Sentiment app for a ticker or search term.
+    """
+    from sentiment_store import SentimentStore
+
+    return (store or SentimentStore()).sentiment_index(query, "D")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Correlate a ticker's stored news sentiment with its daily returns")
+    parser.add_argument("symbol", help="Stock symbol")
+    parser.add_argument("--query", help="Search term the sentiment history is stored under (default: the symbol)")
+    parser.add_argument("--start", default=(datetime.now() - timedelta(days=365)).strftime('%Y-%m-%d'),
+                        help="Start date (YYYY-MM-DD, default: one year ago)")
+    parser.add_argument("--end", default=datetime.now().strftime('%Y-%m-%d'), help="End date (YYYY-MM-DD)")
+    parser.add_argument("--field", choices=SENTIMENT_FIELDS, default=DEFAULT_FIELD, help="Sentiment score to use")
+    parser.add_argument("--max-lag", type=int, default=DEFAULT_MAX_LAG, help="Largest lag in sessions")
+    args = parser.parse_args()
+
+    sentiment_index = load_sentiment_index(args.query or args.symbol)
+    if sentiment_index.empty:
+        parser.error(f"no sentiment history stored for {args.query or args.symbol}")
+    # The end date is inclusive here but exclusive for downloads
+    end = (datetime.strptime(args.end, '%Y-%m-%d') + timedelta(days=1)).strftime('%Y-%m-%d')
+    prices = PriceStore().get_prices(args.symbol, args.start, end)
+    if prices.empty:
+        parser.error(f"no price data available for {args.symbol}")
+
+    merged, correlations = sentiment_overlay(prices, sentiment_index, args.field, args.max_lag)
+    covered = int((merged["Articles"] > 0).sum())
+    print(f"{args.symbol}: {covered} of {len(merged)} sessions with news ({int(merged['Articles'].sum())} articles)")
+    print(correlations.to_string(float_format="{:.3f}".format))
+
+
+if __name__ == "__main__":
+    main()
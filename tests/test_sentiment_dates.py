@@ -0,0 +1,71 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from sentiment_dates import json_ld_date, page_date, parse_datetime, result_dates, snippet_date
+
+NOW = datetime(2025, 6, 10, 12, 0)
+
+
+@pytest.mark.parametrize("snippets, expected", [
+    (["Reuters · 3 hours ago"], NOW - timedelta(hours=3)),
+    (["an hour ago"], NOW - timedelta(hours=1)),
+    (["4h"], NOW - timedelta(hours=4)),
+    (["2 days ago"], NOW - timedelta(days=2)),
+    (["yesterday"], NOW - timedelta(days=1)),
+    (["Bloomberg", "Jun 9, 2025"], datetime(2025, 6, 9)),
+    (["5 January 2025"], datetime(2025, 1, 5)),
+    (["2025-06-01"], datetime(2025, 6, 1)),
+    (["06/01/2025"], datetime(2025, 6, 1)),
+])
+def test_snippet_dates(snippets, expected):
+    assert snippet_date(snippets, NOW) == expected
+
+
+def test_date_without_year_is_never_in_the_future():
+    assert snippet_date(["Dec 20"], NOW) == datetime(2024, 12, 20)
+    assert snippet_date(["Jun 9"], NOW) == datetime(2025, 6, 9)
+
+
+def test_dates_in_running_text_are_ignored():
+    assert snippet_date(["The stock fell 10% on March 3 after the company cut its outlook"], NOW) is None
+    assert snippet_date(["Shares are up 5% in 3 days"], NOW) is None
+
+
+def test_relative_date_wins_over_absolute_dates():
+    snippets = ["Shares fell on March 3, 2025", "Mar 3, 2025", "Reuters · 3 hours ago"]
+    assert snippet_date(snippets, NOW) == NOW - timedelta(hours=3)
+
+
+def test_result_dates_match_snippet_date():
+    snippet_lists = [
+        ["The stock fell 10% on March 3"],
+        ["Bloomberg", "Jun 9, 2025"],
+        ["an hour ago", "Jun 1, 2025"],
+        [],
+        ["yesterday"],
+        ["4h"],
+    ]
+    assert result_dates(snippet_lists, NOW) == [snippet_date(snippets, NOW) for snippets in snippet_lists]
+    assert result_dates(snippet_lists, NOW)[:3] == [None, datetime(2025, 6, 9), NOW - timedelta(hours=1)]
+
+
+def test_parse_datetime():
+    utc = datetime(2025, 1, 5, 14, 30, tzinfo=timezone.utc).astimezone().replace(tzinfo=None)
+    assert parse_datetime("2025-01-05T14:30:00Z") == utc
+    assert parse_datetime("Sun, 05 Jan 2025 14:30:00 GMT") == utc
+    assert parse_datetime("2025-01-05") == datetime(2025, 1, 5)
+    assert parse_datetime("January 5, 2025") == datetime(2025, 1, 5)
+    # A written date needs a year to be machine-readable
+    assert parse_datetime("January 5") is None
+    assert parse_datetime("3 hours ago") is None
+    assert parse_datetime(None) is None
+
+
+def test_page_date_prefers_json_ld():
+    scripts = ['{"@context": "https://schema.org", "@graph": [{"@type": "NewsArticle", '
+               '"datePublished": "2025-03-04T08:00:00"}]}']
+    assert json_ld_date(scripts) == datetime(2025, 3, 4, 8, 0)
+    assert page_date(scripts, ["2025-03-05"], ["2025-03-06"]) == datetime(2025, 3, 4, 8, 0)
+    assert page_date(["not json"], [], ["2025-03-06"]) == datetime(2025, 3, 6)
+    assert page_date() is None
@@ -0,0 +1,82 @@
+import pytest
+
+import sentiment_pipeline
+import sentiment_scheduler
+from sentiment_cache import ArticleCache
+from sentiment_pipeline import SentimentPipeline
+from sentiment_sources import NewsSource
+from sentiment_store import SentimentStore
+
+LEAD = ("Apple reported third quarter revenue of 90 billion dollars, driven by iPhone sales in China "
+        "and services growth. ")
+PAGES = {
+    "/q3": LEAD * 4,
+    "/copy-snippet": LEAD * 4,
+    "/copy-no-snippet": LEAD * 4 + " Copyright Example News.",
+    "/q4": ("Apple reported fourth quarter revenue of 120 billion dollars after the holiday season, "
+            "with Mac sales lagging. ") * 4,
+    "/orphan": LEAD * 4,
+}
+Q3 = "Apple reports record Q3 earnings as iPhone sales climb"
+OTHER = "Microsoft cloud revenue beats estimates again"
+
+
+class Response:
+    def __init__(self, status_code, text=""):
+        self.status_code = status_code
+        self.text = text
+        self.headers = {}
+        self.ok = status_code < 400
+
+
+class Source(NewsSource):
+    name = "test"
+
+    def search(self, query):
+        return [
+            {"title": Q3, "link": "https://a.com/q3", "snippets": [LEAD]},
+            {"title": Q3, "link": "https://b.com/copy-snippet", "snippets": [LEAD]},
+            {"title": Q3, "link": "https://c.com/copy-no-snippet", "snippets": []},
+            {"title": Q3.replace("Q3", "Q4"), "link": "https://d.com/q4",
+             "snippets": ["Apple reported fourth quarter revenue of 120 billion dollars after the holiday season"]},
+            {"title": OTHER, "link": "https://e.com/broken", "snippets": [LEAD]},
+            {"title": OTHER, "link": "https://f.com/orphan", "snippets": [LEAD]},
+        ]
+
+
+@pytest.fixture
+def pipeline(tmp_path, monkeypatch):
+    fetched = []
+
+    def fake_get(url, timeout=None, paced=False, headers=None, **kwargs):
+        if url.endswith("robots.txt"):
+            return Response(404)
+        path = "/" + url.split("/", 3)[3]
+        fetched.append(path)
+        if path == "/broken":
+            return Response(500)
+        return Response(200, f"<html><body><article><p>{PAGES[path]}</p></article></body></html>")
+
+    monkeypatch.setattr(sentiment_pipeline, "http_get", fake_get)
+    monkeypatch.setattr(sentiment_scheduler, "http_get", fake_get)
+    pipeline = SentimentPipeline(sources=[Source()], cache=ArticleCache(str(tmp_path / "cache.db")),
+                                 store=SentimentStore(str(tmp_path / "history")), rate=100)
+    pipeline.fetched = fetched
+    yield pipeline
+    pipeline.close()
+
+
+def test_title_copies_are_settled_after_their_original(pipeline):
+    links = []
+    progress = []
+    summary = pipeline.search("AAPL", on_result=lambda rank, result: links.append(result[1]),
+                              on_progress=lambda done, total: progress.append((done, total)))
+
+    # Same story: dropped, without a download when the snippet already shows it
+    assert sorted(links) == ["https://a.com/q3", "https://d.com/q4", "https://e.com/broken", "https://f.com/orphan"]
+    assert summary["duplicates"] == 2
+    assert "/copy-snippet" not in pipeline.fetched
+    assert "/copy-no-snippet" in pipeline.fetched
+    # The original could not be fetched, so its copy is kept
+    assert "/orphan" in pipeline.fetched
+    assert progress[-1] == (6, 6)
@@ -0,0 +1,55 @@
+from sentiment_engine import SentimentEngine
+from sentiment_preprocess import deviation_report, prepare_text
+
+ARTICLE = " ".join([
+    "Apple shares surged after the company beat analyst estimates.",
+    "Subscribe to our newsletter for daily updates.",
+    "Revenue grew strongly in every region.",
+    "Apple shares surged after the company beat analyst estimates.",
+] + [f"Sentence number {i} describes the quarter in some detail." for i in range(200)])
+
+
+def test_prepare_text_drops_boilerplate_and_repeats():
+    prepared = prepare_text(ARTICLE, None)
+    assert "newsletter" not in prepared
+    assert prepared.count("beat analyst estimates") == 1
+    assert prepared.startswith("Apple shares surged")
+
+
+def test_prepare_text_caps_at_budget_keeping_the_lead():
+    prepared = prepare_text(ARTICLE, 100)
+    assert len(prepared.split()) <= 100
+    assert prepared.startswith("Apple shares surged")
+
+
+def test_engine_scores_full_text_by_default():
+    engine = SentimentEngine(finance=False)
+    full = engine.vader.polarity_scores(f"Title Title {ARTICLE}")
+    assert engine.score(ARTICLE, "Title")["vader"]["compound"] == full["compound"]
+
+    cleaned = SentimentEngine(finance=False, token_budget=100, clean=True).score(ARTICLE, "Title")
+    assert cleaned["vader"]["compound"] == SentimentEngine(finance=False).score(prepare_text(ARTICLE, 100),
+                                                                                  "Title")["vader"]["compound"]
+
+
+def test_deviation_report():
+    short = "Shares rallied on strong results. Analysts were upbeat."
+    report = deviation_report([short, ARTICLE], token_budget=100)
+
+    assert report["articles"] == 2
+    assert report["shortened"] == 1
+    assert report["words_full"] == len(short.split()) + len(ARTICLE.split())
+    assert report["words_scored"] < report["words_full"]
+    assert 0 <= report["overall_agreement"] <= 1
+    assert report["vader_compound"] >= 0
+    assert "finance_score" in report
+
+
+def test_deviation_report_is_zero_when_nothing_changes():
+    texts = ["Shares rallied on strong results.", "The stock fell after a weak quarter."]
+    report = deviation_report(texts, token_budget=1000)
+
+    assert report["shortened"] == 0
+    assert report["vader_compound"] == 0
+    assert report["textblob_polarity"] == 0
+    assert report["overall_agreement"] == 1
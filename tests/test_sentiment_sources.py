@@ -0,0 +1,120 @@
+import json
+
+from sentiment_sources import (LocalDumpSource, NearDuplicateIndex, NewsSource, collect_results, matches_query,
+                               parse_feed, same_story)
+
+Q3_BODY = ("Apple reported third quarter revenue of 90 billion dollars, driven by iPhone sales in China "
+           "and growth in services. ") * 4
+Q4_BODY = ("Apple reported fourth quarter revenue of 120 billion dollars after the holiday season, "
+           "with Mac sales lagging and wearables flat. ") * 4
+HEADLINE = "Apple reports record Q3 earnings as iPhone sales climb"
+
+
+class StaticSource(NewsSource):
+    def __init__(self, name, records):
+        self.name = name
+        self.records = records
+
+    def search(self, query):
+        return [dict(record) for record in self.records]
+
+
+class BrokenSource(NewsSource):
+    name = "broken"
+
+    def search(self, query):
+        raise ConnectionError("offline")
+
+
+def record(title, link, snippets=()):
+    return {"title": title, "link": link, "snippets": list(snippets)}
+
+
+def test_near_duplicate_index():
+    index = NearDuplicateIndex()
+    assert index.add("a", Q3_BODY) is None
+    assert index.add("b", Q3_BODY + " Copyright 2025 Example News.") == "a"
+    assert index.add("c", Q4_BODY) is None
+
+
+def test_same_story():
+    assert same_story(Q3_BODY + " Reporting by a wire service.", Q3_BODY)
+    assert not same_story(Q4_BODY, Q3_BODY)
+    # A snippet repeating the lead counts as the same story
+    assert same_story(Q3_BODY[:150], Q3_BODY)
+
+
+def test_collect_results_drops_repeated_urls_and_marks_title_copies(capsys):
+    sources = [
+        StaticSource("one", [
+            record(HEADLINE, "https://a.com/q3?utm_source=feed"),
+            record(HEADLINE.replace("Q3", "Q4"), "https://b.com/q4"),
+            record("", "https://c.com/untitled"),
+        ]),
+        StaticSource("two", [
+            record(HEADLINE, "https://A.com/q3/"),
+            record(HEADLINE, "https://d.com/copy"),
+            record("", "https://e.com/untitled"),
+        ]),
+        BrokenSource(),
+    ]
+    records, dropped = collect_results(sources, "apple")
+
+    assert dropped == 1
+    assert [r["link"] for r in records] == ["https://a.com/q3?utm_source=feed", "https://b.com/q4",
+                                             "https://c.com/untitled", "https://d.com/copy",
+                                             "https://e.com/untitled"]
+    marked = {r["link"]: r.get("title_match") for r in records}
+    # Near-identical titles are only marked, with the canonical URL of the first one
+    assert marked["https://d.com/copy"] == "https://a.com/q3"
+    assert marked["https://b.com/q4"] == "https://a.com/q3"
+    # Empty titles are never compared
+    assert marked["https://e.com/untitled"] is None
+    assert [r["source"] for r in records] == ["one", "one", "one", "two", "two"]
+    assert "offline" in capsys.readouterr().out
+
+
+def test_parse_feed_rss_and_atom():
+    rss = """<?xml version="1.0"?><rss version="2.0"><channel>
+        <item><title>Apple beats estimates</title><link>https://example.com/apple</link>
+        <description>&lt;p&gt;Strong &lt;b&gt;iPhone&lt;/b&gt; sales&lt;/p&gt;</description>
+        <pubDate>Sun, 05 Jan 2025 14:30:00 GMT</pubDate></item>
+        <item><title>No link</title></item>
+    </channel></rss>"""
+    records = parse_feed(rss)
+    assert len(records) == 1
+    assert records[0]["title"] == "Apple beats estimates"
+    assert records[0]["link"] == "https://example.com/apple"
+    assert " ".join(records[0]["snippets"][0].split()) == "Strong iPhone sales"
+    assert records[0]["published"] is not None
+
+    atom = """<feed xmlns="http://www.w3.org/2005/Atom"><entry>
+        <title>Nvidia rallies</title>
+        <link rel="enclosure" href="https://example.com/image.jpg"/>
+        <link rel="alternate" href="https://example.com/nvidia"/>
+        <summary>Chip demand</summary><updated>2025-01-05T10:00:00Z</updated>
+    </entry></feed>"""
+    records = parse_feed(atom)
+    assert records[0]["link"] == "https://example.com/nvidia"
+    assert records[0]["snippets"] == ["Chip demand"]
+
+
+def test_matches_query():
+    item = {"title": "Apple beats estimates", "snippets": ["iPhone sales rise"]}
+    assert matches_query(item, "apple iphone")
+    assert not matches_query(item, "apple nvidia")
+
+
+def test_local_dump_source(tmp_path):
+    (tmp_path / "results.json").write_text(json.dumps([
+        {"title": "Apple beats estimates", "link": "https://example.com/apple",
+         "published": "2025-01-05", "content": "Apple shares rose."},
+        {"title": "Nvidia rallies", "link": "https://example.com/nvidia"},
+        {"title": "No link"},
+    ]), encoding="utf-8")
+    (tmp_path / "notes.txt").write_text("ignored", encoding="utf-8")
+
+    records = LocalDumpSource(str(tmp_path)).search("apple")
+    assert [r["link"] for r in records] == ["https://example.com/apple"]
+    assert records[0]["content"] == "Apple shares rose."
+    assert records[0]["published"].year == 2025
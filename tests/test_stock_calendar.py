@@ -0,0 +1,69 @@
+from datetime import date
+
+import pandas as pd
+
+from stock_calendar import (is_session, missing_sessions, next_session, normalize_range, previous_session,
+                            range_cache_key, resample_sessions, session_count, sessions_between)
+
+
+def test_holidays_and_special_closures_are_not_sessions():
+    assert not is_session("2025-07-04")   # Independence Day
+    assert not is_session("2025-04-18")   # Good Friday
+    assert not is_session("2025-01-09")   # National day of mourning
+    assert not is_session("2026-06-19")   # Juneteenth
+    assert not is_session("2025-11-29") and not is_session("2025-11-30")  # Weekend
+    assert is_session("2025-07-03")
+
+
+def test_new_year_on_saturday_is_not_observed_on_friday():
+    assert is_session("2021-12-31")
+    assert not is_session("2023-01-02")   # New Year's Day 2023 fell on a Sunday
+
+
+def test_next_and_previous_session_skip_closed_days():
+    assert next_session("2025-07-04") == date(2025, 7, 7)
+    assert previous_session("2025-07-06") == date(2025, 7, 3)
+    # On a session both return the session itself
+    assert next_session("2025-07-07") == previous_session("2025-07-07") == date(2025, 7, 7)
+
+
+def test_normalize_range():
+    assert normalize_range("2025-07-04", "2025-07-13") == ("2025-07-07", "2025-07-11")
+    assert normalize_range("2025-07-05", "2025-07-06") == (None, None)
+    assert range_cache_key("aapl", "2025-07-04", "2025-07-13") == range_cache_key("AAPL", "2025-07-07", "2025-07-11")
+
+
+def test_sessions_between_is_inclusive():
+    sessions = sessions_between("2025-06-30", "2025-07-07")
+    assert list(sessions.strftime("%Y-%m-%d")) == ["2025-06-30", "2025-07-01", "2025-07-02", "2025-07-03",
+                                                   "2025-07-07"]
+    assert session_count("2025-06-30", "2025-07-07") == 5
+    assert session_count("2025-07-07", "2025-06-30") == 0
+
+
+def test_missing_sessions():
+    index = pd.DatetimeIndex(["2025-06-30", "2025-07-03"])
+    missing = missing_sessions(index, "2025-06-30", "2025-07-03")
+    assert list(missing.strftime("%Y-%m-%d")) == ["2025-07-01", "2025-07-02"]
+
+
+def test_resample_labels_bars_with_their_last_session():
+    index = sessions_between("2025-06-23", "2025-07-11")
+    df = pd.DataFrame({
+        "Open": range(len(index)),
+        "High": range(10, 10 + len(index)),
+        "Low": range(len(index)),
+        "Close": range(len(index)),
+        "Volume": [100] * len(index),
+    }, index=index, dtype=float)
+
+    weekly = resample_sessions(df, "W")
+    # The week of July 4 ends on Thursday
+    assert list(weekly.index.strftime("%Y-%m-%d")) == ["2025-06-27", "2025-07-03", "2025-07-11"]
+    assert list(weekly["Volume"]) == [500, 400, 500]
+    assert weekly["Open"].iloc[1] == df.loc["2025-06-30", "Open"]
+    assert weekly["Close"].iloc[1] == df.loc["2025-07-03", "Close"]
+    assert weekly["High"].iloc[1] == df.loc["2025-06-30":"2025-07-03", "High"].max()
+
+    monthly = resample_sessions(df, "M")
+    assert list(monthly.index.strftime("%Y-%m-%d")) == ["2025-06-30", "2025-07-11"]
@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+
+from stock_memory import FLOAT32_RTOL, SessionMemoryManager, downcast_frame
+from stock_risk import compute_risk_metrics, daily_returns
+
+
+def price_frame(n=500, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.cumprod(1 + rng.normal(0, 0.02, n))
+    return pd.DataFrame({
+        "Open": close * (1 + rng.normal(0, 0.005, n)),
+        "High": close * 1.01,
+        "Low": close * 0.99,
+        "Close": close,
+        "Adj Close": close * 0.98,
+        "Volume": rng.integers(1_000_000, 50_000_000, n).astype(float),
+    }, index=pd.bdate_range("2023-01-02", periods=n))
+
+
+def test_close_columns_keep_full_precision():
+    df = price_frame()
+    small = downcast_frame(df)
+
+    assert small["Close"].dtype == np.float64
+    assert small["Adj Close"].dtype == np.float64
+    assert np.array_equal(small["Close"].to_numpy(), df["Close"].to_numpy())
+    assert small["Open"].dtype == np.float32
+    assert np.allclose(small["Open"], df["Open"], rtol=FLOAT32_RTOL, atol=0)
+    assert small["Volume"].dtype == np.uint32
+
+
+def test_returns_and_var_unchanged_by_downcast():
+    df = price_frame()
+    small = downcast_frame(df)
+
+    returns = daily_returns(df["Close"])
+    small_returns = daily_returns(small["Close"])
+    assert np.allclose(small_returns, returns, rtol=1e-12, atol=0)
+
+    kwargs = dict(n_scenarios=20_000, chunk_size=5_000, workers=1, seed=7)
+    expected = compute_risk_metrics(returns, **kwargs)
+    actual = compute_risk_metrics(small_returns, **kwargs)
+    assert np.allclose(actual["VaR"], expected["VaR"], rtol=1e-9)
+    assert np.allclose(actual["ES"], expected["ES"], rtol=1e-9)
+
+
+def test_volume_with_gaps_stays_float():
+    df = price_frame(10)
+    df.iloc[3, df.columns.get_loc("Volume")] = np.nan
+    assert downcast_frame(df)["Volume"].dtype.kind == "f"
+
+
+def test_budget_evicts_least_recently_used():
+    evicted = []
+    memory = SessionMemoryManager(budget_bytes=60_000, on_evict=evicted.append)
+    memory.put("AAA", "daily", price_frame(1000))
+    memory.put("BBB", "daily", price_frame(1000))
+
+    assert evicted == ["AAA"]
+    assert memory.symbols() == ["BBB"]
+    assert memory.get("AAA", "daily") is None
@@ -0,0 +1,143 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from stock_calendar import sessions_between
+from stock_price_store import ACTION_COLUMNS, DIVIDEND, SPLIT, PriceStore, empty_bars
+
+
+class FakeYahoo:
+    """
+    Serves split-adjusted bars and corporate actions the way fetch_yahoo_history does,
+    from a raw price history, and records every request.
+    """
+
+    def __init__(self, raw=None, actions=()):
+        self.raw = raw if raw is not None else empty_bars()
+        self.actions = pd.DataFrame(list(actions), columns=ACTION_COLUMNS)
+        self.calls = []
+
+    def __call__(self, symbol, start_date, end_date):
+        self.calls.append((symbol, start_date, end_date))
+        bars = self.raw[(self.raw.index >= start_date) & (self.raw.index < end_date)].copy()
+        for date, kind, value in self.actions.itertuples(index=False):
+            if kind == SPLIT:
+                before = bars.index < date
+                bars.loc[before, ["Open", "High", "Low", "Close"]] /= value
+                bars.loc[before, "Volume"] *= value
+        return bars, self.actions.copy()
+
+
+def raw_bars(start="2024-01-02", end="2024-03-28", close=100.0):
+    index = sessions_between(start, end)
+    values = np.full(len(index), close)
+    return pd.DataFrame({"Open": values, "High": values, "Low": values, "Close": values,
+                         "Volume": np.full(len(index), 1000.0)}, index=index)
+
+
+def test_get_prices_downloads_only_missing_sessions(tmp_path):
+    fetcher = FakeYahoo(raw_bars())
+    store = PriceStore(str(tmp_path), fetcher)
+
+    first = store.get_prices("aapl", "2024-02-01", "2024-03-02")
+    assert len(first) == len(sessions_between("2024-02-01", "2024-03-01"))
+    assert len(fetcher.calls) == 1
+
+    # Same range again, and a range that only adds a weekend: nothing to download
+    store.get_prices("AAPL", "2024-02-01", "2024-03-02")
+    store.get_prices("AAPL", "2024-02-01", "2024-03-04")
+    assert len(fetcher.calls) == 1
+
+    # Extending the range downloads only the new sessions (2024-01-15 is a holiday)
+    store.get_prices("AAPL", "2024-01-15", "2024-03-15")
+    assert fetcher.calls[1:] == [("AAPL", "2024-01-16", "2024-02-01"), ("AAPL", "2024-03-02", "2024-03-15")]
+
+
+def test_store_is_persisted_per_symbol(tmp_path):
+    PriceStore(str(tmp_path), FakeYahoo(raw_bars())).get_prices("MSFT", "2024-02-01", "2024-03-01")
+
+    fetcher = FakeYahoo(raw_bars())
+    reopened = PriceStore(str(tmp_path), fetcher)
+    assert reopened.symbols() == ["MSFT"]
+    assert len(reopened.get_prices("MSFT", "2024-02-01", "2024-03-01")) > 0
+    assert fetcher.calls == []
+
+
+def test_split_adjustment(tmp_path):
+    raw = raw_bars()
+    raw.loc[raw.index >= "2024-02-15", ["Open", "High", "Low", "Close"]] = 50.0
+    raw.loc[raw.index >= "2024-02-15", "Volume"] = 2000.0
+    fetcher = FakeYahoo(raw, [(pd.Timestamp("2024-02-15"), SPLIT, 2.0)])
+    store = PriceStore(str(tmp_path), fetcher)
+
+    adjusted = store.get_prices("NVDA", "2024-01-02", "2024-03-28")
+    assert np.allclose(adjusted["Close"], 50.0)
+    assert np.allclose(adjusted["Volume"], 2000.0)
+    # The store keeps the true raw prices
+    stored = store.raw_prices("NVDA")
+    assert np.allclose(stored.loc[:"2024-02-14", "Close"], 100.0)
+    assert np.allclose(stored.loc["2024-02-15":, "Close"], 50.0)
+
+
+def test_dividend_adjustment(tmp_path):
+    fetcher = FakeYahoo(raw_bars(), [(pd.Timestamp("2024-02-15"), DIVIDEND, 1.0)])
+    store = PriceStore(str(tmp_path), fetcher)
+
+    adjusted = store.get_prices("KO", "2024-01-02", "2024-03-28")
+    assert np.allclose(adjusted.loc[:"2024-02-14", "Close"], 99.0)
+    assert np.allclose(adjusted.loc["2024-02-15":, "Close"], 100.0)
+
+    dates, close, volume = store.adjusted_close_volume("KO", "2024-02-01", "2024-03-01")
+    expected = store.adjusted_prices("KO", "2024-02-01", "2024-03-01")
+    assert np.array_equal(dates, expected.index.values)
+    assert np.allclose(close, expected["Close"])
+    assert np.allclose(volume, expected["Volume"])
+
+
+def test_empty_download_is_not_recorded(tmp_path):
+    fetcher = FakeYahoo()
+    store = PriceStore(str(tmp_path), fetcher)
+
+    prices = store.get_prices("NOPE", "2024-02-01", "2024-03-01")
+    assert prices.empty
+    assert isinstance(prices.index, pd.DatetimeIndex)
+    assert store.symbols() == []
+    assert store.gaps("NOPE").empty
+
+    # Not marked as covered, so the next request asks again
+    store.get_prices("NOPE", "2024-02-01", "2024-03-01")
+    assert len(fetcher.calls) == 2
+
+
+def test_coverage_only_spans_received_bars(tmp_path):
+    # Listed mid-February: the sessions before the first bar are not marked as covered
+    fetcher = FakeYahoo(raw_bars("2024-02-15"))
+    store = PriceStore(str(tmp_path), fetcher)
+
+    store.get_prices("IPO", "2024-02-01", "2024-03-01")
+    assert store.corporate_actions("IPO").empty
+    assert store._entry("IPO")["coverage"] == (pd.Timestamp("2024-02-15"), pd.Timestamp("2024-02-29"))
+    store.get_prices("IPO", "2024-02-01", "2024-03-01")
+    assert fetcher.calls[-1] == ("IPO", "2024-02-01", "2024-02-15")
+
+
+def test_adjusted_prices_of_unknown_symbol_with_range(tmp_path):
+    store = PriceStore(str(tmp_path), FakeYahoo())
+    prices = store.adjusted_prices("NONE", "2024-01-01", "2024-02-01")
+    assert prices.empty
+    assert list(prices.columns) == ["Open", "High", "Low", "Close", "Volume"]
+
+
+def test_gaps_reports_sessions_without_bars(tmp_path):
+    raw = raw_bars().drop(pd.Timestamp("2024-02-21"))
+    store = PriceStore(str(tmp_path), FakeYahoo(raw))
+    store.get_prices("HALT", "2024-02-01", "2024-03-01")
+    assert list(store.gaps("HALT").strftime("%Y-%m-%d")) == ["2024-02-21"]
+
+
+@pytest.mark.parametrize("start, end", [("2024-02-03", "2024-02-05"), ("2024-03-29", "2024-03-30")])
+def test_ranges_without_sessions_download_nothing(tmp_path, start, end):
+    fetcher = FakeYahoo(raw_bars())
+    store = PriceStore(str(tmp_path), fetcher)
+    assert store.get_prices("AAPL", start, end).empty
+    assert fetcher.calls == []
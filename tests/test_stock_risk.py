@@ -0,0 +1,81 @@
+import argparse
+
+import numpy as np
+import pytest
+from scipy import stats
+
+from stock_risk import (check_confidence_levels, compute_risk_metrics, confidence_level, daily_returns,
+                        historical_var_es, monte_carlo_var_es, parametric_var_es)
+
+
+@pytest.mark.parametrize("levels", [[95], [0.95, 99], [0], [1], [-0.1], []])
+def test_confidence_levels_outside_zero_one_are_rejected(levels):
+    with pytest.raises(ValueError):
+        check_confidence_levels(levels)
+    with pytest.raises(ValueError):
+        compute_risk_metrics(np.linspace(-0.05, 0.05, 50), levels, n_scenarios=1000, workers=1)
+
+
+def test_confidence_level_argument_type():
+    assert confidence_level("0.99") == 0.99
+    for text in ("95", "1", "abc"):
+        with pytest.raises(argparse.ArgumentTypeError):
+            confidence_level(text)
+
+
+def test_daily_returns_drops_missing_values():
+    # No return is made up across the missing price
+    assert np.allclose(daily_returns([100, 110, np.nan, 121, 133.1]), [0.1, 0.1])
+
+
+def test_historical_var_es():
+    returns = np.linspace(-0.1, 0.1, 201)
+    var, es = historical_var_es(returns, 0.95)
+    assert var == pytest.approx(0.09)
+    assert es == pytest.approx(0.095)
+
+
+def test_parametric_var_es_matches_the_normal_formulas():
+    returns = np.random.default_rng(0).normal(0.001, 0.02, 1000)
+    mu, std = returns.mean(), returns.std()
+    var, es = parametric_var_es(returns, 0.99)
+    assert var == pytest.approx(-(mu + stats.norm.ppf(0.01) * std))
+    assert es == pytest.approx(-(mu - std * stats.norm.pdf(stats.norm.ppf(0.01)) / 0.01))
+    assert es > var
+
+
+def test_monte_carlo_converges_to_parametric():
+    returns = np.random.default_rng(1).normal(0.0, 0.02, 2000)
+    results = monte_carlo_var_es(returns, (0.95, 0.99), n_scenarios=200_000, chunk_size=30_000, seed=3)
+    for confidence in (0.95, 0.99):
+        var, es = parametric_var_es(returns, confidence)
+        assert results[confidence][0] == pytest.approx(var, rel=0.03)
+        assert results[confidence][1] == pytest.approx(es, rel=0.03)
+
+
+def test_monte_carlo_is_reproducible_and_chunk_size_independent():
+    returns = np.random.default_rng(2).normal(0.0, 0.02, 500)
+    first = monte_carlo_var_es(returns, (0.95,), n_scenarios=50_000, chunk_size=7_000, seed=5)
+    second = monte_carlo_var_es(returns, (0.95,), n_scenarios=50_000, chunk_size=7_000, seed=5)
+    assert first == second
+
+    bootstrap = monte_carlo_var_es(returns, (0.95,), n_scenarios=50_000, method="bootstrap", seed=5)
+    historical = historical_var_es(returns, 0.95)
+    assert bootstrap[0.95][0] == pytest.approx(historical[0], rel=0.1)
+
+
+def test_compute_risk_metrics_table():
+    returns = np.random.default_rng(4).normal(0.0, 0.02, 300)
+    table = compute_risk_metrics(returns, (0.95, 0.99), n_scenarios=20_000, workers=1, seed=0)
+
+    assert list(table.columns) == ["Confidence", "Method", "VaR", "ES"]
+    assert len(table) == 6
+    assert (table["ES"] >= table["VaR"]).all()
+    # Higher confidence means a larger loss threshold for every method
+    by_level = table.pivot(index="Method", columns="Confidence", values="VaR")
+    assert (by_level[0.99] > by_level[0.95]).all()
+
+
+def test_compute_risk_metrics_needs_two_returns():
+    with pytest.raises(ValueError):
+        compute_risk_metrics([0.01, np.nan], n_scenarios=1000, workers=1)